@@ -1,33 +1,30 @@
+import argparse
 import sqlite3
 import random
 from datetime import datetime, timedelta, date
 from faker import Faker
 import json
-import uuid
 import pandas as pd
 
+from create_tables import BULK_LOAD_PRAGMAS, finish_bulk_load
+from src.bulk_insert import stream_executemany
+from src.db_pool import ConnectionPool, get_pool
+from src.dates import register_adapters
+from src.kpi_impact import refresh_kpi_impact
+from src.news_events import insert_news_events  # kept importable from this module
+from src.reference_data import ReferenceData
+from text_pool import get_text_pool
+from vectorized_data import VectorizedGenerator
+
 # Initialize Faker
 fake = Faker()
 
-# Define date adapter functions
-def adapt_date(val):
-    return val.isoformat()
-
-def convert_date(val):
-    return datetime.strptime(val.decode(), "%Y-%m-%d").date()
-
-def adapt_datetime(val):
-    return val.isoformat()
-
-def convert_datetime(val):
-    return datetime.fromisoformat(val.decode())
-
 # Register adapters
-sqlite3.register_adapter(date, adapt_date)
-sqlite3.register_adapter(datetime, adapt_datetime)
-sqlite3.register_converter("DATE", convert_date)
-sqlite3.register_converter("DATETIME", convert_datetime)
-sqlite3.register_converter("TIMESTAMP", convert_datetime)
+register_adapters()
+
+# Reference date of scaled datasets when --today is not given, so a scale and
+# seed always produce the same rows
+SCALED_TODAY = '2025-01-01'
 
 
 def generate_currencies(cursor, num_records=10):
@@ -474,6 +471,9 @@ def insert_base_data(conn):
     generate_uom(cursor)
     generate_contract_types(cursor)
     generate_contract_statuses(cursor)
+    # Contracts are scoped to a region and business unit, so these come first
+    generate_geographic_regions(cursor)
+    generate_business_units(cursor)
     
     conn.commit()
     print("Base data generation completed!")
@@ -495,42 +495,49 @@ def generate_contracts(cursor, num_contracts=400):
     cursor.execute("SELECT user_id FROM User WHERE is_active = 1")
     user_ids = [row[0] for row in cursor.fetchall()]
     
+    cursor.execute("SELECT unit_id FROM BusinessUnit")
+    unit_ids = [row[0] for row in cursor.fetchall()] or [None]
+    
+    cursor.execute("SELECT region_id FROM GeographicRegion")
+    region_ids = [row[0] for row in cursor.fetchall()] or [None]
+    
     # Generate contracts
-    contracts = []
-    current_date = datetime.now()
-    
-    for i in range(num_contracts):
-        contract_number = f"CTR{str(i+1).zfill(6)}"
-        vendor_id = random.choice(vendor_ids)
-        contract_type_id = random.choice(contract_type_ids)
-        status_id = random.choice(contract_status_ids)
-        
-        # Generate realistic dates
-        start_date = current_date - timedelta(days=random.randint(0, 365*2))  # Up to 2 years in the past
-        duration_days = random.choice([90, 180, 365, 730])  # 3 months, 6 months, 1 year, or 2 years
-        end_date = start_date + timedelta(days=duration_days)
-        
-        total_value = round(random.uniform(10000, 1000000), 2)
-        currency_code = random.choice(currency_codes)
-        terms_conditions = fake.text(max_nb_chars=500)
-        created_by = random.choice(user_ids)
-        
-        contracts.append((
-            contract_number, vendor_id, contract_type_id, status_id,
-            start_date.date(), end_date.date(), total_value, currency_code,
-            terms_conditions, created_by
-        ))
+    def contract_rows():
+        current_date = datetime.now()
+        
+        for i in range(num_contracts):
+            contract_number = f"CTR{str(i+1).zfill(6)}"
+            vendor_id = random.choice(vendor_ids)
+            contract_type_id = random.choice(contract_type_ids)
+            status_id = random.choice(contract_status_ids)
+            
+            # Generate realistic dates
+            start_date = current_date - timedelta(days=random.randint(0, 365*2))  # Up to 2 years in the past
+            duration_days = random.choice([90, 180, 365, 730])  # 3 months, 6 months, 1 year, or 2 years
+            end_date = start_date + timedelta(days=duration_days)
+            
+            total_value = round(random.uniform(10000, 1000000), 2)
+            currency_code = random.choice(currency_codes)
+            terms_conditions = get_text_pool(500).text()
+            created_by = random.choice(user_ids)
+            business_unit_id = random.choice(unit_ids)
+            region_id = random.choice(region_ids)
+            
+            yield (
+                contract_number, vendor_id, contract_type_id, status_id,
+                start_date.date(), end_date.date(), total_value, currency_code,
+                terms_conditions, business_unit_id, region_id, created_by
+            )
     
-    cursor.executemany("""
+    count = stream_executemany(cursor, """
         INSERT INTO ContractHeader (
             contract_number, vendor_id, contract_type_id, status_id,
             start_date, end_date, total_value, currency_code,
-            terms_conditions, created_by
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, contracts)
+            terms_conditions, business_unit_id, region_id, created_by
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, contract_rows(), label="contracts")
     
-    print(f"Inserted {num_contracts} contracts")
-    return contracts
+    return count
 
 def generate_contract_lines(cursor):
     # Get necessary reference data
@@ -546,102 +553,98 @@ def generate_contract_lines(cursor):
     cursor.execute("SELECT uom_id FROM UnitOfMeasure")
     uom_ids = [row[0] for row in cursor.fetchall()]
     
-    contract_lines = []
-    
-    for contract_id in contract_ids:
-        # Generate 1-5 lines per contract
-        num_lines = random.randint(1, 5)
-        
-        for _ in range(num_lines):
-            # Randomly choose between product and service
-            if random.random() < 0.6:  # 60% chance of product
-                product_id = random.choice(product_ids)
-                service_id = None
-            else:
-                product_id = None
-                service_id = random.choice(service_ids)
-            
-            quantity = round(random.uniform(1, 100), 2)
-            unit_price = round(random.uniform(100, 10000), 2)
-            line_value = quantity * unit_price  # Calculate line value
+    def contract_line_rows():
+        for contract_id in contract_ids:
+            # Generate 1-5 lines per contract
+            num_lines = random.randint(1, 5)
             
-            contract_lines.append((
-                contract_id,
-                product_id,
-                service_id,
-                random.choice(uom_ids),
-                quantity,
-                unit_price,
-                line_value,  # Include calculated value
-                fake.date_between(start_date='-1y', end_date='+1y'),
-                fake.date_between(start_date='+1y', end_date='+2y'),
-                fake.text(max_nb_chars=200)
-            ))
-    
-    cursor.executemany("""
+            for _ in range(num_lines):
+                # Randomly choose between product and service
+                if random.random() < 0.6:  # 60% chance of product
+                    product_id = random.choice(product_ids)
+                    service_id = None
+                else:
+                    product_id = None
+                    service_id = random.choice(service_ids)
+                
+                quantity = round(random.uniform(1, 100), 2)
+                unit_price = round(random.uniform(100, 10000), 2)
+                line_value = quantity * unit_price  # Calculate line value
+                
+                yield (
+                    contract_id,
+                    product_id,
+                    service_id,
+                    random.choice(uom_ids),
+                    quantity,
+                    unit_price,
+                    line_value,  # Include calculated value
+                    fake.date_between(start_date='-1y', end_date='+1y'),
+                    fake.date_between(start_date='+1y', end_date='+2y'),
+                    get_text_pool(200).text()
+                )
+    
+    stream_executemany(cursor, """
         INSERT INTO ContractLine (
             contract_id, product_id, service_id, uom_id,
             quantity, unit_price, line_value,
             delivery_start, delivery_end, line_description
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, contract_lines)
-    
-    print(f"Inserted {len(contract_lines)} contract lines")
+    """, contract_line_rows(), label="contract lines")
 
-def generate_payment_schedules(cursor):
+def generate_payment_schedules(cursor, today=None):
     cursor.execute("SELECT contract_id, start_date, end_date, total_value FROM ContractHeader")
     contracts = cursor.fetchall()
+    current_date = (today or datetime.now()).date()
     
-    payment_schedules = []
-    payment_types = ['Milestone', 'Monthly', 'Quarterly', 'Annual']
-    
-    for contract in contracts:
-        contract_id, start_date, end_date, total_value = contract
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        # Determine number of payments based on contract duration
-        duration_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-        payment_type = random.choice(payment_types)
+    def payment_schedule_rows():
+        payment_types = ['Milestone', 'Monthly', 'Quarterly', 'Annual']
         
-        if payment_type == 'Monthly':
-            num_payments = max(1, duration_months)
-        elif payment_type == 'Quarterly':
-            num_payments = max(1, duration_months // 3)
-        elif payment_type == 'Annual':
-            num_payments = max(1, duration_months // 12)
-        else:  # Milestone
-            num_payments = random.randint(2, 4)
-        
-        payment_amount = round(total_value / num_payments, 2)
-        
-        for i in range(num_payments):
+        for contract in contracts:
+            contract_id, start_date, end_date, total_value = contract
+            start_date = datetime.strptime(start_date, '%Y-%m-%d')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d')
+            
+            # Determine number of payments based on contract duration
+            duration_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+            payment_type = random.choice(payment_types)
+            
             if payment_type == 'Monthly':
-                due_date = start_date + timedelta(days=30 * i)
+                num_payments = max(1, duration_months)
             elif payment_type == 'Quarterly':
-                due_date = start_date + timedelta(days=90 * i)
+                num_payments = max(1, duration_months // 3)
             elif payment_type == 'Annual':
-                due_date = start_date + timedelta(days=365 * i)
+                num_payments = max(1, duration_months // 12)
             else:  # Milestone
-                interval = (end_date - start_date) / (num_payments - 1)
-                due_date = start_date + (interval * i)
+                num_payments = random.randint(2, 4)
             
-            is_paid = due_date.date() < datetime.now().date()
-            paid_date = due_date if is_paid else None
+            payment_amount = round(total_value / num_payments, 2)
             
-            payment_schedules.append((
-                contract_id, due_date.date(), payment_amount, payment_type,
-                is_paid, paid_date
-            ))
+            for i in range(num_payments):
+                if payment_type == 'Monthly':
+                    due_date = start_date + timedelta(days=30 * i)
+                elif payment_type == 'Quarterly':
+                    due_date = start_date + timedelta(days=90 * i)
+                elif payment_type == 'Annual':
+                    due_date = start_date + timedelta(days=365 * i)
+                else:  # Milestone
+                    interval = (end_date - start_date) / (num_payments - 1)
+                    due_date = start_date + (interval * i)
+                
+                is_paid = due_date.date() < current_date
+                paid_date = due_date if is_paid else None
+                
+                yield (
+                    contract_id, due_date.date(), payment_amount, payment_type,
+                    is_paid, paid_date
+                )
     
-    cursor.executemany("""
+    stream_executemany(cursor, """
         INSERT INTO ContractPaymentSchedule (
             contract_id, due_date, amount, payment_type,
             is_paid, paid_date
         ) VALUES (?, ?, ?, ?, ?, ?)
-    """, payment_schedules)
-    
-    print(f"Inserted {len(payment_schedules)} payment schedules")
+    """, payment_schedule_rows(), label="payment schedules")
 
 def generate_kpi_categories(cursor):
     categories = [
@@ -741,52 +744,50 @@ def generate_kpi_measurements(cursor):
     cursor.execute("SELECT kpi_id, target_threshold FROM KPIDefinition WHERE is_active = 1")
     kpis = cursor.fetchall()
     
-    measurements = []
-    current_date = datetime.now().date()
-    
-    for contract_id in contract_ids:
-        for kpi_id, target_threshold in kpis:
-            # Generate monthly measurements for the past year
-            for month in range(24):
-                measure_date = current_date - timedelta(days=30 * month)
-                
-                actual_value = round(target_threshold * random.uniform(0.7, 1.3), 2)
-                target_value = target_threshold
-                
-                # Calculate achievement percentage
-                achievement_percentage = round((actual_value / target_value * 100), 2) if target_value != 0 else None
-                
-                # Calculate status
-                if achievement_percentage:
-                    if actual_value >= target_value:
-                        status = 'Achieved'
-                    elif actual_value >= (target_value * 0.9):
-                        status = 'At Risk'
+    def measurement_rows():
+        current_date = datetime.now().date()
+        
+        for contract_id in contract_ids:
+            for kpi_id, target_threshold in kpis:
+                # Generate monthly measurements for the past year
+                for month in range(24):
+                    measure_date = current_date - timedelta(days=30 * month)
+                    
+                    actual_value = round(target_threshold * random.uniform(0.7, 1.3), 2)
+                    target_value = target_threshold
+                    
+                    # Calculate achievement percentage
+                    achievement_percentage = round((actual_value / target_value * 100), 2) if target_value != 0 else None
+                    
+                    # Calculate status
+                    if achievement_percentage:
+                        if actual_value >= target_value:
+                            status = 'Achieved'
+                        elif actual_value >= (target_value * 0.9):
+                            status = 'At Risk'
+                        else:
+                            status = 'Below Target'
                     else:
-                        status = 'Below Target'
-                else:
-                    status = 'Not Applicable'
-                
-                measurements.append((
-                    contract_id,
-                    kpi_id,
-                    measure_date,
-                    actual_value,
-                    target_value,
-                    achievement_percentage,
-                    status,
-                    fake.text(max_nb_chars=100)  # Comments
-                ))
-    
-    cursor.executemany("""
+                        status = 'Not Applicable'
+                    
+                    yield (
+                        contract_id,
+                        kpi_id,
+                        measure_date,
+                        actual_value,
+                        target_value,
+                        achievement_percentage,
+                        status,
+                        get_text_pool(100).text()  # Comments
+                    )
+    
+    stream_executemany(cursor, """
         INSERT INTO ContractKPIMeasurement (
             contract_id, kpi_id, measure_date,
             actual_value, target_value, achievement_percentage,
             status, comments
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, measurements)
-    
-    print(f"Inserted {len(measurements)} KPI measurements")
+    """, measurement_rows(), label="KPI measurements")
 
 def generate_meta_kpi_definitions(cursor):
     meta_kpis = [
@@ -881,7 +882,7 @@ def generate_meta_kpi_components(cursor):
     
     print(f"Inserted {len(components)} meta KPI components")
 
-def generate_meta_kpi_measurements(cursor):
+def generate_meta_kpi_measurements(cursor, today=None):
     # Get meta KPI definitions and their components
     cursor.execute("""
         SELECT mkd.meta_kpi_id, mkd.calculation_frequency, mkd.target_threshold,
@@ -908,7 +909,7 @@ def generate_meta_kpi_measurements(cursor):
         })
     
     measurements = []
-    current_date = datetime.now().date()
+    current_date = (today or datetime.now()).date()
     
     # Generate measurements for each meta KPI
     for meta_kpi_id, meta_kpi in meta_kpis.items():
@@ -1051,7 +1052,7 @@ def generate_meta_kpi_measurements(cursor):
     
 #     print(f"Inserted {len(measurements)} meta KPI measurements")
 
-def generate_contract_amendments(cursor, num_amendments=100):
+def generate_contract_amendments(cursor, num_amendments=100, today=None):
     cursor.execute("SELECT contract_id FROM ContractHeader")
     contract_ids = [row[0] for row in cursor.fetchall()]
     
@@ -1063,7 +1064,7 @@ def generate_contract_amendments(cursor, num_amendments=100):
     
     for _ in range(num_amendments):
         contract_id = random.choice(contract_ids)
-        amendment_date = datetime.now() - timedelta(days=random.randint(1, 365))
+        amendment_date = (today or datetime.now()) - timedelta(days=random.randint(1, 365))
         description = f"Amendment: {random.choice(change_types)}"
         
         # Generate realistic changed fields
@@ -1073,7 +1074,7 @@ def generate_contract_amendments(cursor, num_amendments=100):
             'new_value': str(random.randint(1000, 10000))
         }
         
-        change_reason = fake.text(max_nb_chars=200)
+        change_reason = get_text_pool(200).text()
         created_by = random.choice(user_ids)
         
         amendments.append((
@@ -1357,7 +1358,8 @@ def generate_realistic_event_description(event_type, severity, business_unit):
         ]
     }
     
-    faker = Faker()
+    # Reuse the module-level instance; building a Faker per call dominates event generation
+    faker = fake
     
     # Get template for event type
     template = random.choice(templates.get(event_type, ["Generic event affecting {business_unit}"]))
@@ -1402,85 +1404,80 @@ def generate_realistic_event_description(event_type, severity, business_unit):
     
     return template.format(**replacements)
 
-def generate_events(cursor, num_events=200):
+def generate_events(cursor, num_events=200, reference=None, today=None):
     """Generate and insert fake event records"""
     # Get reference data
-    cursor.execute("SELECT type_id, type_name FROM EventType")
-    type_data = cursor.fetchall()
-    type_ids = [row[0] for row in type_data]
-    type_names = {row[0]: row[1] for row in type_data}
+    reference = reference or ReferenceData.load(cursor)
+    type_ids = list(reference.event_types)
+    type_names = {type_id: row['type_name'] for type_id, row in reference.event_types.items()}
     
-    cursor.execute("SELECT severity_id, severity_name FROM EventSeverity")
-    severity_data = cursor.fetchall()
-    severity_ids = [row[0] for row in severity_data]
-    severity_names = {row[0]: row[1] for row in severity_data}
+    severity_ids = list(reference.severities)
+    severity_names = {severity_id: row['severity_name'] for severity_id, row in reference.severities.items()}
     
-    cursor.execute("SELECT status_id FROM EventStatus")
-    status_ids = [row[0] for row in cursor.fetchall()]
+    status_ids = list(reference.statuses)
     
-    cursor.execute("SELECT region_id FROM GeographicRegion")
-    region_ids = [row[0] for row in cursor.fetchall()]
+    region_ids = list(reference.regions)
     
-    cursor.execute("SELECT unit_id, unit_name FROM BusinessUnit")
-    unit_data = cursor.fetchall()
-    unit_ids = [row[0] for row in unit_data]
-    unit_names = {row[0]: row[1] for row in unit_data}
+    unit_ids = list(reference.business_units)
+    unit_names = {unit_id: row['unit_name'] for unit_id, row in reference.business_units.items()}
     
     cursor.execute("SELECT user_id FROM User WHERE is_active = 1")
     user_ids = [row[0] for row in cursor.fetchall()]
     
-    events = []
-    current_date = datetime.now()
+    source_refs = []
     
-    for _ in range(num_events):
-        type_id = random.choice(type_ids)
-        severity_id = random.choice(severity_ids)
-        unit_id = random.choice(unit_ids)
-        
-        # Generate description using templates
-        description = generate_realistic_event_description(
-            type_names[type_id],
-            severity_names[severity_id],
-            unit_names[unit_id]
-        )
+    def event_rows():
+        current_date = today or datetime.now()
         
-        occurrence_date = current_date - timedelta(days=random.randint(1, 365))
-        detection_delay = timedelta(minutes=random.randint(5, 1440))
-        detection_date = occurrence_date + detection_delay
-        
-        resolution_date = None
-        if (current_date - occurrence_date).days > 30 and random.random() < 0.7:
-            resolution_date = detection_date + timedelta(days=random.randint(1, 30))
-        
-        source_ref = f"REF-{str(uuid.uuid4())[:8]}"
+        for _ in range(num_events):
+            type_id = random.choice(type_ids)
+            severity_id = random.choice(severity_ids)
+            unit_id = random.choice(unit_ids)
+            
+            # Generate description using templates
+            description = generate_realistic_event_description(
+                type_names[type_id],
+                severity_names[severity_id],
+                unit_names[unit_id]
+            )
+            
+            occurrence_date = current_date - timedelta(days=random.randint(1, 365))
+            detection_delay = timedelta(minutes=random.randint(5, 1440))
+            detection_date = occurrence_date + detection_delay
+            
+            resolution_date = None
+            if (current_date - occurrence_date).days > 30 and random.random() < 0.7:
+                resolution_date = detection_date + timedelta(days=random.randint(1, 30))
+            
+            source_ref = f"REF-{random.getrandbits(32):08x}"
+            source_refs.append(source_ref)
+            
+            yield (
+                type_id,
+                severity_id,
+                random.choice(status_ids),
+                f"Event: {description[:50]}...",  # Use first 50 chars of description as title
+                description,
+                occurrence_date.strftime('%Y-%m-%d %H:%M:%S'),
+                detection_date.strftime('%Y-%m-%d %H:%M:%S'),
+                resolution_date.strftime('%Y-%m-%d %H:%M:%S') if resolution_date else None,
+                random.choice(region_ids),
+                unit_id,
+                source_ref,
+                random.choice(user_ids)
+            )
         
-        events.append((
-            type_id,
-            severity_id,
-            random.choice(status_ids),
-            f"Event: {description[:50]}...",  # Use first 50 chars of description as title
-            description,
-            occurrence_date.strftime('%Y-%m-%d %H:%M:%S'),
-            detection_date.strftime('%Y-%m-%d %H:%M:%S'),
-            resolution_date.strftime('%Y-%m-%d %H:%M:%S') if resolution_date else None,
-            random.choice(region_ids),
-            unit_id,
-            source_ref,
-            random.choice(user_ids)
-        ))
-    
-    cursor.executemany("""
+    stream_executemany(cursor, """
         INSERT INTO Event (
             type_id, severity_id, status_id, event_title,
             description, occurrence_date, detection_date, resolution_date,
             region_id, business_unit_id, source_reference, created_by
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, events)
+    """, event_rows(), label="fake events")
     
-    print(f"Inserted {len(events)} fake events")
-    return [event[10] for event in events]  # Return source references
+    return source_refs
 
-def read_events_from_csv(csv_path):
+def read_events_from_csv(csv_path, today=None):
     """
     Read events from a CSV file and return as a DataFrame
     
@@ -1513,7 +1510,7 @@ def read_events_from_csv(csv_path):
         if 'occurrence_date' in df.columns:
             df['occurrence_date'] = pd.to_datetime(df['occurrence_date'])
         else:
-            df['occurrence_date'] = pd.Timestamp.now()
+            df['occurrence_date'] = pd.Timestamp(today or datetime.now())
             
         # Add source if not present
         if 'source' not in df.columns:
@@ -1525,42 +1522,19 @@ def read_events_from_csv(csv_path):
         print(f"Error reading CSV file: {e}")
         raise
 
-def insert_csv_events(cursor, csv_path):
+def insert_csv_events(cursor, csv_path, reference=None, today=None):
     """Insert events from CSV file into the database"""
     
     # Read the CSV file
-    df = read_events_from_csv(csv_path)
-    
-    # Get reference IDs from the database
-    cursor.execute("""
-        SELECT type_name, type_id 
-        FROM EventType
-    """)
-    type_mapping = dict(cursor.fetchall())
+    df = read_events_from_csv(csv_path, today=today)
     
-    cursor.execute("""
-        SELECT severity_name, severity_id 
-        FROM EventSeverity
-    """)
-    severity_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT status_name, status_id 
-        FROM EventStatus
-    """)
-    status_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT region_name, region_id 
-        FROM GeographicRegion
-    """)
-    region_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT unit_name, unit_id 
-        FROM BusinessUnit
-    """)
-    unit_mapping = dict(cursor.fetchall())
+    # Map classification names to reference IDs in memory
+    reference = reference or ReferenceData.load(cursor)
+    type_mapping = reference.type_ids
+    severity_mapping = reference.severity_ids
+    status_mapping = reference.status_ids
+    region_mapping = reference.region_ids
+    unit_mapping = reference.unit_ids
     
     # Get a default user for created_by
     cursor.execute("SELECT user_id FROM User WHERE is_active = 1 LIMIT 1")
@@ -1596,7 +1570,7 @@ def insert_csv_events(cursor, csv_path):
             occurrence_date = row['occurrence_date']
             detection_date = occurrence_date  # For CSV events, detection is same as occurrence
             
-            source_ref = f"EXT-{str(uuid.uuid4())[:8]}"
+            source_ref = f"EXT-{random.getrandbits(32):08x}"
             
             events.append((
                 type_id,
@@ -1636,84 +1610,32 @@ def insert_csv_events(cursor, csv_path):
         
     return [event[10] for event in events]  # Return source references
 
-def insert_news_events(cursor, classified_news_df):
-    """Insert classified news events into the database"""
-    
-    # Get reference IDs from the database
-    cursor.execute("""
-        SELECT type_name, type_id 
-        FROM EventType
-    """)
-    type_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT severity_name, severity_id 
-        FROM EventSeverity
-    """)
-    severity_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT status_name, status_id 
-        FROM EventStatus
-    """)
-    status_mapping = dict(cursor.fetchall())
-    
-    cursor.execute("""
-        SELECT region_name, region_id 
-        FROM GeographicRegion
-    """)
-    region_mapping = dict(cursor.fetchall())
-    
+def resolve_event_refs(cursor, event_refs):
+    """
+    Look up (event_id, occurrence_date) for every source reference in one query.
+
+    The references go into a temporary table that is joined against Event,
+    instead of one SELECT per reference. Results follow the order of
+    event_refs; references without an event are skipped.
+    """
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS EventRefLookup (position INTEGER PRIMARY KEY, source_reference TEXT)")
+    cursor.execute("DELETE FROM EventRefLookup")
+    cursor.executemany(
+        "INSERT INTO EventRefLookup (position, source_reference) VALUES (?, ?)",
+        enumerate(event_refs)
+    )
     cursor.execute("""
-        SELECT unit_name, unit_id 
-        FROM BusinessUnit
+        SELECT r.position, e.event_id, e.occurrence_date
+        FROM EventRefLookup r
+        JOIN Event e ON e.source_reference = r.source_reference
+        ORDER BY r.position, e.event_id
     """)
-    unit_mapping = dict(cursor.fetchall())
-    
-    # Get a default user for created_by
-    cursor.execute("SELECT user_id FROM User WHERE is_active = 1 LIMIT 1")
-    default_user_id = cursor.fetchone()[0]
-    
-    events = []
-    for _, row in classified_news_df.iterrows():
-        # Convert classification to IDs
-        type_id = type_mapping.get(row['event_type'])
-        severity_id = severity_mapping.get(row['severity'])
-        status_id = status_mapping.get(row['status'])
-        region_id = region_mapping.get(row['geographic_region'])
-        unit_id = unit_mapping.get(row['business_unit'])
-        
-        # Use publication date as occurrence date
-        occurrence_date = row['published_at']
-        detection_date = occurrence_date  # For news events, detection is same as publication
-        
-        source_ref = f"NEWS-{str(uuid.uuid4())[:8]}"
-        
-        events.append((
-            type_id,
-            severity_id,
-            status_id,
-            row['event_title'],
-            row['description'],
-            occurrence_date.strftime('%Y-%m-%d %H:%M:%S'),
-            detection_date.strftime('%Y-%m-%d %H:%M:%S'),
-            None,  # resolution_date
-            region_id,
-            unit_id,
-            source_ref,
-            default_user_id
-        ))
-    
-    cursor.executemany("""
-        INSERT INTO Event (
-            type_id, severity_id, status_id, event_title,
-            description, occurrence_date, detection_date, resolution_date,
-            region_id, business_unit_id, source_reference, created_by
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, events)
-    
-    print(f"Inserted {len(events)} news events")
-    return [event[10] for event in events]  # Return source references
+    events = {}
+    for position, event_id, occurrence_date in cursor.fetchall():
+        # Keep the first event of a reference, as fetchone() on the old lookup did
+        events.setdefault(position, (event_id, occurrence_date))
+    cursor.execute("DELETE FROM EventRefLookup")
+    return [events[position] for position in sorted(events)]
 
 def generate_impact_assessments(cursor, event_refs):
     """Generate impact assessment records"""
@@ -1725,84 +1647,68 @@ def generate_impact_assessments(cursor, event_refs):
     cursor.execute("SELECT user_id FROM User WHERE is_active = 1")
     user_ids = [row[0] for row in cursor.fetchall()]
     
-    assessments = []
-    
-    for ref in event_refs:
-        cursor.execute("""
-            SELECT event_id, occurrence_date 
-            FROM Event 
-            WHERE source_reference = ?
-        """, (ref,))
-        event_id, occurrence_date = cursor.fetchone()
-        
-        if isinstance(occurrence_date, str):
-            occurrence_date = datetime.strptime(occurrence_date, '%Y-%m-%d %H:%M:%S')
-        
-        num_contracts = random.randint(1, 5)
-        affected_contracts = random.sample(contract_ids, min(num_contracts, len(contract_ids)))
-        
-        for contract_id in affected_contracts:
-            assessment_date = occurrence_date + timedelta(hours=random.randint(4, 48))
+    def assessment_rows():
+        for event_id, occurrence_date in resolve_event_refs(cursor, event_refs):
+            if isinstance(occurrence_date, str):
+                occurrence_date = datetime.strptime(occurrence_date, '%Y-%m-%d %H:%M:%S')
             
-            assessments.append((
-                event_id,
-                contract_id,
-                random.choice(impact_levels),
-                fake.text(max_nb_chars=200),
-                fake.text(max_nb_chars=200),
-                assessment_date,
-                random.choice(user_ids),
-                True
-            ))
-    
-    cursor.executemany("""
+            num_contracts = random.randint(1, 5)
+            affected_contracts = random.sample(contract_ids, min(num_contracts, len(contract_ids)))
+            
+            for contract_id in affected_contracts:
+                assessment_date = occurrence_date + timedelta(hours=random.randint(4, 48))
+                
+                yield (
+                    event_id,
+                    contract_id,
+                    random.choice(impact_levels),
+                    get_text_pool(200).text(),
+                    get_text_pool(200).text(),
+                    assessment_date,
+                    random.choice(user_ids),
+                    True
+                )
+    
+    stream_executemany(cursor, """
         INSERT INTO EventImpactAssessment (
             event_id, contract_id, impact_level,
             impact_description, recommended_actions,
             assessment_date, assessed_by, is_active
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, assessments)
-    
-    print(f"Inserted {len(assessments)} impact assessments")
+    """, assessment_rows(), label="impact assessments")
 
-def generate_notifications(cursor, event_refs):
+def generate_notifications(cursor, event_refs, today=None):
     """Generate notification records"""
     notification_types = ['Email', 'SMS', 'System', 'Mobile App']
     
     cursor.execute("SELECT user_id FROM User WHERE is_active = 1")
     user_ids = [row[0] for row in cursor.fetchall()]
     
-    notifications = []
-    
-    for ref in event_refs:
-        cursor.execute("SELECT event_id FROM Event WHERE source_reference = ?", (ref,))
-        event_id = cursor.fetchone()[0]
-        
-        num_notifications = random.randint(2, 5)
-        notified_users = random.sample(user_ids, min(num_notifications, len(user_ids)))
-        
-        for user_id in notified_users:
-            sent_at = datetime.now() - timedelta(days=random.randint(1, 30))
-            read_at = sent_at + timedelta(minutes=random.randint(1, 1440)) if random.random() < 0.8 else None
-            status = 'read' if read_at else 'sent'
+    def notification_rows():
+        for event_id, _ in resolve_event_refs(cursor, event_refs):
+            num_notifications = random.randint(2, 5)
+            notified_users = random.sample(user_ids, min(num_notifications, len(user_ids)))
             
-            notifications.append((
-                event_id,
-                user_id,
-                random.choice(notification_types),
-                status,
-                sent_at,
-                read_at
-            ))
+            for user_id in notified_users:
+                sent_at = (today or datetime.now()) - timedelta(days=random.randint(1, 30))
+                read_at = sent_at + timedelta(minutes=random.randint(1, 1440)) if random.random() < 0.8 else None
+                status = 'read' if read_at else 'sent'
+                
+                yield (
+                    event_id,
+                    user_id,
+                    random.choice(notification_types),
+                    status,
+                    sent_at,
+                    read_at
+                )
     
-    cursor.executemany("""
+    stream_executemany(cursor, """
         INSERT INTO EventNotification (
             event_id, user_id, notification_type,
             notification_status, sent_at, read_at
         ) VALUES (?, ?, ?, ?, ?, ?)
-    """, notifications)
-    
-    print(f"Inserted {len(notifications)} notifications")
+    """, notification_rows(), label="notifications")
 
 def generate_trigger_rules(cursor):
     """Generate event trigger rules"""
@@ -1938,9 +1844,37 @@ def generate_meta_kpi_trigger_thresholds(cursor, rule_ids):
     print(f"Inserted {len(thresholds)} Meta KPI trigger thresholds")
 
 
-def main():
-    # Connect to the database
-    conn = sqlite3.connect('contract_management.db')
+def main(scale=None, seed=42, workers=None, bulk_load=False, today=None):
+    """
+    Seed contract_management.db.
+
+    Args:
+        scale: If set, generate contracts, contract lines, KPI measurements,
+            impact assessments and notifications with the vectorised engine,
+            scaled from 400 contracts and 200 events at 1.0
+        seed: Random seed used with scale, so scaled datasets are reproducible
+        today: Reference date (YYYY-MM-DD) for generated dates with scale;
+            defaults to SCALED_TODAY. Unscaled data is dated from now
+        workers: Processes building the scaled tables in parallel; the data
+            is identical to a single-process run with the same scale and seed
+        bulk_load: Seed with journaling and syncing relaxed, then build the
+            indexes and triggers deferred by create_tables.py --bulk-load,
+            analyze and check the database
+    """
+    # Borrow a connection from the shared pool for the whole seeding run
+    if bulk_load:
+        # A private pool, so no other user of the database gets these settings
+        pool = ConnectionPool('contract_management.db', size=1, pragmas=BULK_LOAD_PRAGMAS)
+    else:
+        pool = get_pool('contract_management.db')
+    conn = pool.acquire()
+    vectorized = None
+    if scale is not None:
+        random.seed(seed)
+        Faker.seed(seed)
+        today = datetime.fromisoformat(today or SCALED_TODAY)
+    else:
+        today = None
     
     try:
         cursor = conn.cursor()
@@ -1948,16 +1882,22 @@ def main():
         # Insert base data
         try:
             insert_base_data(conn)
+            if scale is not None:
+                vectorized = VectorizedGenerator(cursor, scale=scale, seed=seed, today=today, workers=workers)
         except Exception as e:
             print(f"An error occurred during contract base data creation: {e}")
         
         
         # Generate contracts and related data
         try:
-            contracts = generate_contracts(cursor)
-            generate_contract_lines(cursor)
-            generate_payment_schedules(cursor)
-            generate_contract_amendments(cursor)
+            if vectorized:
+                vectorized.generate_contracts()
+                vectorized.generate_contract_lines()
+            else:
+                contracts = generate_contracts(cursor)
+                generate_contract_lines(cursor)
+            generate_payment_schedules(cursor, today=today)
+            generate_contract_amendments(cursor, today=today)
         except Exception as e:
             print(f"An error occurred during contract transcational data creation: {e}")
         
@@ -1967,7 +1907,10 @@ def main():
             generate_kpi_categories(cursor)
             generate_kpi_types(cursor)
             generate_kpi_definitions(cursor)
-            generate_kpi_measurements(cursor)
+            if vectorized:
+                vectorized.generate_kpi_measurements()
+            else:
+                generate_kpi_measurements(cursor)
         except Exception as e:
             print(f"An error occurred during KPI data creation: {e}")
 
@@ -1975,7 +1918,7 @@ def main():
         try:
             generate_meta_kpi_definitions(cursor)
             generate_meta_kpi_components(cursor)
-            generate_meta_kpi_measurements(cursor)
+            generate_meta_kpi_measurements(cursor, today=today)
         except Exception as e:
             print(f"An error occurred during meta kpi data creation: {e}")
 
@@ -1985,20 +1928,26 @@ def main():
             generate_event_types(cursor)
             generate_event_severities(cursor)
             generate_event_statuses(cursor)
-            generate_geographic_regions(cursor)
-            generate_business_units(cursor)
         except Exception as e:
             print(f"An error occurred during base event data creation: {e}")
 
          # Generate events and related data
 
         try:
-            event_refs = generate_events(cursor)
-            generate_impact_assessments(cursor, event_refs)
-            generate_notifications(cursor, event_refs)
-            event_refs = insert_csv_events(cursor,r"C:\Users\Kish Kukreja\OneDrive\Desktop\agenticai\event_classifications.csv")
+            # Load the event lookup tables once for every event generator
+            reference = ReferenceData.load(cursor)
+            if vectorized:
+                cursor.execute("SELECT COALESCE(MAX(event_id), 0) FROM Event")
+                last_event_id = cursor.fetchone()[0]
+                generate_events(cursor, num_events=vectorized.num_events, reference=reference, today=today)
+                vectorized.generate_event_details(after_event_id=last_event_id)
+            else:
+                event_refs = generate_events(cursor, reference=reference)
+                generate_impact_assessments(cursor, event_refs)
+                generate_notifications(cursor, event_refs)
+            event_refs = insert_csv_events(cursor,r"C:\Users\Kish Kukreja\OneDrive\Desktop\agenticai\event_classifications.csv", reference=reference, today=today)
             generate_impact_assessments(cursor, event_refs)
-            generate_notifications(cursor, event_refs)
+            generate_notifications(cursor, event_refs, today=today)
             rules = generate_trigger_rules(cursor)
             generate_kpi_trigger_thresholds(cursor, rules)
             generate_meta_kpi_trigger_thresholds(cursor,rules)
@@ -2008,11 +1957,32 @@ def main():
         conn.commit()
         print("All contract and event data generated successfully!")
         
+        if bulk_load:
+            finish_bulk_load(conn)
+        else:
+            refresh_kpi_impact(conn)
+        
     except sqlite3.Error as e:
         print(f"An error occurred: {e}")
         conn.rollback()
     finally:
-        conn.close()
+        pool.release(conn)
+        pool.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate sample contract and event data")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Build a scaled dataset with the vectorised generator (1.0 = 400 contracts, 200 events)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for scaled datasets")
+    parser.add_argument("--today", default=None,
+                        help=f"Reference date (YYYY-MM-DD) for scaled datasets (default {SCALED_TODAY})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes generating scaled tables in parallel (requires --scale)")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Fast load into a database created with create_tables.py --bulk-load")
+    args = parser.parse_args()
+    if args.workers and args.scale is None:
+        parser.error("--workers requires --scale")
+    if args.today and args.scale is None:
+        parser.error("--today requires --scale")
+    main(scale=args.scale, seed=args.seed, workers=args.workers, bulk_load=args.bulk_load, today=args.today)
\ No newline at end of file
@@ -1,10 +1,25 @@
+import argparse
 import sqlite3
 import os
 from pathlib import Path
 import time
 
+from src.dates import create_window_indexes
+from src.kpi_impact import create_kpi_impact_tables, create_kpi_impact_triggers, rebuild_kpi_impact
+
 """Create SQLite database and all required tables"""
 
+# Connection settings for seeding a freshly created database. The rollback
+# journal stays in memory and nothing is fsynced, so a crash mid-load leaves
+# a database that must be rebuilt; that is fine for generated data.
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "cache_size": -1048576,
+    "temp_store": "MEMORY",
+    "locking_mode": "EXCLUSIVE",
+}
+
 def create_tables(cursor):
     # Enable foreign key support
     cursor.execute("PRAGMA foreign_keys = ON")
@@ -127,6 +142,8 @@ def create_tables(cursor):
         total_value DECIMAL(15,2) NOT NULL,
         currency_code CHAR(3) NOT NULL REFERENCES Currency(currency_code),
         terms_conditions TEXT,
+        business_unit_id INTEGER REFERENCES BusinessUnit(unit_id),
+        region_id INTEGER REFERENCES GeographicRegion(region_id),
         created_by INTEGER NOT NULL REFERENCES "User"(user_id),
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -463,6 +480,14 @@ def create_tables(cursor):
     )
     """)
 
+    ################################ SUMMARY TABLES ##########################
+
+    # High/critical impact assessment counts per business unit, kept current
+    # by the triggers in create_triggers so priority scoring is a key lookup
+    create_business_impact_summary_table(cursor)
+    
+    # Stored KPI event impact results, refreshed from a trigger-fed change log
+    create_kpi_impact_tables(cursor)
 
 
 def create_indexes(cursor):
@@ -470,114 +495,125 @@ def create_indexes(cursor):
     
     # Contract Related Indexes
     cursor.execute("""
-    CREATE INDEX idx_contract_vendor ON ContractHeader(vendor_id);
+    CREATE INDEX IF NOT EXISTS idx_contract_vendor ON ContractHeader(vendor_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_contract_dates ON ContractHeader(start_date, end_date);
+    CREATE INDEX IF NOT EXISTS idx_contract_dates ON ContractHeader(start_date, end_date);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_contract_status ON ContractHeader(status_id);
+    CREATE INDEX IF NOT EXISTS idx_contract_status ON ContractHeader(status_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_contract_value ON ContractHeader(total_value);
+    CREATE INDEX IF NOT EXISTS idx_contract_value ON ContractHeader(total_value);
     """)
     
+    # Event impact matching narrows by scope and status, then by date window
+    create_contract_scope_indexes(cursor)
+    
     # Contract Line Indexes
     cursor.execute("""
-    CREATE INDEX idx_contractline_contract ON ContractLine(contract_id);
+    CREATE INDEX IF NOT EXISTS idx_contractline_contract ON ContractLine(contract_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_contractline_product ON ContractLine(product_id);
+    CREATE INDEX IF NOT EXISTS idx_contractline_product ON ContractLine(product_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_contractline_service ON ContractLine(service_id);
+    CREATE INDEX IF NOT EXISTS idx_contractline_service ON ContractLine(service_id);
     """)
     
     # Event Related Indexes
     cursor.execute("""
-    CREATE INDEX idx_event_type ON Event(type_id);
+    CREATE INDEX IF NOT EXISTS idx_event_type ON Event(type_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_event_status ON Event(status_id);
+    CREATE INDEX IF NOT EXISTS idx_event_status ON Event(status_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_event_severity ON Event(severity_id);
+    CREATE INDEX IF NOT EXISTS idx_event_severity ON Event(severity_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_event_dates ON Event(occurrence_date, detection_date, resolution_date);
+    CREATE INDEX IF NOT EXISTS idx_event_dates ON Event(occurrence_date, detection_date, resolution_date);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_event_region ON Event(region_id);
+    CREATE INDEX IF NOT EXISTS idx_event_region ON Event(region_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_event_business_unit ON Event(business_unit_id);
+    CREATE INDEX IF NOT EXISTS idx_event_business_unit ON Event(business_unit_id);
+    """)
+    
+    # Seeding and news ingestion look events up by their source reference
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_event_source_reference ON Event(source_reference);
     """)
     
     # KPI Related Indexes
     cursor.execute("""
-    CREATE INDEX idx_kpi_measurement ON ContractKPIMeasurement(contract_id, kpi_id, measure_date);
+    CREATE INDEX IF NOT EXISTS idx_kpi_measurement ON ContractKPIMeasurement(contract_id, kpi_id, measure_date);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_kpi_achievement ON ContractKPIMeasurement(achievement_percentage);
+    CREATE INDEX IF NOT EXISTS idx_kpi_achievement ON ContractKPIMeasurement(achievement_percentage);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_kpi_status ON ContractKPIMeasurement(status);
+    CREATE INDEX IF NOT EXISTS idx_kpi_status ON ContractKPIMeasurement(status);
     """)
     
+    # Covering indexes for the event window joins in the views
+    create_window_indexes(cursor)
+    
     # Meta KPI Related Indexes
     cursor.execute("""
-    CREATE INDEX idx_meta_kpi_measurement ON MetaKPIMeasurement(meta_kpi_id, measurement_date);
+    CREATE INDEX IF NOT EXISTS idx_meta_kpi_measurement ON MetaKPIMeasurement(meta_kpi_id, measurement_date);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_meta_kpi_achievement ON MetaKPIMeasurement(achievement_percentage);
+    CREATE INDEX IF NOT EXISTS idx_meta_kpi_achievement ON MetaKPIMeasurement(achievement_percentage);
     """)
     
     # Event Impact Assessment Indexes
     cursor.execute("""
-    CREATE INDEX idx_impact_event ON EventImpactAssessment(event_id);
+    CREATE INDEX IF NOT EXISTS idx_impact_event ON EventImpactAssessment(event_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_impact_contract ON EventImpactAssessment(contract_id);
+    CREATE INDEX IF NOT EXISTS idx_impact_contract ON EventImpactAssessment(contract_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_impact_level ON EventImpactAssessment(impact_level);
+    CREATE INDEX IF NOT EXISTS idx_impact_level ON EventImpactAssessment(impact_level);
     """)
     
     # Event Notification Indexes
     cursor.execute("""
-    CREATE INDEX idx_notification_event ON EventNotification(event_id);
+    CREATE INDEX IF NOT EXISTS idx_notification_event ON EventNotification(event_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_notification_user ON EventNotification(user_id);
+    CREATE INDEX IF NOT EXISTS idx_notification_user ON EventNotification(user_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_notification_status ON EventNotification(notification_status);
+    CREATE INDEX IF NOT EXISTS idx_notification_status ON EventNotification(notification_status);
     """)
     
     # Hierarchical Data Indexes
     cursor.execute("""
-    CREATE INDEX idx_region_parent ON GeographicRegion(parent_region_id);
+    CREATE INDEX IF NOT EXISTS idx_region_parent ON GeographicRegion(parent_region_id);
     """)
     
     cursor.execute("""
-    CREATE INDEX idx_business_unit_parent ON BusinessUnit(parent_unit_id);
+    CREATE INDEX IF NOT EXISTS idx_business_unit_parent ON BusinessUnit(parent_unit_id);
     """)
 
     # Create index for performance
@@ -589,7 +625,285 @@ def create_indexes(cursor):
     print("Created all indexes successfully!")
 
 
-def main():
+def create_contract_scope_indexes(cursor):
+    """Indexes used by src.contract_matching to narrow contracts for an event"""
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_contract_scope ON ContractHeader(business_unit_id, region_id, status_id, end_date);
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_contract_vendor_status ON ContractHeader(vendor_id, status_id, end_date);
+    """)
+
+
+def migrate_contract_scope(cursor):
+    """
+    Add ContractHeader.business_unit_id / region_id to an existing database.
+    
+    Safe to run repeatedly. Contracts without a scope take the business
+    unit and region of the events most often assessed against them; those
+    never assessed stay NULL, which contract matching treats as unscoped.
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(ContractHeader)").fetchall()}
+    if "business_unit_id" not in columns:
+        cursor.execute("ALTER TABLE ContractHeader ADD COLUMN business_unit_id INTEGER REFERENCES BusinessUnit(unit_id)")
+    if "region_id" not in columns:
+        cursor.execute("ALTER TABLE ContractHeader ADD COLUMN region_id INTEGER REFERENCES GeographicRegion(region_id)")
+    
+    for column in ("business_unit_id", "region_id"):
+        cursor.execute(f"""
+        UPDATE ContractHeader SET {column} = (
+            SELECT e.{column}
+            FROM EventImpactAssessment eia
+            JOIN Event e ON eia.event_id = e.event_id
+            WHERE eia.contract_id = ContractHeader.contract_id
+            AND e.{column} IS NOT NULL
+            GROUP BY e.{column}
+            ORDER BY COUNT(*) DESC, e.{column}
+            LIMIT 1
+        )
+        WHERE {column} IS NULL
+        """)
+    
+    create_contract_scope_indexes(cursor)
+
+
+def create_business_impact_summary_table(cursor):
+    """High/critical impact assessment counts per business unit"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS BusinessUnitImpactSummary (
+        business_unit_id INTEGER PRIMARY KEY REFERENCES BusinessUnit(unit_id),
+        high_impact_count INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def create_business_impact_summary_triggers(cursor):
+    """
+    Keep BusinessUnitImpactSummary in step with refresh_business_impact_summary.
+    
+    Like that query, only assessments of existing contracts are counted,
+    against the business unit of the assessed event.
+    """
+    
+    # New high/critical assessment: count it against the event's business unit
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_insert
+    AFTER INSERT ON EventImpactAssessment
+    WHEN NEW.impact_level IN ('high', 'critical')
+    BEGIN
+        INSERT INTO BusinessUnitImpactSummary (business_unit_id, high_impact_count)
+        SELECT e.business_unit_id, 1
+        FROM Event e
+        WHERE e.event_id = NEW.event_id AND e.business_unit_id IS NOT NULL
+        AND EXISTS (SELECT 1 FROM ContractHeader WHERE contract_id = NEW.contract_id)
+        ON CONFLICT (business_unit_id) DO UPDATE SET
+            high_impact_count = high_impact_count + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    END
+    """)
+    
+    # Level, event or contract changed: remove the old contribution, add the new one
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_update
+    AFTER UPDATE OF impact_level, event_id, contract_id ON EventImpactAssessment
+    BEGIN
+        UPDATE BusinessUnitImpactSummary SET
+            high_impact_count = high_impact_count - 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE OLD.impact_level IN ('high', 'critical')
+        AND EXISTS (SELECT 1 FROM ContractHeader WHERE contract_id = OLD.contract_id)
+        AND business_unit_id = (SELECT business_unit_id FROM Event WHERE event_id = OLD.event_id);
+        
+        INSERT INTO BusinessUnitImpactSummary (business_unit_id, high_impact_count)
+        SELECT e.business_unit_id, 1
+        FROM Event e
+        WHERE NEW.impact_level IN ('high', 'critical')
+        AND e.event_id = NEW.event_id AND e.business_unit_id IS NOT NULL
+        AND EXISTS (SELECT 1 FROM ContractHeader WHERE contract_id = NEW.contract_id)
+        ON CONFLICT (business_unit_id) DO UPDATE SET
+            high_impact_count = high_impact_count + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    END
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_delete
+    AFTER DELETE ON EventImpactAssessment
+    WHEN OLD.impact_level IN ('high', 'critical')
+    BEGIN
+        UPDATE BusinessUnitImpactSummary SET
+            high_impact_count = high_impact_count - 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE EXISTS (SELECT 1 FROM ContractHeader WHERE contract_id = OLD.contract_id)
+        AND business_unit_id = (SELECT business_unit_id FROM Event WHERE event_id = OLD.event_id);
+    END
+    """)
+    
+    # Event moved to another business unit: move its assessments' counts along
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_event_unit
+    AFTER UPDATE OF business_unit_id ON Event
+    WHEN OLD.business_unit_id IS NOT NEW.business_unit_id
+    BEGIN
+        UPDATE BusinessUnitImpactSummary SET
+            high_impact_count = high_impact_count - (
+                SELECT COUNT(*) FROM EventImpactAssessment eia
+                JOIN ContractHeader ch ON eia.contract_id = ch.contract_id
+                WHERE eia.event_id = OLD.event_id AND eia.impact_level IN ('high', 'critical')
+            ),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE business_unit_id = OLD.business_unit_id;
+        
+        INSERT INTO BusinessUnitImpactSummary (business_unit_id, high_impact_count)
+        SELECT NEW.business_unit_id, moved.n
+        FROM (
+            SELECT COUNT(*) AS n FROM EventImpactAssessment eia
+            JOIN ContractHeader ch ON eia.contract_id = ch.contract_id
+            WHERE eia.event_id = NEW.event_id AND eia.impact_level IN ('high', 'critical')
+        ) moved
+        WHERE moved.n > 0 AND NEW.business_unit_id IS NOT NULL
+        ON CONFLICT (business_unit_id) DO UPDATE SET
+            high_impact_count = high_impact_count + excluded.high_impact_count,
+            updated_at = CURRENT_TIMESTAMP;
+    END
+    """)
+    
+    # Contract removed or added after its assessments: its assessments stop or
+    # start counting, as they would in the join
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_contract_delete
+    AFTER DELETE ON ContractHeader
+    BEGIN
+        UPDATE BusinessUnitImpactSummary SET
+            high_impact_count = high_impact_count - (
+                SELECT COUNT(*) FROM EventImpactAssessment eia
+                JOIN Event e ON eia.event_id = e.event_id
+                WHERE eia.contract_id = OLD.contract_id
+                AND eia.impact_level IN ('high', 'critical')
+                AND e.business_unit_id = BusinessUnitImpactSummary.business_unit_id
+            ),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE business_unit_id IN (
+            SELECT e.business_unit_id FROM EventImpactAssessment eia
+            JOIN Event e ON eia.event_id = e.event_id
+            WHERE eia.contract_id = OLD.contract_id AND eia.impact_level IN ('high', 'critical')
+        );
+    END
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_impact_summary_contract_insert
+    AFTER INSERT ON ContractHeader
+    BEGIN
+        INSERT INTO BusinessUnitImpactSummary (business_unit_id, high_impact_count)
+        SELECT e.business_unit_id, COUNT(*)
+        FROM EventImpactAssessment eia
+        JOIN Event e ON eia.event_id = e.event_id
+        WHERE eia.contract_id = NEW.contract_id
+        AND eia.impact_level IN ('high', 'critical')
+        AND e.business_unit_id IS NOT NULL
+        GROUP BY e.business_unit_id
+        ON CONFLICT (business_unit_id) DO UPDATE SET
+            high_impact_count = high_impact_count + excluded.high_impact_count,
+            updated_at = CURRENT_TIMESTAMP;
+    END
+    """)
+
+
+def install_business_impact_summary(cursor):
+    """Add BusinessUnitImpactSummary and its triggers to an existing database and fill it"""
+    create_business_impact_summary_table(cursor)
+    create_business_impact_summary_triggers(cursor)
+    refresh_business_impact_summary(cursor)
+
+
+def create_triggers(cursor):
+    """Create triggers that maintain the summary tables"""
+    
+    # High/critical impact counts per business unit
+    create_business_impact_summary_triggers(cursor)
+    
+    # Log changes to events, assessments and measurements for src.kpi_impact
+    create_kpi_impact_triggers(cursor)
+    
+    print("Created all triggers successfully!")
+
+
+def refresh_business_impact_summary(cursor):
+    """Rebuild BusinessUnitImpactSummary from scratch (e.g. for existing data)"""
+    cursor.execute("DELETE FROM BusinessUnitImpactSummary")
+    cursor.execute("""
+    INSERT INTO BusinessUnitImpactSummary (business_unit_id, high_impact_count)
+    SELECT e.business_unit_id, COUNT(*)
+    FROM ContractHeader ch
+    JOIN EventImpactAssessment eia ON ch.contract_id = eia.contract_id
+    JOIN Event e ON eia.event_id = e.event_id
+    WHERE e.business_unit_id IS NOT NULL
+    AND eia.impact_level IN ('high', 'critical')
+    GROUP BY e.business_unit_id
+    """)
+
+
+def finish_bulk_load(conn):
+    """
+    Build what a bulk load deferred and check the result.
+
+    Creates the indexes and triggers, rebuilds the summary tables the
+    triggers would have maintained, refreshes the planner statistics and
+    runs an integrity check. Returns True if the database is consistent.
+    """
+    cursor = conn.cursor()
+    create_indexes(cursor)
+    create_triggers(cursor)
+    refresh_business_impact_summary(cursor)
+    rebuild_kpi_impact(cursor)
+    conn.commit()
+    
+    # Sample at most ~1000 rows per index; exact statistics on millions of
+    # rows cost more than the planner gains from them
+    cursor.execute("PRAGMA analysis_limit = 1000")
+    cursor.execute("ANALYZE")
+    cursor.execute("PRAGMA optimize")
+    problems = [row[0] for row in cursor.execute("PRAGMA integrity_check").fetchall()]
+    if problems == ['ok']:
+        print("Integrity check passed")
+        return True
+    print(f"Integrity check failed: {problems[:10]}")
+    return False
+
+
+def migrate(db_path='contract_management.db'):
+    """
+    Bring an existing database up to the current schema without dropping data.
+    
+    Each step checks what is already there, so this can be run repeatedly.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        migrate_contract_scope(cursor)
+        install_business_impact_summary(cursor)
+        conn.commit()
+        print(f"Migrated {db_path}")
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main(bulk_load=False):
+    """
+    Create contract_management.db from scratch.
+
+    Args:
+        bulk_load: Only create the tables; indexes and triggers are left to
+            finish_bulk_load once create_contracts_data.py --bulk-load has
+            seeded the data
+    """
     # Database file path
     db_path = 'contract_management.db'
     
@@ -623,9 +937,14 @@ def main():
         print(f"Created new database: {db_path}")
         
         create_tables(conn.cursor())
+        if bulk_load:
+            conn.commit()
+            print("Successfully created all tables; indexes & triggers are deferred until after seeding")
+            return
         create_indexes(conn.cursor())
+        create_triggers(conn.cursor())
         conn.commit()
-        print("Successfully created all tables & Indexes!")
+        print("Successfully created all tables, Indexes & Triggers!")
         
     except sqlite3.Error as e:
         print(f"An error occurred: {e}")
@@ -636,4 +955,13 @@ def main():
             conn.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create the contract management database")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Create tables only; create_contracts_data.py --bulk-load adds indexes and triggers after seeding")
+    parser.add_argument("--migrate", metavar="DB", nargs="?", const="contract_management.db",
+                        help="Upgrade an existing database in place instead of creating a new one")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate(args.migrate)
+    else:
+        main(bulk_load=args.bulk_load)
\ No newline at end of file
@@ -0,0 +1,291 @@
+import argparse
+import json
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VIEWS_DIR = REPO_ROOT / "views"
+QUERIES_PATH = REPO_ROOT / "scripts" / "all_queries.sql"
+DEFAULT_OUTPUT_DIR = "output/benchmark"
+DEFAULT_SCALES = "1,5,10"
+
+# A query counts as regressed when it is both this many times slower than
+# the baseline and slower by at least MIN_REGRESSION_SECONDS, so that noise
+# on millisecond queries is not reported
+REGRESSION_RATIO = 1.5
+MIN_REGRESSION_SECONDS = 0.05
+
+_QUERY_LABEL = re.compile(r"^--\s*([a-z]\d*)\.\s*(.+?)\s*$", re.MULTILINE)
+_VIEW_NAME = re.compile(r"CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+_PLAN_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+_PLAN_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+
+
+def load_views(views_dir: Path = VIEWS_DIR) -> Dict[str, str]:
+    """CREATE VIEW statements from views/*.sql, keyed by view name"""
+    views = {}
+    for path in sorted(views_dir.glob("*.sql")):
+        sql = path.read_text(encoding="utf-8")
+        match = _VIEW_NAME.search(sql)
+        if match:
+            views[match.group(1)] = sql
+    return views
+
+
+def view_order(views: Dict[str, str]) -> List[str]:
+    """View names ordered so that every view comes after the views it selects from"""
+    depends = {
+        name: {other for other in views if other != name and re.search(rf"\b{other}\b", sql)}
+        for name, sql in views.items()
+    }
+    ordered: List[str] = []
+    visiting = set()
+
+    def visit(name: str):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular view dependency involving {name}")
+        visiting.add(name)
+        for dependency in sorted(depends[name]):
+            visit(dependency)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in sorted(views):
+        visit(name)
+    return ordered
+
+
+def load_queries(path: Path = QUERIES_PATH) -> List[Tuple[str, str, str]]:
+    """(label, title, sql) for each '-- a. Title' section of all_queries.sql"""
+    text = path.read_text(encoding="utf-8")
+    headers = list(_QUERY_LABEL.finditer(text))
+    queries = []
+    for header, following in zip(headers, headers[1:] + [None]):
+        end = following.start() if following else len(text)
+        sql = text[header.end():end].strip().rstrip(";").strip()
+        if sql:
+            queries.append((header.group(1), header.group(2), sql))
+    return queries
+
+
+def build_database(directory: Path, scale: float, seed: int = 42, workers: Optional[int] = None) -> Path:
+    """
+    Generate a database at a scale factor with the synthetic generators.
+
+    create_tables.py and create_contracts_data.py write contract_management.db
+    in the working directory, so each scale is built in its own directory.
+
+    Returns:
+        Path of the database
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    command = [sys.executable, str(REPO_ROOT / "create_contracts_data.py"),
+               "--scale", str(scale), "--seed", str(seed), "--bulk-load"]
+    if workers:
+        command += ["--workers", str(workers)]
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(REPO_ROOT / "create_tables.py"), "--bulk-load"],
+                   cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(command, cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    print(f"Built scale {scale:g} database in {time.perf_counter() - start:.1f}s")
+    return directory / "contract_management.db"
+
+
+def install_views(conn: sqlite3.Connection, views: Dict[str, str]):
+    """(Re)create every view from its current definition"""
+    ordered = view_order(views)
+    for name in reversed(ordered):
+        conn.execute(f"DROP VIEW IF EXISTS {name}")
+    for name in ordered:
+        conn.executescript(views[name])
+    conn.commit()
+
+
+def query_plan(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN lines, indented by nesting depth"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """
+    Plan lines that read a whole table or index.
+
+    Scans of co-routines and materialised subqueries (the views and CTEs
+    themselves) are skipped; those are covered by the plans of their bodies.
+    """
+    subqueries = set()
+    scans = []
+    for line in plan:
+        detail = line.strip()
+        match = _PLAN_SUBQUERY.match(detail)
+        if match:
+            subqueries.add(match.group(1))
+            continue
+        match = _PLAN_SCAN.match(detail)
+        if match and match.group(1) not in subqueries:
+            scans.append(detail)
+    return scans
+
+
+def time_query(conn: sqlite3.Connection, sql: str, repeat: int, timeout: Optional[float]) -> Dict:
+    """
+    Run a query `repeat` times and return its median wall time and row count.
+
+    A query still running after `timeout` seconds is interrupted and
+    reported with an error instead of a time.
+    """
+    result = {"plan": query_plan(conn, sql)}
+    result["full_scans"] = full_scans(result["plan"])
+
+    deadline = None
+
+    def check_deadline():
+        return 1 if deadline is not None and time.perf_counter() > deadline else 0
+
+    if timeout:
+        conn.set_progress_handler(check_deadline, 10000)
+    timings = []
+    try:
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            deadline = start + timeout if timeout else None
+            rows = conn.execute(sql).fetchall()
+            timings.append(time.perf_counter() - start)
+    except sqlite3.OperationalError as e:
+        result["error"] = f"timed out after {timeout}s" if "interrupted" in str(e) else str(e)
+        return result
+    finally:
+        conn.set_progress_handler(None, 0)
+
+    result["seconds"] = statistics.median(timings)
+    result["rows"] = len(rows)
+    return result
+
+
+def benchmark_database(db_path: Path, repeat: int = 3, timeout: Optional[float] = 60.0) -> Dict:
+    """
+    Time every view and labelled query against one database.
+
+    Returns:
+        Dict of "view:<name>" and "query:<label>" keys to results holding
+        seconds, rows, the query plan and the full scans it contains
+    """
+    views = load_views()
+    conn = sqlite3.connect(db_path)
+    try:
+        install_views(conn, views)
+        targets = [(f"view:{name}", f"SELECT * FROM {name}") for name in view_order(views)]
+        targets += [(f"query:{label}", sql) for label, _, sql in load_queries()]
+
+        results = {}
+        for key, sql in targets:
+            try:
+                results[key] = time_query(conn, sql, repeat, timeout)
+            except sqlite3.Error as e:
+                results[key] = {"error": str(e)}
+            result = results[key]
+            if "error" in result:
+                print(f"  {key:<45} ERROR {result['error']}")
+            else:
+                scans = f"  full scans: {len(result['full_scans'])}" if result["full_scans"] else ""
+                print(f"  {key:<45} {result['seconds']:8.3f}s {result['rows']:>8} rows{scans}")
+        return results
+    finally:
+        conn.close()
+
+
+def compare(results: Dict, baseline: Dict, ratio: float = REGRESSION_RATIO,
+            min_seconds: float = MIN_REGRESSION_SECONDS) -> List[str]:
+    """
+    Differences from a baseline run that should fail the benchmark.
+
+    Reports queries that became slower beyond the thresholds, queries that
+    started failing and full scans that the baseline plan did not have.
+    """
+    problems = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for key, result in current.items():
+            before = previous.get(key)
+            if before is None:
+                continue
+            if "error" in result:
+                if "error" not in before:
+                    problems.append(f"scale {scale} {key}: now fails ({result['error']})")
+                continue
+            if "seconds" in before and result["seconds"] > before["seconds"] * ratio \
+                    and result["seconds"] - before["seconds"] >= min_seconds:
+                problems.append(
+                    f"scale {scale} {key}: {before['seconds']:.3f}s -> {result['seconds']:.3f}s "
+                    f"({result['seconds'] / before['seconds']:.1f}x)"
+                )
+            for scan in sorted(set(result["full_scans"]) - set(before.get("full_scans", []))):
+                problems.append(f"scale {scale} {key}: new full scan '{scan}'")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the views and all_queries.sql at several data scales")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated scale factors to build and test")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the generated data")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to generate each database")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Where databases and results are written")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate databases that already exist")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query; the median time is kept")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a query is abandoned (0 for none)")
+    parser.add_argument("--baseline", help="Results JSON to check for regressions against")
+    parser.add_argument("--save-baseline", help="Also write the results to this path as the new baseline")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    results = {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sqlite_version": sqlite3.sqlite_version,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for scale in [float(value) for value in args.scales.split(",")]:
+        db_path = output_dir / f"scale_{scale:g}" / "contract_management.db"
+        if args.rebuild or not db_path.exists():
+            db_path = build_database(db_path.parent, scale, seed=args.seed, workers=args.workers)
+        print(f"Scale {scale:g}:")
+        results["scales"][f"{scale:g}"] = benchmark_database(db_path, repeat=args.repeat, timeout=args.timeout or None)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results_path = output_dir / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    for path in filter(None, [results_path, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(f"Results written to {results_path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import re
+import time
+from typing import Iterable, Optional, Sequence
+
+from src.jsonl_stream import iter_batches
+
+# Rows handed to each executemany call; large enough to amortise the call,
+# small enough that one chunk of tuples stays a few MB
+DEFAULT_CHUNK_SIZE = 10000
+
+_INSERT_TABLE = re.compile(r'INSERT\s+(?:OR\s+\w+\s+)?INTO\s+"?(\w+)', re.IGNORECASE)
+
+
+def stream_executemany(
+    cursor,
+    sql: str,
+    rows: Iterable[Sequence],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    label: Optional[str] = None,
+    report: bool = True,
+) -> int:
+    """
+    Insert rows from any iterable (typically a generator) in fixed-size chunks.
+
+    Only one chunk of rows is held in memory at a time. Each chunk is written
+    inside its own SAVEPOINT, so a failing chunk is rolled back on its own
+    before the error propagates. The chunks join the caller's transaction
+    (one is started if none is open), so committing or rolling back stays
+    with the caller, as with a single executemany.
+
+    Args:
+        cursor: Cursor to insert with
+        sql: Parameterised INSERT statement
+        rows: Row tuples matching the statement's placeholders
+        chunk_size: Rows per executemany call and savepoint
+        label: What to call the rows in the progress message; defaults to
+            "rows into <table>"
+        report: Print the row count and rows per second when done
+
+    Returns:
+        Number of rows inserted
+    """
+    if label is None:
+        match = _INSERT_TABLE.search(sql)
+        label = f"rows into {match.group(1)}" if match else "rows"
+
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+
+    total = 0
+    start = time.perf_counter()
+    for chunk in iter_batches(rows, chunk_size):
+        cursor.execute("SAVEPOINT stream_chunk")
+        try:
+            cursor.executemany(sql, chunk)
+        except Exception:
+            cursor.execute("ROLLBACK TO stream_chunk")
+            cursor.execute("RELEASE stream_chunk")
+            raise
+        cursor.execute("RELEASE stream_chunk")
+        total += len(chunk)
+
+    if report:
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else float('inf')
+        print(f"Inserted {total} {label} ({rate:,.0f} rows/s)")
+    return total
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+from src.db_pool import ConnectionPool
+
+# Article fields that identify a classification request
+KEY_FIELDS = ("title", "description", "source", "published_at")
+
+
+def cache_key(event: Dict, prompt_template: str, model_name: str, mode: Optional[str] = None) -> str:
+    """
+    Content hash of an article together with the prompt and model used.
+
+    Changing the prompt template or the model yields new keys, so stale
+    classifications are never served after either is updated. ``mode``
+    (e.g. "batch") separates results produced with the same template in
+    different ways; keys without a mode are unchanged.
+    """
+    fields = {
+        "article": {field: event.get(field) for field in KEY_FIELDS},
+        "prompt": prompt_template,
+        "model": model_name,
+    }
+    if mode is not None:
+        fields["mode"] = mode
+    payload = json.dumps(
+        fields,
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    def __init__(
+        self,
+        db_path: str = "classification_cache.db",
+        max_entries: Optional[int] = 50000,
+        max_age_seconds: Optional[float] = 30 * 24 * 3600,
+    ):
+        """
+        On-disk cache of validated LLM classifications.
+
+        Args:
+            db_path: Path to the SQLite file holding the cache
+            max_entries: Entries kept after eviction, least recently used
+                first out; None disables the size limit
+            max_age_seconds: Entries older than this are treated as misses
+                and evicted; None disables expiry
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+
+        self._pool = ConnectionPool(db_path, size=1)
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ClassificationCache (
+                    cache_key TEXT PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_classification_cache_accessed
+                ON ClassificationCache(last_accessed)
+            """)
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, stat, getattr(self, stat) + amount)
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+
+    def get(self, key: str, model: Type[BaseModel]) -> Optional[BaseModel]:
+        """
+        Return the cached classification for a key, or None on a miss.
+
+        Payloads that no longer validate against ``model`` (e.g. after an
+        enum change) are dropped and counted as misses.
+        """
+        return self.get_any([key], model)
+
+    def get_any(self, keys: Sequence[str], model: Type[BaseModel]) -> Optional[BaseModel]:
+        """
+        Return the classification cached under the first of several keys
+        that has a usable entry, or None.
+
+        The lookup counts as one hit or one miss, however many keys it tries.
+        """
+        now = time.time()
+        with self._pool.connection() as conn:
+            for key in keys:
+                classification = self._lookup(conn, key, model, now)
+                if classification is not None:
+                    self._count("hits")
+                    return classification
+        self._count("misses")
+        return None
+
+    def _lookup(self, conn, key: str, model: Type[BaseModel], now: float) -> Optional[BaseModel]:
+        """Valid entry under one key, touching it; expired or invalid entries are deleted"""
+        row = conn.execute(
+            "SELECT payload, created_at FROM ClassificationCache WHERE cache_key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        if self._is_expired(row["created_at"], now):
+            conn.execute("DELETE FROM ClassificationCache WHERE cache_key = ?", (key,))
+            self._count("evictions")
+            return None
+
+        try:
+            classification = model.model_validate_json(row["payload"])
+        except ValueError:
+            conn.execute("DELETE FROM ClassificationCache WHERE cache_key = ?", (key,))
+            return None
+
+        conn.execute(
+            "UPDATE ClassificationCache SET last_accessed = ? WHERE cache_key = ?",
+            (now, key)
+        )
+        return classification
+
+    def put(self, key: str, model_name: str, classification: BaseModel):
+        """Store a validated classification under a key"""
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute("""
+                INSERT INTO ClassificationCache
+                    (cache_key, model_name, payload, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    model_name = excluded.model_name,
+                    payload = excluded.payload,
+                    created_at = excluded.created_at,
+                    last_accessed = excluded.last_accessed
+            """, (key, model_name, classification.model_dump_json(), now, now))
+        self._count("stores")
+
+    def evict(self) -> int:
+        """
+        Remove expired entries and trim the cache to max_entries.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        with self._pool.connection() as conn:
+            if self.max_age_seconds is not None:
+                removed += conn.execute(
+                    "DELETE FROM ClassificationCache WHERE created_at < ?",
+                    (time.time() - self.max_age_seconds,)
+                ).rowcount
+
+            if self.max_entries is not None:
+                removed += conn.execute("""
+                    DELETE FROM ClassificationCache
+                    WHERE cache_key IN (
+                        SELECT cache_key
+                        FROM ClassificationCache
+                        ORDER BY last_accessed DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,)).rowcount
+
+        self._count("evictions", removed)
+        return removed
+
+    def clear(self):
+        """Remove every cached classification"""
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM ClassificationCache")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this instance plus the current cache size"""
+        with self._pool.connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM ClassificationCache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def close(self):
+        """Release the cache's database connection"""
+        self._pool.close()
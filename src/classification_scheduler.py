@@ -0,0 +1,252 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Rough size of the classification instructions and structured answer, used
+# when estimating tokens for the tokens-per-minute budget
+PROMPT_OVERHEAD_TOKENS = 400
+
+# Rough size of one structured classification in a batched answer
+ANSWER_TOKENS_PER_ITEM = 120
+
+
+def estimate_text_tokens(item: Dict) -> int:
+    """Approximate token count of an item's text (about four characters per token)"""
+    text_length = sum(len(str(value)) for value in item.values() if value is not None)
+    return text_length // 4
+
+
+def estimate_tokens(item: Dict) -> int:
+    """Approximate token count of a single-item request"""
+    return estimate_text_tokens(item) + PROMPT_OVERHEAD_TOKENS
+
+
+def estimate_batch_tokens(items: List[Dict]) -> int:
+    """Approximate token count of a request classifying several items at once"""
+    return PROMPT_OVERHEAD_TOKENS + sum(
+        estimate_text_tokens(item) + ANSWER_TOKENS_PER_ITEM for item in items
+    )
+
+
+def batch_by_tokens(
+    items: Iterable[Any],
+    max_tokens: int,
+    max_items: int,
+    token_estimator: Callable[[Any], int] = estimate_text_tokens
+) -> List[List[Any]]:
+    """
+    Greedily group items into batches that fit a per-request token budget.
+
+    Args:
+        items: Items to group, kept in order
+        max_tokens: Budget for the items of one batch, excluding the shared
+            prompt overhead; an item larger than the budget gets its own batch
+        max_items: Maximum number of items in one batch
+        token_estimator: Estimates the tokens one item adds to a batch
+
+    Returns:
+        List of batches
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for item in items:
+        tokens = token_estimator(item) + ANSWER_TOKENS_PER_ITEM
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a provider exception, if any"""
+    for candidate in (exc, getattr(exc, "response", None)):
+        status = getattr(candidate, "status_code", None) or getattr(candidate, "status", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for rate limits (429), server errors (5xx), timeouts and dropped connections"""
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After response header, if present"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        """
+        Async token bucket refilled continuously up to ``per_minute`` tokens.
+
+        Args:
+            per_minute: Bucket capacity and refill rate per minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until ``amount`` tokens are available and take them"""
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+@dataclass
+class ClassificationResult:
+    """Outcome of classifying one item; exactly one of classification/error is set"""
+    index: int
+    item: Any
+    classification: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ClassificationScheduler:
+    def __init__(
+        self,
+        classify: Callable[[Any], Awaitable[Any]],
+        max_in_flight: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        token_estimator: Callable[[Any], int] = estimate_tokens,
+    ):
+        """
+        Run LLM classifications with bounded concurrency, rate limits and retries.
+
+        Args:
+            classify: Coroutine function classifying a single item
+            max_in_flight: Maximum number of concurrent classify calls
+            requests_per_minute: Request budget, or None for unlimited
+            tokens_per_minute: Token budget, or None for unlimited
+            max_retries: Retries after the first attempt for retryable errors
+            base_delay: Base of the exponential backoff in seconds
+            max_delay: Upper bound of a single backoff in seconds
+            token_estimator: Estimates the tokens one item will consume
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.classify = classify
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.token_estimator = token_estimator
+
+        # Budgets are shared by every stream() and classify_one() call
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def classify_one(self, item: Any, index: int = 0) -> ClassificationResult:
+        """
+        Classify a single item under the scheduler's rate limits and retries.
+
+        Used by callers that manage their own workers (e.g. queue consumers);
+        concurrency is then bounded by the number of workers, not max_in_flight.
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            if self._request_bucket:
+                await self._request_bucket.acquire(1)
+            if self._token_bucket:
+                await self._token_bucket.acquire(self.token_estimator(item))
+
+            try:
+                classification = await self.classify(item)
+                return ClassificationResult(index, item, classification=classification, attempts=attempts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempts > self.max_retries or not is_retryable(e):
+                    return ClassificationResult(index, item, error=e, attempts=attempts)
+                await asyncio.sleep(self._backoff(attempts, e))
+
+    async def stream(self, items: Iterable[Any]) -> AsyncIterator[ClassificationResult]:
+        """
+        Classify items and yield results in completion order.
+
+        Items are pulled from ``items`` lazily, so at most ``max_in_flight``
+        are being classified at once. Failures are yielded as results with
+        ``error`` set rather than raised.
+        """
+        pending = iter(enumerate(items))
+        results = asyncio.Queue()
+        finished = object()
+
+        async def worker():
+            for index, item in pending:
+                result = await self.classify_one(item, index)
+                await results.put(result)
+
+        async def run_workers():
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.max_in_flight)))
+            finally:
+                await results.put(finished)
+
+        runner = asyncio.ensure_future(run_workers())
+        try:
+            while True:
+                result = await results.get()
+                if result is finished:
+                    break
+                yield result
+            # Surface unexpected errors raised outside the per-item handling
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                try:
+                    await runner
+                except asyncio.CancelledError:
+                    pass
@@ -1,13 +1,30 @@
-import pandas as pd
-from typing import List, Dict
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
 import asyncio
 import os
 from datetime import datetime
-from dotenv import load_dotenv
+
+from src.classification_cache import ClassificationCache, cache_key
+# pandas, langchain and the OpenAI client are imported on first use so that
+# workers which only need the enums and EventClassification start quickly
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.classification_scheduler import (
+    ClassificationResult,
+    ClassificationScheduler,
+    batch_by_tokens,
+    estimate_batch_tokens,
+    estimate_text_tokens,
+)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Batched mode limits: article tokens per request and articles per request
+DEFAULT_BATCH_TOKENS = 4000
+DEFAULT_BATCH_SIZE = 20
 
 # Enum definitions
 class EventCategory(str, Enum):
@@ -88,8 +105,14 @@ class EventClassification(BaseModel):
     confidence_score: float 
     explanation: str
 
-# Create prompt template
-classification_prompt = ChatPromptTemplate.from_template(
+class IndexedEventClassification(EventClassification):
+    article_index: int = Field(description="Number of the article this classification belongs to")
+
+class BatchEventClassification(BaseModel):
+    classifications: List[IndexedEventClassification]
+
+# Prompt templates
+CLASSIFICATION_TEMPLATE = (
 """Analyze the following news article and classify it according to our event classification system. Consider the content carefully and provide classifications with explanations.
 
 Article Title: {title}
@@ -110,9 +133,87 @@ Provide a confidence score (0-1) for your classification and a brief explanation
 Only return the properties defined in the EventClassification model."""
 )
 
+# Prompt for classifying several articles in one call
+BATCH_CLASSIFICATION_TEMPLATE = (
+"""Analyze each of the following numbered news articles and classify it according to our event classification system. Consider the content carefully and provide classifications with explanations.
+
+{articles}
+
+Please classify each event according to the following criteria:
+1. Event Category: Based on whether it's internal/external and its primary impact
+2. Event Type: The specific nature of the event
+3. Severity: Impact level on operations and stakeholders
+4. Status: Current state of the event
+5. Geographic Region: Primary region affected
+6. Business Unit: Primary business unit impacted
+
+Provide a confidence score (0-1) for each classification and a brief explanation of your reasoning.
+
+Return exactly one classification per article, with article_index set to the article's number. Only return the properties defined in the BatchEventClassification model."""
+)
+
+@lru_cache(maxsize=None)
+def get_classification_prompt():
+    """Single-article ChatPromptTemplate, built on first use"""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(CLASSIFICATION_TEMPLATE)
+
+@lru_cache(maxsize=None)
+def get_batch_classification_prompt():
+    """Multi-article ChatPromptTemplate, built on first use"""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(BATCH_CLASSIFICATION_TEMPLATE)
+
+def __getattr__(name):
+    # Keep the old module-level prompt names available without building
+    # them at import time
+    if name == "classification_prompt":
+        return get_classification_prompt()
+    if name == "batch_classification_prompt":
+        return get_batch_classification_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_openai_api_key() -> str:
+    """Read OPENAI_API_KEY from the environment or the .env file"""
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables. Please add it to your .env file.")
+    return api_key
+
+@lru_cache(maxsize=None)
+def get_llm(model_name: str = DEFAULT_MODEL, batched: bool = False):
+    """
+    Structured-output LLM client, created on first use and reused afterwards.
+    
+    Args:
+        model_name: OpenAI chat model name
+        batched: Return the BatchEventClassification client used by batched
+            mode (with include_raw=True) instead of the single-article one
+    """
+    from langchain_openai import ChatOpenAI
+    
+    chat_model = ChatOpenAI(temperature=0, model=model_name, api_key=get_openai_api_key())
+    if batched:
+        return chat_model.with_structured_output(BatchEventClassification, include_raw=True)
+    return chat_model.with_structured_output(EventClassification)
+
+def format_batch_articles(events: List[Dict]) -> str:
+    """Render articles as the numbered list used by batch_classification_prompt"""
+    return "\n\n".join(
+        f"Article {index}:\n"
+        f"Article Title: {event['title']}\n"
+        f"Article Description: {event['description']}\n"
+        f"Source: {event['source']}\n"
+        f"Published Date: {event['published_at']}"
+        for index, event in enumerate(events)
+    )
+
 async def classify_event_async(event_data: Dict, llm) -> EventClassification:
     """Classify a single event asynchronously"""
-    prompt = classification_prompt.invoke({
+    prompt = get_classification_prompt().invoke({
         "title": event_data["title"],
         "description": event_data["description"],
         "source": event_data["source"],
@@ -120,62 +221,291 @@ async def classify_event_async(event_data: Dict, llm) -> EventClassification:
     })
     return await llm.ainvoke(prompt)
 
-async def process_events(events: List[Dict]) -> pd.DataFrame:
-    """Process multiple events and return a DataFrame"""
+async def classify_batch_async(events: List[Dict], llm) -> Dict[int, EventClassification]:
+    """
+    Classify several events in one call.
+
+    llm must be structured for BatchEventClassification with include_raw=True.
+    When the answer as a whole fails validation, each classification is
+    validated on its own so only the broken ones are lost.
+
+    Returns:
+        Classifications keyed by position in ``events``; positions that are
+        missing, duplicated or invalid are left out
+    """
+    prompt = get_batch_classification_prompt().invoke({"articles": format_batch_articles(events)})
+    response = await llm.ainvoke(prompt)
+    
+    parsed = response.get("parsed")
+    if parsed is not None:
+        candidates = parsed.classifications
+    else:
+        tool_calls = getattr(response.get("raw"), "tool_calls", None) or []
+        candidates = []
+        for item in (tool_calls[0]["args"].get("classifications") or []) if tool_calls else []:
+            try:
+                candidates.append(IndexedEventClassification.model_validate(item))
+            except ValueError:
+                continue
+    
+    classifications = {}
+    duplicates = set()
+    for candidate in candidates:
+        index = candidate.article_index
+        if not 0 <= index < len(events):
+            continue
+        if index in classifications:
+            duplicates.add(index)
+        classifications[index] = EventClassification(**candidate.model_dump(exclude={"article_index"}))
+    for index in duplicates:
+        del classifications[index]
+    return classifications
+
+def classification_cache_key(event_data: Dict, model_name: str = DEFAULT_MODEL, batched: bool = False) -> str:
+    """
+    Cache key of an event for a model and the prompt that classifies it:
+    BATCH_CLASSIFICATION_TEMPLATE in batch mode, CLASSIFICATION_TEMPLATE otherwise
+    """
+    if batched:
+        return cache_key(event_data, BATCH_CLASSIFICATION_TEMPLATE, model_name, mode="batch")
+    return cache_key(event_data, CLASSIFICATION_TEMPLATE, model_name)
+
+async def stream_classifications(
+    events: Iterable[Dict],
+    llm,
+    cache: Optional[ClassificationCache] = None,
+    model_name: str = DEFAULT_MODEL,
+    batch_llm=None,
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    max_batch_size: int = DEFAULT_BATCH_SIZE,
+    **scheduler_options
+) -> AsyncIterator[ClassificationResult]:
+    """
+    Classify events through a ClassificationScheduler, yielding each result
+    as soon as it completes. Keyword arguments configure the scheduler
+    (max_in_flight, requests_per_minute, tokens_per_minute, max_retries, ...).
+
+    With a cache, cached events are yielded first without calling the LLM
+    and new classifications are stored as they arrive, keyed by the prompt
+    that produced them. With a batch_llm, batched and single-article
+    results are both served from the cache.
+
+    With a batch_llm, events are grouped into batches sized by token budget
+    and classified several per call; events a batch fails to classify are
+    retried with single-article calls.
+    """
+    events = list(events)
+    batched = batch_llm is not None
+    pending = []
+    for index, event in enumerate(events):
+        # (single-article key, batch key) of the event
+        keys = (None, None)
+        classification = None
+        if cache:
+            keys = (
+                classification_cache_key(event, model_name),
+                classification_cache_key(event, model_name, batched=True) if batched else None,
+            )
+            # Batch result first; one hit or miss is counted per event
+            classification = cache.get_any([key for key in reversed(keys) if key], EventClassification)
+        if classification is not None:
+            yield ClassificationResult(index, event, classification=classification)
+        else:
+            pending.append((index, keys))
+    
+    if batched and len(pending) > 1:
+        batches = batch_by_tokens(
+            pending,
+            max_batch_tokens,
+            max_batch_size,
+            lambda entry: estimate_text_tokens(events[entry[0]])
+        )
+        batch_scheduler = ClassificationScheduler(
+            lambda batch: classify_batch_async([events[index] for index, _ in batch], batch_llm),
+            **{
+                "token_estimator": lambda batch: estimate_batch_tokens([events[index] for index, _ in batch]),
+                **scheduler_options,
+            }
+        )
+        
+        fallback = []
+        async for batch_result in batch_scheduler.stream(batches):
+            classifications = batch_result.classification if batch_result.ok else {}
+            for position, (index, keys) in enumerate(batch_result.item):
+                classification = classifications.get(position)
+                if classification is None:
+                    fallback.append((index, keys))
+                    continue
+                if cache:
+                    cache.put(keys[1], model_name, classification)
+                yield ClassificationResult(
+                    index, events[index], classification=classification, attempts=batch_result.attempts
+                )
+        pending = fallback
+    
+    if not pending:
+        return
+    
+    scheduler = ClassificationScheduler(
+        lambda event: classify_event_async(event, llm),
+        **scheduler_options
+    )
+    async for result in scheduler.stream(events[index] for index, _ in pending):
+        index, keys = pending[result.index]
+        if cache and result.ok:
+            cache.put(keys[0], model_name, result.classification)
+        result.index = index
+        yield result
+
+def classification_row(event: Dict, classification: EventClassification) -> Dict:
+    """Flatten an event and its classification into one output row"""
+    return {
+        'event_title': event['title'],
+        'description':event['description'],
+        'event_source': event['source'],
+        'published_at': datetime.fromisoformat(event['published_at'].replace('Z', '+00:00')),
+        'category': classification.category.value,
+        'event_type': classification.event_type.value,
+        'severity': classification.severity.value,
+        'status': classification.status.value,
+        'geographic_region': classification.geographic_region.value,
+        'business_unit': classification.business_unit.value,
+        'confidence_score': classification.confidence_score,
+        'explanation': classification.explanation,
+        'url': event['url']
+    }
+
+async def process_events(
+    events: List[Dict],
+    cache: Optional[ClassificationCache] = None,
+    model_name: str = DEFAULT_MODEL,
+    batched: bool = False,
+    deduplicate: bool = False,
+    **scheduler_options
+) -> "pd.DataFrame":
+    """
+    Process multiple events and return a DataFrame.
+    
+    With deduplicate, near-duplicate articles (syndicated copies of one
+    story) are grouped first; only the earliest published article of each
+    story is sent to the LLM and its classification is attached to the others,
+    whose 'duplicate_of' column holds the representative's URL.
+    """
+    import pandas as pd
+    
     # Initialize LLM
     
-    llm = ChatOpenAI(temperature=0, model="gpt-4o-mini").with_structured_output(EventClassification)
+    llm = get_llm(model_name)
+    if batched:
+        scheduler_options["batch_llm"] = get_llm(model_name, batched=True)
+    
+    # Group syndicated copies of the same story so each story is classified once
+    if deduplicate:
+        from src.dedup import StoryClusterer
+        
+        # Articles are added oldest first (NewsAPI lists the newest first), so
+        # the first article of each cluster is its earliest; undated ones go last
+        order = sorted(range(len(events)), key=lambda index: (
+            not events[index].get('published_at'), events[index].get('published_at') or ''
+        ))
+        
+        # Representatives are read only after every article is added, since
+        # a later article can merge two stories seen earlier
+        clusterer = StoryClusterer()
+        clusterer.add_all(events[index] for index in order)
+        representatives = [None] * len(events)
+        for position, index in enumerate(order):
+            representatives[index] = order[clusterer.representative(position)]
+        to_classify = sorted(set(representatives))
+        print(f"Deduplicated {len(events)} events into {len(to_classify)} stories")
+    else:
+        representatives = list(range(len(events)))
+        to_classify = representatives
     
-    # Process events concurrently
-    tasks = [classify_event_async(event, llm) for event in events]
-    classifications = await asyncio.gather(*tasks)
+    # Process events with bounded concurrency, rate limiting and retries,
+    # skipping the LLM for events already in the cache
+    classifications = {}
+    failures = []
+    async for result in stream_classifications(
+        [events[index] for index in to_classify], llm, cache, model_name, **scheduler_options
+    ):
+        if result.ok:
+            classifications[to_classify[result.index]] = result.classification
+        else:
+            failures.append(result)
+    
+    if failures:
+        print(f"Failed to classify {len(failures)} of {len(to_classify)} events:")
+        for result in failures:
+            print(f"  {result.item['title']}: {result.error!r} (after {result.attempts} attempts)")
+    
+    if cache:
+        cache.evict()
+        stats = cache.stats()
+        print(f"Classification cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
     
     # Create DataFrame
     df_data = []
-    for event, classification in zip(events, classifications):
-        row = {
-            'event_title': event['title'],
-            'description':event['description'],
-            'event_source': event['source'],
-            'published_at': datetime.fromisoformat(event['published_at'].replace('Z', '+00:00')),
-            'category': classification.category.value,
-            'event_type': classification.event_type.value,
-            'severity': classification.severity.value,
-            'status': classification.status.value,
-            'geographic_region': classification.geographic_region.value,
-            'business_unit': classification.business_unit.value,
-            'confidence_score': classification.confidence_score,
-            'explanation': classification.explanation,
-            'url': event['url']
-        }
+    for index, event in enumerate(events):
+        classification = classifications.get(representatives[index])
+        if classification is None:
+            continue
+        row = classification_row(event, classification)
+        if deduplicate:
+            row['duplicate_of'] = events[representatives[index]]['url'] if representatives[index] != index else None
         df_data.append(row)
     
     # Create DataFrame and set index
     df = pd.DataFrame(df_data)
+    if df.empty:
+        return df
     df['published_at'] = pd.to_datetime(df['published_at'])
     df = df.sort_values('published_at', ascending=False)
     
     return df
 
-# Load the .env file
-load_dotenv()
-
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please add it to your .env file.")
+async def classify_jsonl(
+    input_path: str,
+    output_path: str,
+    chunk_size: int = 500,
+    cache: Optional[ClassificationCache] = None,
+    model_name: str = DEFAULT_MODEL,
+    batched: bool = False,
+    **scheduler_options
+) -> int:
+    """
+    Classify a JSONL file of articles into a JSONL file of classified rows.
     
-
-# Example usage
-async def main(events):
-    df = await process_events(events)
-    return df
-
-# Run the processing
-import json
+    Articles are read and classified chunk by chunk and each row is written
+    as soon as its classification completes, so memory stays bounded by
+    chunk_size. The output appears atomically once every chunk is done.
+    
+    Returns:
+        Number of rows written
+    """
+    from src.jsonl_stream import JsonlWriter, iter_batches, read_jsonl
+    
+    llm = get_llm(model_name)
+    if batched:
+        scheduler_options["batch_llm"] = get_llm(model_name, batched=True)
+    
+    failed = 0
+    with JsonlWriter(output_path) as writer:
+        for chunk in iter_batches(read_jsonl(input_path), chunk_size):
+            async for result in stream_classifications(chunk, llm, cache, model_name, **scheduler_options):
+                if result.ok:
+                    writer.write(classification_row(result.item, result.classification))
+                else:
+                    failed += 1
+        written = writer.count
+    
+    if cache:
+        cache.evict()
+    print(f"Classified {written} events into {output_path} ({failed} failed)")
+    return written
 
 # Sample events data
-events = [
+SAMPLE_EVENTS = [
     {
         "title": "Aprio Wealth Management LLC Boosts Holdings in Duke Energy Co. (NYSE:DUK)",
         "description": "Aprio Wealth Management LLC grew its holdings in Duke Energy Co. (NYSE:DUK – Free Report) by 62.0% during the 4th quarter...",
@@ -192,12 +522,16 @@ events = [
     }
 ]
 
-# Process events and create DataFrame
-df = asyncio.run(main(events))
-
-# Display the results
-print("\nEvent Classification Results:")
-print(df.to_string())
+def main():
+    """Classify the sample events and save the results to event_classifications.csv"""
+    df = asyncio.run(process_events(SAMPLE_EVENTS, cache=ClassificationCache()))
+    
+    # Display the results
+    print("\nEvent Classification Results:")
+    print(df.to_string())
+    
+    # Save to CSV (optional)
+    df.to_csv('event_classifications.csv', index=False)
 
-# Save to CSV (optional)
-df.to_csv('event_classifications.csv', index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,363 @@
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from src.db_pool import ConnectionPool
+
+# Ranks a candidate contract for an event; higher scores rank first
+ContractRanker = Callable[[Dict, object], float]
+
+# Columns returned for every matching contract
+MATCH_COLUMNS = """
+                ch.contract_id,
+                ch.vendor_id,
+                ch.contract_number,
+                v.vendor_name,
+                ch.total_value,
+                ch.start_date,
+                ch.end_date,
+                ch.business_unit_id,
+                ch.region_id"""
+
+
+@dataclass
+class ContractCriteria:
+    """Filters used to narrow the contracts an event can affect"""
+    business_unit_ids: Optional[Sequence[int]] = None
+    region_ids: Optional[Sequence[int]] = None
+    vendor_ids: Optional[Sequence[int]] = None
+    active_from: Optional[str] = None  # contract must end on or after this date
+    active_to: Optional[str] = None    # contract must start on or before this date
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    statuses: Sequence[str] = field(default_factory=lambda: ("Active", "Under Review"))
+
+    def key(self) -> Tuple:
+        """Hashable identity, so identical criteria can share one query"""
+        return (
+            tuple(sorted(self.business_unit_ids)) if self.business_unit_ids is not None else None,
+            tuple(sorted(self.region_ids)) if self.region_ids is not None else None,
+            tuple(sorted(self.vendor_ids)) if self.vendor_ids is not None else None,
+            self.active_from, self.active_to,
+            self.min_value, self.max_value,
+            tuple(self.statuses),
+        )
+
+# Temp tables holding the id lists of match_many criteria, and their id column
+MATCH_SCOPE_TABLES = (
+    ("MatchCriteriaUnit", "business_unit_id"),
+    ("MatchCriteriaRegion", "region_id"),
+    ("MatchCriteriaVendor", "vendor_id"),
+)
+
+
+def related_ids(hierarchy: Mapping, node_id: int, parent_field: str) -> Set[int]:
+    """
+    Ids of a node, its descendants and its ancestors in a parent/child table.
+
+    An event in Germany affects contracts scoped to Germany, to its cities and
+    to the wider Europe / Global regions that include it, but not to Japan.
+    """
+    if node_id not in hierarchy:
+        return {node_id}
+
+    children = {}
+    for child_id, row in hierarchy.items():
+        children.setdefault(row[parent_field], []).append(child_id)
+
+    ids = set()
+    stack = [node_id]
+    while stack:
+        current = stack.pop()
+        if current not in ids:
+            ids.add(current)
+            stack.extend(children.get(current, []))
+
+    parent = hierarchy[node_id][parent_field]
+    while parent is not None and parent not in ids:
+        ids.add(parent)
+        parent = hierarchy.get(parent, {}).get(parent_field)
+
+    return ids
+
+
+def rank_by_value(contract: Dict, event) -> float:
+    """Rank larger contracts first"""
+    return contract["total_value"] or 0.0
+
+
+def rank_by_scope(contract: Dict, event) -> float:
+    """Rank exact business unit / region matches first, then by value"""
+    score = 0.0
+    if event.business_unit_id and contract["business_unit_id"] == event.business_unit_id:
+        score += 2.0
+    if event.region_id and contract["region_id"] == event.region_id:
+        score += 1.0
+    # Value only breaks ties between contracts with the same scope score
+    return score * 1e12 + (contract["total_value"] or 0.0)
+
+
+class ContractMatcher:
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        page_size: int = 500,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None
+    ):
+        """
+        Find contracts affected by an event using indexed filters.
+
+        Args:
+            pool: Connection pool for the contract database
+            page_size: Rows fetched per keyset page when streaming matches
+            min_value: Contract value band applied to every event's criteria,
+                e.g. to leave out contracts too small to assess
+            max_value: Upper end of the value band
+        """
+        self.pool = pool
+        self.page_size = page_size
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def criteria_for_event(self, event, reference) -> ContractCriteria:
+        """Derive matching criteria from an event and the reference snapshot"""
+        on_date = (event.occurrence_date or datetime.now().strftime("%Y-%m-%d"))[:10]
+        return ContractCriteria(
+            business_unit_ids=sorted(related_ids(
+                reference.business_units, event.business_unit_id, "parent_unit_id"
+            )) if event.business_unit_id else None,
+            region_ids=sorted(related_ids(
+                reference.regions, event.region_id, "parent_region_id"
+            )) if event.region_id else None,
+            vendor_ids=[event.vendor_id] if event.vendor_id else None,
+            active_from=on_date,
+            active_to=on_date,
+            min_value=self.min_value,
+            max_value=self.max_value,
+        )
+
+    def _build_query(self, criteria: ContractCriteria, after_contract_id: Optional[int], limit: int):
+        """SQL and parameters for one keyset page of matching contracts"""
+        conditions = [f"""ch.status_id IN (
+                SELECT status_id
+                FROM ContractStatus
+                WHERE status_name IN ({", ".join("?" for _ in criteria.statuses)})
+            )"""]
+        params = list(criteria.statuses)
+
+        # Contracts without a business unit or region are not scoped to one,
+        # so they match every event
+        for column, values, unscoped in (
+            ("ch.business_unit_id", criteria.business_unit_ids, True),
+            ("ch.region_id", criteria.region_ids, True),
+            ("ch.vendor_id", criteria.vendor_ids, False),
+        ):
+            if values is not None:
+                condition = f"{column} IN ({', '.join('?' for _ in values)})"
+                conditions.append(f"({condition} OR {column} IS NULL)" if unscoped else condition)
+                params.extend(values)
+
+        if criteria.active_from:
+            conditions.append("ch.end_date >= ?")
+            params.append(criteria.active_from)
+        if criteria.active_to:
+            conditions.append("ch.start_date <= ?")
+            params.append(criteria.active_to)
+        if criteria.min_value is not None:
+            conditions.append("ch.total_value >= ?")
+            params.append(criteria.min_value)
+        if criteria.max_value is not None:
+            conditions.append("ch.total_value <= ?")
+            params.append(criteria.max_value)
+        if after_contract_id is not None:
+            conditions.append("ch.contract_id > ?")
+            params.append(after_contract_id)
+
+        query = f"""
+            SELECT{MATCH_COLUMNS}
+            FROM ContractHeader ch
+            JOIN Vendor v ON ch.vendor_id = v.vendor_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY ch.contract_id
+            LIMIT ?
+        """
+        params.append(limit)
+        return query, params
+
+    def page(
+        self,
+        criteria: ContractCriteria,
+        limit: int = 100,
+        after_contract_id: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Fetch one page of matches in contract_id order.
+
+        Returns:
+            (contracts, next_cursor) where next_cursor is passed back as
+            after_contract_id for the following page, or None when no
+            matches remain
+        """
+        # One extra row tells whether another page exists
+        query, params = self._build_query(criteria, after_contract_id, limit + 1)
+        with self.pool.connection() as conn:
+            rows = [dict(row) for row in conn.execute(query, params)]
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["contract_id"]
+        return rows, None
+
+    def iter_matches(self, criteria: ContractCriteria) -> Iterator[Dict]:
+        """Stream every match page by page without holding a connection between pages"""
+        after_contract_id = None
+        while True:
+            rows, after_contract_id = self.page(criteria, self.page_size, after_contract_id)
+            yield from rows
+            if after_contract_id is None:
+                return
+
+    def match_many(
+        self,
+        criteria_list: Sequence[ContractCriteria],
+        limit: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """
+        Matches for several criteria at once, in contract_id order.
+
+        The criteria are loaded into temp tables and joined against
+        ContractHeader, so a batch costs one query (one per distinct status
+        list) instead of one per criteria.
+
+        Args:
+            criteria_list: Criteria to match
+            limit: Keep at most this many matches per criteria
+
+        Returns:
+            One list of matches per criteria, in the same order
+        """
+        results = [[] for _ in criteria_list]
+        by_statuses = {}
+        for index, criteria in enumerate(criteria_list):
+            by_statuses.setdefault(tuple(criteria.statuses), []).append(index)
+
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS MatchCriteria (
+                    criteria_id INTEGER PRIMARY KEY,
+                    any_vendor INTEGER,
+                    active_from TEXT,
+                    active_to TEXT,
+                    min_value REAL,
+                    max_value REAL
+                )
+            """)
+            for table, column in MATCH_SCOPE_TABLES:
+                conn.execute(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {table} "
+                    f"(criteria_id INTEGER, {column} INTEGER, PRIMARY KEY (criteria_id, {column}))"
+                )
+
+            for statuses, indexes in by_statuses.items():
+                self._load_match_criteria(conn, [(index, criteria_list[index]) for index in indexes])
+                # Contracts join the criteria's (business unit, region)
+                # pairs on equality, so SQLite can index either side
+                query = f"""
+                    SELECT mc.criteria_id,{MATCH_COLUMNS}
+                    FROM MatchCriteria mc
+                    JOIN MatchCriteriaUnit mu ON mu.criteria_id = mc.criteria_id
+                    JOIN MatchCriteriaRegion mr ON mr.criteria_id = mc.criteria_id
+                    JOIN ContractHeader ch
+                        ON ch.business_unit_id IS mu.business_unit_id
+                        AND ch.region_id IS mr.region_id
+                        AND ch.status_id IN (
+                            SELECT status_id
+                            FROM ContractStatus
+                            WHERE status_name IN ({", ".join("?" for _ in statuses)})
+                        )
+                        AND (mc.active_from IS NULL OR ch.end_date >= mc.active_from)
+                        AND (mc.active_to IS NULL OR ch.start_date <= mc.active_to)
+                        AND (mc.min_value IS NULL OR ch.total_value >= mc.min_value)
+                        AND (mc.max_value IS NULL OR ch.total_value <= mc.max_value)
+                    JOIN Vendor v ON ch.vendor_id = v.vendor_id
+                    WHERE (mc.any_vendor OR EXISTS (
+                        SELECT 1 FROM MatchCriteriaVendor mv
+                        WHERE mv.criteria_id = mc.criteria_id AND mv.vendor_id = ch.vendor_id
+                    ))
+                """
+                params = list(statuses)
+                if limit is not None:
+                    # Number each criteria's matches and keep the first `limit`
+                    query = f"""
+                        SELECT * FROM (
+                            SELECT *, ROW_NUMBER() OVER (
+                                PARTITION BY criteria_id ORDER BY contract_id
+                            ) AS match_number
+                            FROM ({query})
+                        )
+                        WHERE match_number <= ?
+                    """
+                    params.append(limit)
+                else:
+                    query = f"SELECT * FROM ({query})"
+                for row in conn.execute(f"{query} ORDER BY criteria_id, contract_id", params):
+                    row = dict(row)
+                    row.pop("match_number", None)
+                    results[row.pop("criteria_id")].append(row)
+
+            for table in ["MatchCriteria"] + [table for table, _ in MATCH_SCOPE_TABLES]:
+                conn.execute(f"DELETE FROM {table}")
+
+        return results
+
+    def _load_match_criteria(self, conn, indexed_criteria: List[Tuple[int, ContractCriteria]]):
+        """
+        Replace the contents of the match_many temp tables.
+
+        Business unit and region lists get a NULL entry, since unscoped
+        contracts match every event. Criteria without a business unit or
+        region filter get every value found in ContractHeader instead.
+        """
+        for table in ["MatchCriteria"] + [table for table, _ in MATCH_SCOPE_TABLES]:
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            "INSERT INTO MatchCriteria VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    index,
+                    criteria.vendor_ids is None,
+                    criteria.active_from,
+                    criteria.active_to,
+                    criteria.min_value,
+                    criteria.max_value,
+                )
+                for index, criteria in indexed_criteria
+            ]
+        )
+        for (table, column), field_name in zip(MATCH_SCOPE_TABLES, ("business_unit_ids", "region_ids", "vendor_ids")):
+            scoped = column != "vendor_id"
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} (criteria_id, {column}) VALUES (?, ?)",
+                [
+                    (index, value)
+                    for index, criteria in indexed_criteria
+                    if getattr(criteria, field_name) is not None
+                    for value in list(getattr(criteria, field_name)) + ([None] if scoped else [])
+                ]
+            )
+            unfiltered = [(index,) for index, criteria in indexed_criteria if getattr(criteria, field_name) is None]
+            if scoped and unfiltered:
+                conn.executemany(f"""
+                    INSERT OR IGNORE INTO {table} (criteria_id, {column})
+                    SELECT ?, {column} FROM (SELECT DISTINCT {column} FROM ContractHeader)
+                """, unfiltered)
+
+    def top_matches(
+        self,
+        criteria: ContractCriteria,
+        k: int,
+        ranker: ContractRanker,
+        event=None
+    ) -> List[Dict]:
+        """Best k matches according to ranker, keeping only k rows in memory"""
+        return heapq.nlargest(k, self.iter_matches(criteria), key=lambda row: ranker(row, event))
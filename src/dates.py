@@ -0,0 +1,145 @@
+import argparse
+import sqlite3
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from src.db_pool import get_pool
+from src.kpi_impact import refresh_kpi_impact
+
+# Canonical TEXT forms of the date columns. ISO strings (rather than epoch
+# integers) keep the views' DATE() and JULIANDAY() arithmetic working, and
+# they sort in date order, so BETWEEN windows can range-scan an index.
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# SQLite function that produces the canonical form for each declared type
+NORMALIZERS = {
+    "DATE": "DATE",
+    "TIMESTAMP": "DATETIME",
+    "DATETIME": "DATETIME",
+}
+
+# Covering indexes for the event window joins: the measurement window is a
+# range on measure_date within a contract, and every measurement column the
+# views read is in the index, so the table rows are never visited
+WINDOW_INDEXES_SQL = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_kpi_measurement_window
+    ON ContractKPIMeasurement(contract_id, measure_date, kpi_id, actual_value, achievement_percentage)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_impact_event_contract
+    ON EventImpactAssessment(event_id, contract_id, impact_level)
+    """,
+]
+
+
+def adapt_date(val: date) -> str:
+    return val.strftime(DATE_FORMAT)
+
+
+def adapt_datetime(val: datetime) -> str:
+    # No 'T' separator and no microseconds, so stored timestamps compare
+    # correctly with DATETIME() and with each other as strings
+    return val.strftime(TIMESTAMP_FORMAT)
+
+
+def convert_date(val: bytes) -> date:
+    return datetime.strptime(val.decode()[:10], DATE_FORMAT).date()
+
+
+def convert_datetime(val: bytes) -> datetime:
+    return datetime.fromisoformat(val.decode())
+
+
+def register_adapters():
+    """Store Python dates and datetimes in the canonical formats"""
+    sqlite3.register_adapter(date, adapt_date)
+    sqlite3.register_adapter(datetime, adapt_datetime)
+    sqlite3.register_converter("DATE", convert_date)
+    sqlite3.register_converter("DATETIME", convert_datetime)
+    sqlite3.register_converter("TIMESTAMP", convert_datetime)
+
+
+def create_window_indexes(cursor):
+    for sql in WINDOW_INDEXES_SQL:
+        cursor.execute(sql)
+
+
+def date_columns(cursor) -> List[Tuple[str, str, str]]:
+    """(table, column, normalising function) for every date-typed table column"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    columns = []
+    for (table,) in cursor.fetchall():
+        for _, column, declared, *_ in cursor.execute(f'PRAGMA table_info("{table}")').fetchall():
+            function = NORMALIZERS.get(declared.upper())
+            if function:
+                columns.append((table, column, function))
+    return columns
+
+
+def normalize_dates(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Rewrite every DATE, TIMESTAMP and DATETIME column in its canonical form.
+
+    Values such as '2025-01-14T12:23:04.123456' or '2025-01-14T12:23:04Z'
+    become '2025-01-14 12:23:04'; values already canonical are left alone,
+    so running this again is a no-op. Text SQLite cannot parse is kept and
+    counted. The window indexes are created and statistics refreshed, and
+    the materialised KPI impact tables are brought up to date.
+
+    Returns:
+        Dict of "table.column" to rows rewritten, plus "unparsed" for the
+        number of values left as they were
+    """
+    cursor = conn.cursor()
+    rewritten = {}
+    unparsed = 0
+    try:
+        for table, column, function in date_columns(cursor):
+            cursor.execute(f"""
+                UPDATE "{table}" SET "{column}" = {function}("{column}")
+                WHERE typeof("{column}") = 'text'
+                AND {function}("{column}") IS NOT NULL
+                AND "{column}" <> {function}("{column}")
+            """)
+            if cursor.rowcount:
+                rewritten[f"{table}.{column}"] = cursor.rowcount
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM "{table}"
+                WHERE "{column}" IS NOT NULL AND {function}("{column}") IS NULL
+            """)
+            unparsed += cursor.fetchone()[0]
+
+        create_window_indexes(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    cursor.execute("ANALYZE")
+    conn.commit()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'KPIImpactChangeLog'")
+    if cursor.fetchone():
+        refresh_kpi_impact(conn)
+
+    for name, count in rewritten.items():
+        print(f"Normalised {count} values in {name}")
+    if unparsed:
+        print(f"Left {unparsed} unparseable date values unchanged")
+    return {**rewritten, "unparsed": unparsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite stored dates in canonical ISO form and add the window indexes")
+    parser.add_argument("--db", default="contract_management.db", help="SQLite database path")
+    args = parser.parse_args()
+
+    pool = get_pool(args.db, size=1)
+    with pool.connection() as conn:
+        normalize_dates(conn)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Pragmas applied to every pooled connection. cache_size is negative so it is
+# interpreted as KiB (64 MB) rather than pages; mmap_size is in bytes (256 MB).
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+
+class PoolExhaustedError(sqlite3.OperationalError):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        pragmas: Optional[Dict] = None,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+    ):
+        """
+        Pool of long-lived SQLite connections shared across threads.
+
+        Args:
+            db_path: Path to the SQLite database file
+            size: Maximum number of open connections
+            pragmas: Overrides merged on top of DEFAULT_PRAGMAS
+            acquire_timeout: Seconds to wait for a free connection
+            health_check_interval: Idle seconds after which a connection is
+                pinged with ``SELECT 1`` before being handed out again
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """Forget all connections (used on creation and after a fork)"""
+        self._idle = queue.LifoQueue()
+        self._last_used = {}
+        self._opened = 0
+        self._pid = os.getpid()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection with the pool's pragmas applied"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Check that a connection can still run a trivial query"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """Close a connection and free its slot in the pool"""
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool, opening one if there is room"""
+        # Connections must never cross a fork; child processes start afresh
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    if self._opened < self.size:
+                        self._opened += 1
+                        can_open = True
+                    else:
+                        can_open = False
+                if can_open:
+                    try:
+                        return self._connect()
+                    except sqlite3.Error:
+                        with self._lock:
+                            self._opened -= 1
+                        raise
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise PoolExhaustedError(
+                        f"No connection available for {self.db_path} "
+                        f"after {self.acquire_timeout}s (pool size {self.size})"
+                    )
+
+            idle_for = time.monotonic() - self._last_used.get(id(conn), 0)
+            if idle_for < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if self._pid != os.getpid():
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+
+        The transaction is committed on success and rolled back on error,
+        matching ``sqlite3.Connection``'s own context manager behaviour.
+        """
+        conn = self.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection held by the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> ConnectionPool:
+    """
+    Return the process-wide pool for a database, creating it on first use.
+
+    Keyword arguments are only applied when the pool is created, so the
+    first caller decides the pool configuration.
+    """
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close and forget every pool created through get_pool"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
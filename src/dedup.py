@@ -0,0 +1,159 @@
+import re
+import zlib
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Mersenne prime used for the universal hash family; keeping every operand
+# below 2**31 means (a * x + b) never overflows uint64
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def article_text(article: Dict) -> str:
+    """Text that identifies a story: its title and description"""
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """Hashed word n-grams of a text (single words for very short texts)"""
+    words = re.findall(r"\w+", text.casefold())
+    if len(words) >= size:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    else:
+        grams = set(words) or {""}
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) & _MERSENNE_PRIME for gram in grams),
+        dtype=np.uint64,
+        count=len(grams)
+    )
+
+
+class StoryClusterer:
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        """
+        Group near-duplicate articles into story clusters with MinHash/LSH.
+
+        Articles are added one at a time, so a clusterer can be kept alive
+        and fed as new articles arrive. Memory is one signature of
+        ``num_perm`` integers per article plus the LSH buckets.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity of title and
+                description shingles for two articles to share a story
+            num_perm: Number of MinHash permutations
+            bands: LSH bands; num_perm must divide evenly into them. More
+                bands find lower-similarity candidates at the cost of more
+                comparisons
+            shingle_size: Words per shingle
+            seed: Seed of the hash permutations, for reproducible clusters
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._parent: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text"""
+        hashed = shingles(text, self.shingle_size)
+        permuted = (self._a[:, None] * hashed[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _find(self, index: int) -> int:
+        root = index
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[index] != root:
+            self._parent[index], index = root, self._parent[index]
+        return root
+
+    def _union(self, first: int, second: int):
+        # The lowest index (the first article seen) stays the representative
+        first_root, second_root = self._find(first), self._find(second)
+        if first_root != second_root:
+            low, high = sorted((first_root, second_root))
+            self._parent[high] = low
+
+    def add(self, article: Dict) -> int:
+        """
+        Add an article and return the index of its cluster representative.
+
+        Indexes count articles in the order they were added, from 0.
+        """
+        index = len(self._signatures)
+        signature = self.signature(article_text(article))
+        self._signatures.append(signature)
+        self._parent.append(index)
+
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            members = buckets.setdefault(key, [])
+            candidates.update(members)
+            members.append(index)
+
+        for candidate in candidates:
+            if self._find(candidate) == self._find(index):
+                continue
+            similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+            if similarity >= self.threshold:
+                self._union(candidate, index)
+
+        return self._find(index)
+
+    def add_all(self, articles: Iterable[Dict]) -> List[int]:
+        """
+        Add several articles and return their representatives' indexes.
+
+        The representatives are looked up after the last article is added,
+        so they reflect merges made by later articles.
+        """
+        first = len(self._signatures)
+        for article in articles:
+            self.add(article)
+        return [self._find(index) for index in range(first, len(self._signatures))]
+
+    def representative(self, index: int) -> int:
+        """Index of the representative of the cluster an article belongs to"""
+        return self._find(index)
+
+    def clusters(self) -> List[List[int]]:
+        """Clusters as lists of article indexes, each starting with its representative"""
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(self._parent)):
+            groups.setdefault(self._find(index), []).append(index)
+        return list(groups.values())
+
+
+def cluster_articles(articles: List[Dict], **clusterer_options) -> List[List[int]]:
+    """
+    Group near-duplicate articles into story clusters.
+
+    Returns:
+        Lists of indexes into ``articles``; the first index of each list is
+        the cluster's representative (its earliest article)
+    """
+    clusterer = StoryClusterer(**clusterer_options)
+    clusterer.add_all(articles)
+    return clusterer.clusters()
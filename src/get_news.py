@@ -1,12 +1,22 @@
 import requests
+import asyncio
+import importlib.util
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 import json
 import os
-from typing import List, Dict, Optional, Any
-from pytrends.request import TrendReq
-import matplotlib.pyplot as plt
+from typing import List, Dict, Optional, Any, Set
 from pathlib import Path
 
+from src.ingestion_state import EMPTY_TITLE_HASH, IngestionState, normalize_url, published_at, title_hash
+from src.jsonl_stream import JsonlWriter
+from src.news_fetcher import NEWS_API_URL, AsyncNewsFetcher, last_days_params, process_article
+from src.trend_charts import TrendChartRenderer
+from src.trends import TrendsEngine, frame_to_dict
+
+# File suffix of the JSONL output per compression
+JSONL_SUFFIXES = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
 class MarketAnalyzer:
     def __init__(self, api_key: str):
         """
@@ -16,68 +26,184 @@ class MarketAnalyzer:
             api_key: News API key
         """
         self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2/everything"
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+        self.base_url = NEWS_API_URL
+        self.session = requests.Session()
+        self.trends = TrendsEngine(hl='en-US', tz=360)
+        self._chart_renderer = None
+        # Queries the last concurrent fetch did not read to the end
+        self.incomplete_queries: Set[str] = set()
+    
+    @property
+    def pytrends(self):
+        """TrendReq client, created on first use"""
+        return self.trends.pytrends
         
-    def fetch_last_7_days_news(self, keywords: Optional[List[str]] = None) -> List[Dict]:
+    def fetch_last_7_days_news(self, keywords: Optional[List[str]] = None, since: Optional[str] = None) -> List[Dict]:
         """
         Fetch news from the last 7 days.
         
         Args:
             keywords: Optional list of keywords to filter news
+            since: Optional publishedAt timestamp; only newer articles are requested
             
         Returns:
             List of news articles
         """
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=7)
-        
-        params = {
-            'apiKey': self.api_key,
-            'from': start_date.strftime('%Y-%m-%d'),
-            'to': end_date.strftime('%Y-%m-%d'),
-            'language': 'en',
-            'sortBy': 'publishedAt'
-        }
-        
-        if keywords:
-            params['q'] = ' OR '.join(keywords)
+        params = {'apiKey': self.api_key, **last_days_params(keywords, since=since)}
         
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self.session.get(self.base_url, params=params, timeout=30)
             response.raise_for_status()
             return response.json()['articles']
         except requests.RequestException as e:
             print(f"Error fetching news: {e}")
             return []
     
+    async def fetch_news_concurrently(
+        self,
+        keyword_queries: Dict[str, List[str]],
+        since: Optional[Dict[str, str]] = None,
+        until: Optional[Dict[str, str]] = None,
+        **fetcher_options
+    ) -> Dict[str, List[Dict]]:
+        """
+        Fetch news from the last 7 days for several queries at once.
+        
+        Queries cut off by max_pages, the result limit or an error are
+        left in incomplete_queries.
+        
+        Args:
+            keyword_queries: Query name -> keywords
+            since: Optional query name -> publishedAt high-water mark
+            until: Optional query name -> resume point of a query cut off earlier
+            **fetcher_options: AsyncNewsFetcher options (max_pages, page_size, ...)
+            
+        Returns:
+            Query name -> list of news articles (all pages up to max_pages)
+        """
+        since = since or {}
+        until = until or {}
+        queries = {
+            name: last_days_params(keywords, since=since.get(name), until=until.get(name))
+            for name, keywords in keyword_queries.items()
+        }
+        async with AsyncNewsFetcher(self.api_key, self.base_url, **fetcher_options) as fetcher:
+            articles = await fetcher.fetch_all(queries)
+            self.incomplete_queries = set(fetcher.incomplete)
+        return articles
+    
+    async def stream_news_to_jsonl(
+        self,
+        keyword_queries: Dict[str, List[str]],
+        output_dir: Path,
+        suffix: str = '.jsonl',
+        compression: Optional[str] = None,
+        state: Optional[IngestionState] = None,
+        **fetcher_options
+    ) -> int:
+        """
+        Fetch news for several queries at once, writing each page as it arrives.
+        
+        Every query gets its own JSONL file, renamed into place as soon as
+        that query finishes, so downstream steps can start on it while the
+        other queries are still being fetched. all_news is renamed into
+        place once every query has finished; on error no file is left
+        half written.
+        
+        Args:
+            keyword_queries: Query name -> keywords
+            output_dir: Directory for <query name><suffix> and all_news<suffix>
+            suffix: File suffix, e.g. '.jsonl.gz'
+            compression: 'gzip', 'zstd' or None
+            state: Optional ingestion state; each page is then requested
+                from the high-water marks, filtered against the seen-set and
+                articles already written by this run, and a query's articles
+                are marked seen once its file is in place
+            **fetcher_options: AsyncNewsFetcher options (max_pages, page_size, ...)
+            
+        Returns:
+            Number of articles written
+        """
+        since = state.watermarks() if state else {}
+        until = state.resume_points() if state else {}
+        queries = {
+            name: last_days_params(keywords, since=since.get(name), until=until.get(name))
+            for name, keywords in keyword_queries.items()
+        }
+        writers: Dict[str, JsonlWriter] = {}
+        fetched_counts = {name: 0 for name in queries}
+        oldest: Dict[str, str] = {}
+        # Identity of the articles written per query, marked seen when it finishes
+        written: Dict[str, List[Dict]] = {name: [] for name in queries}
+        written_keys: Set[str] = set()
+        total = 0
+        
+        with JsonlWriter(output_dir / f'all_news{suffix}', compression) as all_writer:
+            try:
+                async with AsyncNewsFetcher(self.api_key, self.base_url, **fetcher_options) as fetcher:
+                    async for name, page in fetcher.stream_pages(queries):
+                        if page is None:
+                            writer = writers.pop(name, None)
+                            if writer:
+                                writer.close()
+                            if state:
+                                print(f"{name}: {len(written[name])} new of {fetched_counts[name]} fetched")
+                                state.mark_seen(name, written.pop(name))
+                                state.finish_query(name, complete=name not in fetcher.incomplete,
+                                                   oldest_fetched=oldest.get(name))
+                            continue
+                        
+                        fetched_counts[name] += len(page)
+                        page_oldest = min(filter(None, map(published_at, page)), default=None)
+                        if page_oldest and (name not in oldest or page_oldest < oldest[name]):
+                            oldest[name] = page_oldest
+                        
+                        articles = self.process_articles(page)
+                        if state:
+                            articles = _new_in_run(state.filter_new(articles), written_keys)
+                            written[name].extend(
+                                {'url': a['url'], 'title': a['title'], 'published_at': a['published_at']}
+                                for a in articles
+                            )
+                        if name not in writers:
+                            writers[name] = JsonlWriter(output_dir / f"{name}{suffix}", compression)
+                        writers[name].write_many(articles)
+                        all_writer.write_many(articles)
+                        total += len(articles)
+                    self.incomplete_queries = set(fetcher.incomplete)
+            except BaseException:
+                for writer in writers.values():
+                    writer.abort()
+                raise
+        return total
+    
     def process_articles(self, articles: List[Dict]) -> List[Dict]:
         """
         Process and clean the articles data.
         """
-        processed_articles = []
-        
-        for article in articles:
-            processed_article = {
-                'title': article.get('title', ''),
-                'description': article.get('description', ''),
-                'source': article.get('source', {}).get('name', ''),
-                'published_at': article.get('publishedAt', ''),
-                'url': article.get('url', '')
-            }
-            processed_articles.append(processed_article)
-        
-        return processed_articles
+        return [process_article(article) for article in articles]
 
-    def query_specialized_news(self, query_str: str, continents: str, country_code: str, categories: List[str]) -> Any:
+    def query_specialized_news(
+        self,
+        query_str: str,
+        continents: str,
+        country_code: str,
+        categories: List[str],
+        since: Optional[str] = None
+    ) -> Any:
         """
         Query specialized news using asknews client if available.
         
+        The asknews search is not incremental: it returns the latest
+        articles whatever ``since`` is, and repeats are only dropped by the
+        seen-set. ``since`` applies to the News API fallback.
+        
         Args:
             query_str: Search query
             continents: Geographic region
             country_code: Specific country
             categories: List of categories to search (e.g., ["Business", "Technology"])
+            since: Optional publishedAt high-water mark for the fallback
         """
         try:
             from asknews_news_client import asknews_news_client
@@ -97,9 +223,22 @@ class MarketAnalyzer:
         except ImportError:
             print("asknews_news_client not available, falling back to standard news API")
             keywords = [query_str] + categories
-            return self.fetch_last_7_days_news(keywords)
+            return self.fetch_last_7_days_news(keywords, since=since)
 
-    def get_stock_trends(self, symbols: List[str], timeframe: str = 'today 3-m', geo: str = 'US') -> Dict:
+    @property
+    def chart_renderer(self) -> TrendChartRenderer:
+        """Process-pool chart renderer, created on first use"""
+        if self._chart_renderer is None:
+            self._chart_renderer = TrendChartRenderer(output_dir=str(Path('output') / 'charts'))
+        return self._chart_renderer
+    
+    def get_stock_trends(
+        self,
+        symbols: List[str],
+        timeframe: str = 'today 3-m',
+        geo: str = 'US',
+        render_chart: bool = False
+    ) -> Dict:
         """
         Get Google Trends data for stock symbols.
         
@@ -107,43 +246,52 @@ class MarketAnalyzer:
             symbols: List of stock symbols to analyze
             timeframe: Time range for analysis
             geo: Geographic region
+            render_chart: Also draw output/stock_trends.png; charts are drawn
+                in a worker process and reused while the data is unchanged
             
         Returns:
-            Dictionary containing trends data and chart path
+            Dictionary containing trends data, the trends frame (one column
+            per symbol, normalised across request chunks) and chart path
+            (None unless render_chart)
         """
-        # Build the payload
-        self.pytrends.build_payload(symbols, cat=0, timeframe=timeframe, geo=geo, gprop='')
-        
-        # Get interest over time
-        trends_df = self.pytrends.interest_over_time()
+        # Cached, chunked interest over time for any number of symbols
+        trends_df = self.trends.interest_over_time(symbols, timeframe=timeframe, geo=geo)
         
         # Convert DataFrame to dictionary with date strings as keys
-        trends_data = {}
-        for column in trends_df.columns:
-            if column != 'isPartial':
-                trends_data[column] = {
-                    date.strftime('%Y-%m-%d'): value 
-                    for date, value in trends_df[column].items()
-                }
+        trends_data = frame_to_dict(trends_df)
         
         # Create visualization
-        plt.figure(figsize=(20, 12))
-        trends_df.drop(columns=['isPartial']).plot(title='Google Trends for Stocks')
-        plt.xlabel('Date')
-        plt.ylabel('Interest Over Time')
-        
-        # Save plot
-        output_dir = Path('output')
-        output_dir.mkdir(exist_ok=True)
-        chart_path = output_dir / 'stock_trends.png'
-        plt.savefig(chart_path)
-        plt.close()
+        chart_path = None
+        if render_chart:
+            output_dir = Path('output')
+            output_dir.mkdir(exist_ok=True)
+            chart_path = self.chart_renderer.render(
+                trends_df, output_path=str(output_dir / 'stock_trends.png')
+            )
         
         return {
             'trends_data': trends_data,
-            'chart_path': str(chart_path)
+            'frame': trends_df,
+            'chart_path': chart_path
         }
 
+def _new_in_run(articles: List[Dict], written_keys: Set[str]) -> List[Dict]:
+    """Articles whose URL and title no earlier page of this run wrote; adds theirs to written_keys"""
+    new_articles = []
+    for article in articles:
+        keys = set()
+        url_key = normalize_url(article.get('url', ''))
+        if url_key:
+            keys.add(f"url:{url_key}")
+        hashed = title_hash(article.get('title', ''))
+        if hashed != EMPTY_TITLE_HASH:
+            keys.add(f"title:{hashed}")
+        if keys & written_keys:
+            continue
+        written_keys.update(keys)
+        new_articles.append(article)
+    return new_articles
+
 def load_env():
     """Load environment variables from .env file"""
     try:
@@ -158,7 +306,101 @@ def load_env():
         return False
     return True
 
-def main():
+def fetch_and_save_news(
+    analyzer: MarketAnalyzer,
+    news_queries: List[Dict],
+    output_dir: Path,
+    jsonl: bool = False,
+    compression: Optional[str] = None,
+    state: Optional[IngestionState] = None
+) -> int:
+    """
+    Fetch every query, then write the category files and all_news.
+    
+    Used for JSON output and for the asknews client, whose searches
+    return whole result lists. Returns the number of articles written.
+    """
+    since = state.watermarks() if state else {}
+    suffix = JSONL_SUFFIXES.get(compression, '.jsonl')
+    
+    # Fetch specialized news for each category. Without the asknews client
+    # every query goes to the News API, so fetch them all concurrently
+    if importlib.util.find_spec('asknews_news_client') is None:
+        print("\nFetching " + ", ".join(q['description'] for q in news_queries) + " concurrently...")
+        fetched = asyncio.run(analyzer.fetch_news_concurrently({
+            query_info['description']: [query_info['query']] + query_info['categories']
+            for query_info in news_queries
+        }, since=since, until=state.resume_points() if state else None))
+        incomplete = analyzer.incomplete_queries
+    else:
+        fetched = {}
+        for query_info in news_queries:
+            print(f"\nFetching {query_info['description']}...")
+            fetched[query_info['description']] = analyzer.query_specialized_news(
+                query_str=query_info['query'],
+                continents='North America',  # Can be customized
+                country_code='US',          # Can be customized
+                categories=query_info['categories'],
+                since=since.get(query_info['description'])
+            )
+        # These searches return a single page, so none is known to be complete
+        incomplete = set(fetched)
+    
+    retrieved = 0
+    all_articles = []
+    # The combined file is only renamed into place if every query is written
+    all_news = JsonlWriter(output_dir / f'all_news{suffix}', compression) if jsonl else nullcontext()
+    with all_news as all_writer:
+        for query_info in news_queries:
+            articles = fetched.pop(query_info['description'], None)
+        
+            if articles:
+                processed_articles = analyzer.process_articles(articles)
+                if state:
+                    processed_articles = state.filter_new(processed_articles)
+                    print(f"{query_info['description']}: {len(processed_articles)} new of {len(articles)} fetched")
+            
+                # Save category-specific news
+                if all_writer:
+                    with JsonlWriter(output_dir / f"{query_info['description']}{suffix}", compression) as writer:
+                        writer.write_many(processed_articles)
+                    all_writer.write_many(processed_articles)
+                else:
+                    all_articles.extend(processed_articles)
+                    with open(output_dir / f"{query_info['description']}.json", 'w') as f:
+                        json.dump(processed_articles, f, indent=2)
+                retrieved += len(processed_articles)
+            
+                if state:
+                    state.mark_seen(query_info['description'], processed_articles)
+                    state.finish_query(
+                        query_info['description'],
+                        complete=query_info['description'] not in incomplete,
+                        oldest_fetched=min(filter(None, map(published_at, articles)), default=None)
+                    )
+    
+    # Save combined news to file
+    if not jsonl:
+        with open(output_dir / 'all_news.json', 'w') as f:
+            json.dump(all_articles, f, indent=2)
+    
+    return retrieved
+
+def main(incremental: bool = False, jsonl: bool = False, compression: Optional[str] = None):
+    """
+    Fetch news and stock trends into the output directory.
+    
+    Args:
+        incremental: Only request articles newer than each query's last run
+            and write only articles not seen before (by normalised URL or
+            title), so downstream steps never reprocess the same article
+        jsonl: Stream articles to newline-delimited JSON files instead of
+            building every list in memory. Queries are fetched concurrently
+            and each page is written as it arrives; a category file is
+            renamed into place when its query finishes, so downstream steps
+            can start on it while the rest are still being fetched
+        compression: 'gzip' or 'zstd' compression for the JSONL files
+    """
     # Load environment variables
     load_env()
     
@@ -193,33 +435,27 @@ def main():
     output_dir = Path('output')
     output_dir.mkdir(exist_ok=True)
     
-    # Fetch specialized news for each category
-    all_articles = []
-    for query_info in news_queries:
-        print(f"\nFetching {query_info['description']}...")
-        articles = analyzer.query_specialized_news(
-            query_str=query_info['query'],
-            continents='North America',  # Can be customized
-            country_code='US',          # Can be customized
-            categories=query_info['categories']
-        )
-        
-        if articles:
-            processed_articles = analyzer.process_articles(articles)
-            all_articles.extend(processed_articles)
-            
-            # Save category-specific news
-            with open(output_dir / f"{query_info['description']}.json", 'w') as f:
-                json.dump(processed_articles, f, indent=2)
-    
-    # Save combined news to file
-    with open(output_dir / 'all_news.json', 'w') as f:
-        json.dump(all_articles, f, indent=2)
+    state = IngestionState(str(output_dir / 'ingestion_state.db')) if incremental else None
+    try:
+        if jsonl and importlib.util.find_spec('asknews_news_client') is None:
+            # Every query goes to the News API: write each page as it arrives
+            print("\nStreaming " + ", ".join(q['description'] for q in news_queries) + " concurrently...")
+            suffix = JSONL_SUFFIXES.get(compression, '.jsonl')
+            retrieved = asyncio.run(analyzer.stream_news_to_jsonl({
+                query_info['description']: [query_info['query']] + query_info['categories']
+                for query_info in news_queries
+            }, output_dir, suffix, compression, state=state))
+        else:
+            retrieved = fetch_and_save_news(analyzer, news_queries, output_dir, jsonl, compression, state)
+    finally:
+        if state:
+            state.close()
     
     # Analyze stock trends
     STOCKS = ["AMZN", "MSFT", "NVDA", "AAPL", "GOOG"]
     print("Analyzing stock trends...")
-    stock_trends = analyzer.get_stock_trends(STOCKS)
+    stock_trends = analyzer.get_stock_trends(STOCKS, render_chart=True)
+    analyzer.chart_renderer.close()
     
     # Save stock trends data
     with open(output_dir / 'stock_trends.json', 'w') as f:
@@ -227,9 +463,19 @@ def main():
     
     # Print summary
     print(f"\nAnalysis Complete!")
-    print(f"Retrieved {len(processed_articles)} news articles")
+    print(f"Retrieved {retrieved} news articles")
     print(f"Stock trends chart saved to: {stock_trends['chart_path']}")
     print(f"All data saved to the 'output' directory")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Fetch market news and stock trends")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only fetch and write articles not ingested by a previous run")
+    parser.add_argument('--jsonl', action='store_true',
+                        help="stream articles to newline-delimited JSON files")
+    parser.add_argument('--compression', choices=['gzip', 'zstd'],
+                        help="compress the JSONL files")
+    args = parser.parse_args()
+    main(incremental=args.incremental, jsonl=args.jsonl, compression=args.compression)
\ No newline at end of file
@@ -0,0 +1,224 @@
+import hashlib
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.db_pool import ConnectionPool
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid", "ocid", "smid"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL for duplicate detection.
+
+    Lower-cases the scheme and host, drops ``www.``, fragments, tracking
+    parameters (utm_* and friends) and trailing slashes, and sorts the
+    remaining query parameters.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower(),
+                       host, path, query, ""))
+
+
+def title_hash(title: str) -> str:
+    """Hash of a title with case, punctuation and spacing differences removed"""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", (title or "").casefold()).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+# Hash shared by every article without a usable title; never matched on
+EMPTY_TITLE_HASH = title_hash("")
+
+
+def published_at(article: Dict) -> Optional[str]:
+    """publishedAt of a raw or processed article"""
+    return article.get("published_at") or article.get("publishedAt")
+
+
+class IngestionState:
+    def __init__(self, db_path: str = "ingestion_state.db"):
+        """
+        Persistent per-query high-water marks and a seen-set of articles.
+
+        A query's high-water mark only moves once the query has been read
+        to its last result. When a fetch is cut off (NewsAPI returns the
+        newest articles first), the oldest article fetched is kept as the
+        query's resume point, and the next fetch asks for the articles
+        between the high-water mark and that point.
+
+        Args:
+            db_path: Path to the SQLite file holding the state
+        """
+        self.db_path = db_path
+        self._pool = ConnectionPool(db_path, size=1)
+
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS QueryWatermark (
+                    query_name TEXT PRIMARY KEY,
+                    last_published_at TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS SeenArticle (
+                    url_key TEXT PRIMARY KEY,
+                    title_hash TEXT NOT NULL,
+                    query_name TEXT,
+                    published_at TEXT,
+                    first_seen_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seen_article_title
+                ON SeenArticle(title_hash)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seen_article_query
+                ON SeenArticle(query_name, published_at)
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(QueryWatermark)")}
+            if "resume_before" not in columns:
+                conn.execute("ALTER TABLE QueryWatermark ADD COLUMN resume_before TEXT")
+
+    def watermark(self, query_name: str) -> Optional[str]:
+        """Latest publishedAt already ingested for a query, if any"""
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT last_published_at FROM QueryWatermark WHERE query_name = ?",
+                (query_name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def watermarks(self) -> Dict[str, str]:
+        """High-water marks of every query"""
+        with self._pool.connection() as conn:
+            return dict(conn.execute(
+                "SELECT query_name, last_published_at FROM QueryWatermark WHERE last_published_at <> ''"
+            ).fetchall())
+
+    def resume_points(self) -> Dict[str, str]:
+        """
+        Oldest publishedAt fetched by each query that was cut off.
+
+        Pass it as ``until`` (with the high-water mark as ``since``) so the
+        next fetch covers the articles that were not reached.
+        """
+        with self._pool.connection() as conn:
+            return dict(conn.execute(
+                "SELECT query_name, resume_before FROM QueryWatermark WHERE resume_before IS NOT NULL"
+            ).fetchall())
+
+    def filter_new(self, articles: Iterable[Dict]) -> List[Dict]:
+        """
+        Articles whose normalised URL and title hash have not been seen,
+        either in earlier runs or earlier in ``articles``. Articles without
+        a title are matched on their URL only.
+        """
+        candidates = []
+        for article in articles:
+            candidates.append((normalize_url(article.get("url", "")), title_hash(article.get("title", "")), article))
+        if not candidates:
+            return []
+
+        with self._pool.connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS IncomingArticle (url_key TEXT, title_hash TEXT)")
+            conn.execute("DELETE FROM IncomingArticle")
+            conn.executemany(
+                "INSERT INTO IncomingArticle (url_key, title_hash) VALUES (?, ?)",
+                [(url_key, hashed) for url_key, hashed, _ in candidates]
+            )
+            seen_urls = {row[0] for row in conn.execute("""
+                SELECT i.url_key FROM IncomingArticle i
+                JOIN SeenArticle s ON s.url_key = i.url_key
+            """)}
+            seen_titles = {row[0] for row in conn.execute("""
+                SELECT i.title_hash FROM IncomingArticle i
+                JOIN SeenArticle s ON s.title_hash = i.title_hash
+                WHERE i.title_hash <> ?
+            """, (EMPTY_TITLE_HASH,))}
+            conn.execute("DELETE FROM IncomingArticle")
+
+        new_articles = []
+        for url_key, hashed, article in candidates:
+            if (url_key and url_key in seen_urls) or hashed in seen_titles:
+                continue
+            if url_key:
+                seen_urls.add(url_key)
+            if hashed != EMPTY_TITLE_HASH:
+                seen_titles.add(hashed)
+            new_articles.append(article)
+        return new_articles
+
+    def mark_seen(self, query_name: str, articles: Iterable[Dict]):
+        """
+        Record articles as ingested.
+
+        Call this once the articles have been handed downstream, so a failed
+        run fetches them again. The high-water mark is moved separately by
+        finish_query, once it is known whether the query was read in full.
+        """
+        now = time.time()
+        rows = []
+        for article in articles:
+            url_key = normalize_url(article.get("url", "")) or f"title:{title_hash(article.get('title', ''))}"
+            rows.append((url_key, title_hash(article.get("title", "")), query_name, published_at(article), now))
+
+        with self._pool.connection() as conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO SeenArticle
+                    (url_key, title_hash, query_name, published_at, first_seen_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+
+    def finish_query(self, query_name: str, complete: bool, oldest_fetched: Optional[str] = None):
+        """
+        Update a query's high-water mark after a fetch.
+
+        Args:
+            query_name: Query that was fetched
+            complete: Whether the query was read to its last result. Only
+                then does the high-water mark advance, to the newest article
+                recorded for the query, and any resume point is cleared
+            oldest_fetched: Oldest publishedAt among the fetched articles
+                (seen or not); for an incomplete fetch it becomes the resume
+                point, so the articles between it and the high-water mark
+                are requested next time
+        """
+        now = time.time()
+        with self._pool.connection() as conn:
+            if complete:
+                conn.execute("""
+                    INSERT INTO QueryWatermark (query_name, last_published_at, updated_at, resume_before)
+                    SELECT ?, COALESCE(MAX(published_at), ''), ?, NULL
+                    FROM SeenArticle WHERE query_name = ?
+                    ON CONFLICT(query_name) DO UPDATE SET
+                        last_published_at = MAX(last_published_at, excluded.last_published_at),
+                        resume_before = NULL,
+                        updated_at = excluded.updated_at
+                """, (query_name, now, query_name))
+            elif oldest_fetched:
+                conn.execute("""
+                    INSERT INTO QueryWatermark (query_name, last_published_at, updated_at, resume_before)
+                    VALUES (?, '', ?, ?)
+                    ON CONFLICT(query_name) DO UPDATE SET
+                        resume_before = MIN(COALESCE(resume_before, excluded.resume_before), excluded.resume_before),
+                        updated_at = excluded.updated_at
+                """, (query_name, now, oldest_fetched))
+
+    def close(self):
+        """Release the state database connection"""
+        self._pool.close()
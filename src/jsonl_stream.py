@@ -0,0 +1,120 @@
+import gzip
+import io
+import json
+import os
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def infer_compression(path: str) -> Optional[str]:
+    """Compression implied by a file suffix: 'gzip', 'zstd' or None"""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(str(path))[1].lower())
+
+
+def _open_binary(path: str, mode: str, compression: Optional[str]):
+    """Open a file for binary reading or writing through the given compression"""
+    if compression is None:
+        return open(path, mode + "b")
+    if compression == "gzip":
+        return gzip.open(path, mode + "b", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is required for .zst files. Install it with: pip install zstandard")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class JsonlWriter:
+    def __init__(self, path: str, compression: Optional[str] = "infer"):
+        """
+        Write records as newline-delimited JSON, one record at a time.
+
+        Records go to a temporary file next to ``path`` that is renamed into
+        place when the writer is closed without error, so readers never see
+        a partially written file. Use as a context manager.
+
+        Args:
+            path: Final file path
+            compression: 'gzip', 'zstd', None, or 'infer' to pick from the
+                suffix (.gz / .zst)
+        """
+        self.path = str(path)
+        self.compression = infer_compression(self.path) if compression == "infer" else compression
+        self.tmp_path = f"{self.path}.tmp"
+        self.count = 0
+        self._file = io.TextIOWrapper(
+            _open_binary(self.tmp_path, "w", self.compression), encoding="utf-8", newline="\n"
+        )
+
+    def write(self, record: Dict):
+        """Append one record; values JSON cannot encode (e.g. datetimes) are written as strings"""
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write("\n")
+        self.count += 1
+
+    def write_many(self, records: Iterable[Dict]) -> int:
+        """Append records and return how many were written"""
+        before = self.count
+        for record in records:
+            self.write(record)
+        return self.count - before
+
+    def close(self):
+        """Finish the file and atomically move it into place"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Discard everything written so far"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self.tmp_path)
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_jsonl(path: str, records: Iterable[Dict], compression: Optional[str] = "infer") -> int:
+    """Stream records to a JSONL file atomically and return how many were written"""
+    with JsonlWriter(path, compression) as writer:
+        return writer.write_many(records)
+
+
+def read_jsonl(path: str, compression: Optional[str] = "infer") -> Iterator[Dict]:
+    """Yield the records of a JSONL file one at a time, skipping blank lines"""
+    compression = infer_compression(path) if compression == "infer" else compression
+    with io.TextIOWrapper(_open_binary(str(path), "r", compression), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_batches(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group a stream of records into lists of at most ``size`` records"""
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,483 @@
+import argparse
+import sqlite3
+import time
+from typing import Dict
+
+from src.db_pool import get_pool
+
+# Above this many pending change-log rows a full rebuild is cheaper than
+# resolving every change to its (event, contract) groups
+MAX_INCREMENTAL_CHANGES = 50000
+
+# Stored results of views/vw_kpi_event_impact.sql, the per-(event, contract,
+# KPI) core of views/vw_recent_event_kpi_impact.sql and
+# views/vw_kpi_resilience_metrics.sql, plus the log of source changes
+# still to be applied to them
+TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS KPIEventImpact (
+        event_id INTEGER NOT NULL,
+        event_title VARCHAR(200),
+        event_type VARCHAR(50),
+        event_category VARCHAR(50),
+        severity_name VARCHAR(50),
+        occurrence_date TIMESTAMP,
+        contract_id INTEGER NOT NULL,
+        contract_number VARCHAR(50),
+        kpi_id INTEGER NOT NULL,
+        kpi_name VARCHAR(100),
+        kpi_category VARCHAR(50),
+        target_threshold DECIMAL(10,2),
+        pre_event_avg DECIMAL(15,2),
+        immediate_impact_avg DECIMAL(15,2),
+        recovery_period_avg DECIMAL(15,2),
+        below_threshold_count INTEGER,
+        total_measurements INTEGER,
+        PRIMARY KEY (event_id, contract_id, kpi_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_kpi_event_impact_kpi ON KPIEventImpact(kpi_id)",
+    """
+    CREATE TABLE IF NOT EXISTS EventKPIPerformance (
+        event_id INTEGER NOT NULL,
+        event_title VARCHAR(200),
+        occurrence_date TIMESTAMP,
+        contract_id INTEGER NOT NULL,
+        contract_number VARCHAR(50),
+        kpi_id INTEGER NOT NULL,
+        kpi_name VARCHAR(100),
+        pre_event_performance DECIMAL(15,2),
+        post_event_performance DECIMAL(15,2),
+        PRIMARY KEY (event_id, contract_id, kpi_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_event_kpi_performance_date ON EventKPIPerformance(occurrence_date)",
+    """
+    CREATE TABLE IF NOT EXISTS KPIResilienceMetrics (
+        kpi_id INTEGER PRIMARY KEY,
+        kpi_name VARCHAR(100),
+        kpi_category VARCHAR(50),
+        total_events_affecting INTEGER,
+        avg_immediate_impact DECIMAL(15,2),
+        avg_recovery_impact DECIMAL(15,2),
+        avg_recovery_rate DECIMAL(15,2),
+        threshold_breach_rate DECIMAL(5,2),
+        resilience_score DECIMAL(15,2)
+    )
+    """,
+    # event_id 0 means "every contract of the contract's events in range of
+    # measure_date"; contract_id 0 means "every contract of the event".
+    # Sentinels instead of NULL let the UNIQUE constraint collapse repeats.
+    """
+    CREATE TABLE IF NOT EXISTS KPIImpactChangeLog (
+        change_id INTEGER PRIMARY KEY,
+        event_id INTEGER NOT NULL DEFAULT 0,
+        contract_id INTEGER NOT NULL DEFAULT 0,
+        measure_date DATE NOT NULL DEFAULT '',
+        UNIQUE (event_id, contract_id, measure_date)
+    )
+    """,
+    # vw_recent_event_kpi_impact, read from the stored per-KPI performance
+    """
+    CREATE VIEW IF NOT EXISTS vw_recent_event_kpi_impact_materialized AS
+    WITH EventKPIs AS (
+        SELECT * FROM EventKPIPerformance
+        WHERE occurrence_date >= DATE('now', '-7 days')
+    ),
+    MetaKPIBaseline AS (
+        SELECT
+            ek.event_id,
+            ek.contract_id,
+            mkd.meta_kpi_name,
+            SUM(ek.pre_event_performance * mkc.weight) as baseline_meta_kpi_value,
+            SUM(ek.post_event_performance * mkc.weight) as final_meta_kpi_value
+        FROM EventKPIs ek
+        JOIN MetaKPIComponent mkc ON ek.kpi_id = mkc.kpi_id
+        JOIN MetaKPIDefinition mkd ON mkc.meta_kpi_id = mkd.meta_kpi_id
+        GROUP BY ek.event_id, ek.contract_id, mkd.meta_kpi_id, mkd.meta_kpi_name
+    )
+    SELECT
+        ek.event_id,
+        ek.event_title,
+        ek.contract_id,
+        ek.contract_number,
+        mkd.meta_kpi_name,
+        ek.kpi_name as component_kpi,
+        mkc.weight as kpi_weight,
+        ek.pre_event_performance as kpi_baseline,
+        ek.post_event_performance as kpi_final_value,
+        (ek.post_event_performance - ek.pre_event_performance) as kpi_absolute_change,
+        CASE
+            WHEN ek.pre_event_performance > 0
+            THEN ((ek.post_event_performance - ek.pre_event_performance) / ek.pre_event_performance * 100)
+            ELSE NULL
+        END as kpi_percentage_change,
+        mb.baseline_meta_kpi_value as meta_kpi_baseline,
+        mb.final_meta_kpi_value as meta_kpi_final_value,
+        (mb.final_meta_kpi_value - mb.baseline_meta_kpi_value) as meta_kpi_absolute_change,
+        CASE
+            WHEN mb.baseline_meta_kpi_value > 0
+            THEN ((mb.final_meta_kpi_value - mb.baseline_meta_kpi_value) / mb.baseline_meta_kpi_value * 100)
+            ELSE NULL
+        END as meta_kpi_percentage_change
+    FROM EventKPIs ek
+    JOIN MetaKPIComponent mkc ON ek.kpi_id = mkc.kpi_id
+    JOIN MetaKPIDefinition mkd ON mkc.meta_kpi_id = mkd.meta_kpi_id
+    JOIN MetaKPIBaseline mb ON
+        ek.event_id = mb.event_id
+        AND ek.contract_id = mb.contract_id
+        AND mkd.meta_kpi_name = mb.meta_kpi_name
+    """,
+]
+
+# Every source change that can alter a stored group is logged. Changes to
+# reference tables (KPI, event type and category names) need a full rebuild.
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_assessment_insert
+    AFTER INSERT ON EventImpactAssessment
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id, contract_id) VALUES (NEW.event_id, NEW.contract_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_assessment_update
+    AFTER UPDATE OF event_id, contract_id ON EventImpactAssessment
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id, contract_id) VALUES (OLD.event_id, OLD.contract_id);
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id, contract_id) VALUES (NEW.event_id, NEW.contract_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_assessment_delete
+    AFTER DELETE ON EventImpactAssessment
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id, contract_id) VALUES (OLD.event_id, OLD.contract_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_event_update
+    AFTER UPDATE OF event_title, occurrence_date, type_id, severity_id, status_id ON Event
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id) VALUES (NEW.event_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_event_delete
+    AFTER DELETE ON Event
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (event_id) VALUES (OLD.event_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_measurement_insert
+    AFTER INSERT ON ContractKPIMeasurement
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (contract_id, measure_date) VALUES (NEW.contract_id, NEW.measure_date);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_measurement_update
+    AFTER UPDATE OF contract_id, kpi_id, measure_date, actual_value ON ContractKPIMeasurement
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (contract_id, measure_date) VALUES (OLD.contract_id, OLD.measure_date);
+        INSERT OR IGNORE INTO KPIImpactChangeLog (contract_id, measure_date) VALUES (NEW.contract_id, NEW.measure_date);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kpi_impact_measurement_delete
+    AFTER DELETE ON ContractKPIMeasurement
+    BEGIN
+        INSERT OR IGNORE INTO KPIImpactChangeLog (contract_id, measure_date) VALUES (OLD.contract_id, OLD.measure_date);
+    END
+    """,
+]
+
+# Body of vw_kpi_event_impact. {source} is the FROM clause up to Event e and
+# {pair_filter} restricts the assessment join to the groups being refreshed.
+KPI_EVENT_IMPACT_SELECT = """
+    SELECT
+        e.event_id,
+        e.event_title,
+        et.type_name,
+        ec.category_name,
+        es.severity_name,
+        e.occurrence_date,
+        eia.contract_id,
+        ch.contract_number,
+        kd.kpi_id,
+        kd.kpi_name,
+        kc.category_name,
+        kd.target_threshold,
+        AVG(CASE
+            WHEN ckm.measure_date BETWEEN DATE(e.occurrence_date, '-3 months')
+                AND DATE(e.occurrence_date, '-1 day')
+            THEN ckm.actual_value
+        END),
+        AVG(CASE
+            WHEN ckm.measure_date BETWEEN DATE(e.occurrence_date)
+                AND DATE(e.occurrence_date, '+1 month')
+            THEN ckm.actual_value
+        END),
+        AVG(CASE
+            WHEN ckm.measure_date BETWEEN DATE(e.occurrence_date, '+1 month')
+                AND DATE(e.occurrence_date, '+3 months')
+            THEN ckm.actual_value
+        END),
+        COUNT(CASE
+            WHEN ckm.measure_date >= e.occurrence_date
+                AND ckm.actual_value < kd.target_threshold
+            THEN 1
+        END),
+        COUNT(CASE
+            WHEN ckm.measure_date >= e.occurrence_date
+            THEN 1
+        END)
+    FROM {source}
+    JOIN EventType et ON e.type_id = et.type_id
+    JOIN EventCategory ec ON et.category_id = ec.category_id
+    JOIN EventSeverity es ON e.severity_id = es.severity_id
+    JOIN EventImpactAssessment eia ON e.event_id = eia.event_id {pair_filter}
+    JOIN ContractHeader ch ON eia.contract_id = ch.contract_id
+    JOIN ContractKPIMeasurement ckm ON ch.contract_id = ckm.contract_id
+    JOIN KPIDefinition kd ON ckm.kpi_id = kd.kpi_id
+    JOIN KPICategory kc ON kd.category_id = kc.category_id
+    WHERE ckm.measure_date BETWEEN
+        DATE(e.occurrence_date, '-3 months')
+        AND DATE(e.occurrence_date, '+3 months')
+    GROUP BY
+        e.event_id, e.event_title, et.type_name, ec.category_name,
+        es.severity_name, e.occurrence_date, eia.contract_id,
+        ch.contract_number, kd.kpi_id, kd.kpi_name,
+        kc.category_name, kd.target_threshold
+"""
+
+# EventKPIs CTE of vw_recent_event_kpi_impact over all events; the 7-day
+# recency filter is applied when reading
+EVENT_KPI_PERFORMANCE_SELECT = """
+    SELECT
+        e.event_id,
+        e.event_title,
+        e.occurrence_date,
+        eia.contract_id,
+        ch.contract_number,
+        ckm.kpi_id,
+        kd.kpi_name,
+        AVG(CASE
+            WHEN ckm.measure_date < e.occurrence_date
+            THEN ckm.actual_value
+        END),
+        AVG(CASE
+            WHEN ckm.measure_date >= e.occurrence_date
+            THEN ckm.actual_value
+        END)
+    FROM {source}
+    JOIN EventType et ON e.type_id = et.type_id
+    JOIN EventCategory ec ON et.category_id = ec.category_id
+    JOIN EventSeverity es ON e.severity_id = es.severity_id
+    JOIN EventStatus est ON e.status_id = est.status_id
+    JOIN EventImpactAssessment eia ON e.event_id = eia.event_id {pair_filter}
+    JOIN ContractHeader ch ON eia.contract_id = ch.contract_id
+    JOIN ContractKPIMeasurement ckm ON eia.contract_id = ckm.contract_id
+    JOIN KPIDefinition kd ON ckm.kpi_id = kd.kpi_id
+    WHERE ckm.measure_date BETWEEN
+        DATE(e.occurrence_date, '-3 months')
+        AND DATE(e.occurrence_date, '+3 months')
+    GROUP BY
+        e.event_id, e.event_title, e.occurrence_date,
+        eia.contract_id, ch.contract_number,
+        ckm.kpi_id, kd.kpi_name
+"""
+
+# Body of vw_kpi_resilience_metrics over the stored impact rows
+KPI_RESILIENCE_SELECT = """
+    SELECT
+        kpi_id,
+        kpi_name,
+        kpi_category,
+        COUNT(DISTINCT event_id),
+        ROUND(AVG(immediate_impact_avg - pre_event_avg), 2),
+        ROUND(AVG(recovery_period_avg - pre_event_avg), 2),
+        ROUND(AVG(CASE
+            WHEN immediate_impact_avg < pre_event_avg
+            THEN (recovery_period_avg - immediate_impact_avg) / ABS(immediate_impact_avg - pre_event_avg)
+            ELSE NULL
+        END) * 100, 2),
+        ROUND(AVG(CAST(below_threshold_count AS FLOAT) /
+            NULLIF(total_measurements, 0) * 100), 2),
+        ROUND(
+            (1 - AVG(CAST(below_threshold_count AS FLOAT) / NULLIF(total_measurements, 0))) *
+            (1 + AVG(CASE
+                WHEN immediate_impact_avg < pre_event_avg
+                THEN (recovery_period_avg - immediate_impact_avg) / ABS(immediate_impact_avg - pre_event_avg)
+                ELSE 1
+            END)) * 100, 2)
+    FROM KPIEventImpact
+    {kpi_filter}
+    GROUP BY kpi_id, kpi_name, kpi_category
+"""
+
+_FULL = {"source": "Event e", "pair_filter": ""}
+_DIRTY = {
+    "source": "temp.KPIImpactDirty dp JOIN Event e ON e.event_id = dp.event_id",
+    "pair_filter": "AND eia.contract_id = dp.contract_id",
+}
+
+
+def create_kpi_impact_tables(cursor):
+    """Create the materialised KPI impact tables, change log and reader view"""
+    for sql in TABLES_SQL:
+        cursor.execute(sql)
+
+
+def create_kpi_impact_triggers(cursor):
+    """Create the triggers that log source changes for incremental refresh"""
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+
+
+def _insert_groups(cursor, params: Dict[str, str]):
+    cursor.execute("INSERT INTO KPIEventImpact " + KPI_EVENT_IMPACT_SELECT.format(**params))
+    cursor.execute("INSERT INTO EventKPIPerformance " + EVENT_KPI_PERFORMANCE_SELECT.format(**params))
+
+
+def rebuild_kpi_impact(cursor):
+    """Recompute every stored row from scratch and clear the change log"""
+    cursor.execute("DELETE FROM KPIEventImpact")
+    cursor.execute("DELETE FROM EventKPIPerformance")
+    cursor.execute("DELETE FROM KPIResilienceMetrics")
+    _insert_groups(cursor, _FULL)
+    cursor.execute("INSERT INTO KPIResilienceMetrics " + KPI_RESILIENCE_SELECT.format(kpi_filter=""))
+    cursor.execute("DELETE FROM KPIImpactChangeLog")
+
+
+def _refresh_changes(cursor, last_change_id: int):
+    """Recompute only the (event, contract) groups named by logged changes"""
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS KPIImpactDirty (
+            event_id INTEGER, contract_id INTEGER, PRIMARY KEY (event_id, contract_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS KPIImpactDirtyKPI (kpi_id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.KPIImpactDirty")
+    cursor.execute("DELETE FROM temp.KPIImpactDirtyKPI")
+
+    # Assessment changes name their group directly
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.KPIImpactDirty (event_id, contract_id)
+        SELECT event_id, contract_id FROM KPIImpactChangeLog
+        WHERE change_id <= ? AND event_id != 0 AND contract_id != 0
+    """, (last_change_id,))
+    # Event changes touch every contract assessed for the event, including
+    # groups stored for assessments that no longer exist
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.KPIImpactDirty (event_id, contract_id)
+        SELECT eia.event_id, eia.contract_id
+        FROM KPIImpactChangeLog l
+        JOIN EventImpactAssessment eia ON eia.event_id = l.event_id
+        WHERE l.change_id <= ? AND l.contract_id = 0
+        UNION
+        SELECT k.event_id, k.contract_id
+        FROM KPIImpactChangeLog l
+        JOIN KPIEventImpact k ON k.event_id = l.event_id
+        WHERE l.change_id <= ? AND l.contract_id = 0
+        UNION
+        SELECT p.event_id, p.contract_id
+        FROM KPIImpactChangeLog l
+        JOIN EventKPIPerformance p ON p.event_id = l.event_id
+        WHERE l.change_id <= ? AND l.contract_id = 0
+    """, (last_change_id, last_change_id, last_change_id))
+    # Measurement changes touch the contract's events whose +/-3 month
+    # window contains the measurement
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.KPIImpactDirty (event_id, contract_id)
+        SELECT eia.event_id, eia.contract_id
+        FROM KPIImpactChangeLog l
+        JOIN EventImpactAssessment eia ON eia.contract_id = l.contract_id
+        JOIN Event e ON e.event_id = eia.event_id
+        WHERE l.change_id <= ? AND l.event_id = 0
+        AND l.measure_date BETWEEN DATE(e.occurrence_date, '-3 months') AND DATE(e.occurrence_date, '+3 months')
+    """, (last_change_id,))
+
+    dirty_groups = "(event_id, contract_id) IN (SELECT event_id, contract_id FROM temp.KPIImpactDirty)"
+    cursor.execute(f"INSERT OR IGNORE INTO temp.KPIImpactDirtyKPI SELECT DISTINCT kpi_id FROM KPIEventImpact WHERE {dirty_groups}")
+    cursor.execute(f"DELETE FROM KPIEventImpact WHERE {dirty_groups}")
+    cursor.execute(f"DELETE FROM EventKPIPerformance WHERE {dirty_groups}")
+    _insert_groups(cursor, _DIRTY)
+    cursor.execute(f"INSERT OR IGNORE INTO temp.KPIImpactDirtyKPI SELECT DISTINCT kpi_id FROM KPIEventImpact WHERE {dirty_groups}")
+
+    kpi_filter = "WHERE kpi_id IN (SELECT kpi_id FROM temp.KPIImpactDirtyKPI)"
+    cursor.execute(f"DELETE FROM KPIResilienceMetrics {kpi_filter}")
+    cursor.execute("INSERT INTO KPIResilienceMetrics " + KPI_RESILIENCE_SELECT.format(kpi_filter=kpi_filter))
+    cursor.execute("DELETE FROM KPIImpactChangeLog WHERE change_id <= ?", (last_change_id,))
+
+    cursor.execute("SELECT COUNT(*) FROM temp.KPIImpactDirty")
+    return cursor.fetchone()[0]
+
+
+def refresh_kpi_impact(conn: sqlite3.Connection, full: bool = False) -> Dict:
+    """
+    Bring the materialised KPI impact tables up to date and commit.
+
+    Only groups named by the change log are recomputed, unless full is set,
+    the stored tables are empty or more than MAX_INCREMENTAL_CHANGES changes
+    are pending, in which case everything is rebuilt.
+
+    Returns:
+        Dict with the refresh mode, groups recomputed and seconds taken
+    """
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    cursor.execute("SELECT COUNT(*), COALESCE(MAX(change_id), 0) FROM KPIImpactChangeLog")
+    pending, last_change_id = cursor.fetchone()
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM KPIEventImpact)")
+    populated = cursor.fetchone()[0]
+
+    try:
+        if full or not populated or pending > MAX_INCREMENTAL_CHANGES:
+            rebuild_kpi_impact(cursor)
+            mode = "full"
+            cursor.execute("SELECT COUNT(*) FROM (SELECT DISTINCT event_id, contract_id FROM KPIEventImpact)")
+            groups = cursor.fetchone()[0]
+        elif pending:
+            mode = "incremental"
+            groups = _refresh_changes(cursor, last_change_id)
+        else:
+            mode, groups = "none", 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    seconds = time.perf_counter() - start
+    print(f"KPI impact refresh ({mode}): {groups} event/contract groups from {pending} changes in {seconds:.2f}s")
+    return {"mode": mode, "groups": groups, "changes": pending, "seconds": seconds}
+
+
+def install_kpi_impact(conn: sqlite3.Connection) -> Dict:
+    """Add the materialised tables and triggers to an existing database and fill them"""
+    cursor = conn.cursor()
+    create_kpi_impact_tables(cursor)
+    create_kpi_impact_triggers(cursor)
+    conn.commit()
+    return refresh_kpi_impact(conn, full=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the materialised KPI event impact tables")
+    parser.add_argument("--db", default="contract_management.db", help="SQLite database path")
+    parser.add_argument("--full", action="store_true", help="Rebuild every row instead of applying logged changes")
+    parser.add_argument("--install", action="store_true", help="Create the tables and triggers in an existing database first")
+    args = parser.parse_args()
+
+    pool = get_pool(args.db, size=1)
+    with pool.connection() as conn:
+        if args.install:
+            install_kpi_impact(conn)
+        else:
+            refresh_kpi_impact(conn, full=args.full)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
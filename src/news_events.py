@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime
+from typing import Iterable, List
+
+from src.bulk_insert import stream_executemany
+from src.reference_data import ReferenceData
+
+INSERT_EVENT_SQL = """
+    INSERT INTO Event (
+        type_id, severity_id, status_id, event_title,
+        description, occurrence_date, detection_date, resolution_date,
+        region_id, business_unit_id, source_reference, created_by
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _timestamp_text(value) -> str:
+    """'YYYY-MM-DD HH:MM:SS' of a publication date given as a datetime or an ISO string"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def insert_news_events(cursor, classified_news_df, reference=None, chunk_size=1000) -> List[str]:
+    """
+    Insert classified news events into the database.
+    
+    classified_news_df may be a DataFrame or any iterable of row dicts, such
+    as src.jsonl_stream.read_jsonl(...) over classify_news output; rows are
+    inserted chunk by chunk as they are read.
+    
+    Returns:
+        The source reference of each inserted event, in input order
+    """
+    
+    # Map classification names to reference IDs in memory
+    reference = reference or ReferenceData.load(cursor)
+    type_mapping = reference.type_ids
+    severity_mapping = reference.severity_ids
+    status_mapping = reference.status_ids
+    region_mapping = reference.region_ids
+    unit_mapping = reference.unit_ids
+    
+    # Get a default user for created_by
+    cursor.execute("SELECT user_id FROM User WHERE is_active = 1 LIMIT 1")
+    default_user_id = cursor.fetchone()[0]
+    
+    # DataFrames are accepted without importing pandas here
+    if hasattr(classified_news_df, 'iterrows'):
+        rows: Iterable = (row for _, row in classified_news_df.iterrows())
+    else:
+        rows = classified_news_df
+    
+    source_refs = []
+    
+    def event_rows():
+        for row in rows:
+            # Use publication date as occurrence date; for news events,
+            # detection is the same as publication
+            occurrence_date = _timestamp_text(row['published_at'])
+            
+            source_ref = f"NEWS-{str(uuid.uuid4())[:8]}"
+            source_refs.append(source_ref)
+            
+            yield (
+                type_mapping.get(row['event_type']),
+                severity_mapping.get(row['severity']),
+                status_mapping.get(row['status']),
+                row['event_title'],
+                row['description'],
+                occurrence_date,
+                occurrence_date,
+                None,  # resolution_date
+                region_mapping.get(row['geographic_region']),
+                unit_mapping.get(row['business_unit']),
+                source_ref,
+                default_user_id
+            )
+    
+    stream_executemany(cursor, INSERT_EVENT_SQL, event_rows(), chunk_size=chunk_size, label="news events")
+    return source_refs
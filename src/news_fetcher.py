@@ -0,0 +1,242 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# NewsAPI answers 426 once a plan's result limit is reached; that is the end
+# of the available pages rather than an error
+RESULT_LIMIT_STATUS = 426
+
+
+def last_days_params(
+    keywords: Optional[List[str]] = None,
+    days: int = 7,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict:
+    """
+    NewsAPI query parameters for English articles from the last few days.
+
+    ``since`` (an ISO publishedAt timestamp) narrows the window to articles
+    published from that moment on, for incremental ingestion. ``until``
+    ends the window early, to resume a query that was cut off last time.
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    params = {
+        'from': max(since, start_date.strftime('%Y-%m-%d')) if since else start_date.strftime('%Y-%m-%d'),
+        'to': until or end_date.strftime('%Y-%m-%d'),
+        'language': 'en',
+        'sortBy': 'publishedAt'
+    }
+    if keywords:
+        params['q'] = ' OR '.join(keywords)
+    return params
+
+
+def process_article(article: Dict) -> Dict:
+    """Keep the fields of a raw NewsAPI article used downstream"""
+    return {
+        'title': article.get('title', ''),
+        'description': article.get('description', ''),
+        'source': article.get('source', {}).get('name', ''),
+        'published_at': article.get('publishedAt', ''),
+        'url': article.get('url', '')
+    }
+
+
+class NewsFetchError(Exception):
+    """Raised when a page still fails after every retry"""
+
+
+class AsyncNewsFetcher:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = NEWS_API_URL,
+        page_size: int = 100,
+        max_pages: int = 5,
+        max_concurrency: int = 4,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        """
+        Fetch NewsAPI results for several queries concurrently.
+
+        Use as an async context manager so that all requests share one
+        keep-alive connection pool. After a fetch, ``incomplete`` holds the
+        names of queries that were not read to their last result (cut off
+        by max_pages or the plan's result limit, or failed).
+
+        Args:
+            api_key: News API key
+            base_url: Endpoint of the NewsAPI ``everything`` search
+            page_size: Articles requested per page (NewsAPI allows up to 100)
+            max_pages: Maximum pages fetched per query
+            max_concurrency: Maximum concurrent requests (and pooled connections)
+            timeout: Total seconds allowed for one request
+            max_retries: Retries for timeouts, dropped connections, 429 and 5xx
+            base_delay: Base of the exponential backoff in seconds
+            max_delay: Upper bound of a single backoff in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.incomplete: Set[str] = set()
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self) -> "AsyncNewsFetcher":
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncNewsFetcher. Install it with: pip install aiohttp")
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'X-Api-Key': self.api_key},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        try:
+            return min(self.max_delay, float(retry_after))
+        except (TypeError, ValueError):
+            return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def fetch_page(self, params: Dict, page: int) -> Optional[Dict]:
+        """
+        Fetch one page of results, retrying transient failures.
+
+        Returns:
+            Decoded JSON response, or None once the result limit is reached
+        """
+        request_params = {**params, 'page': page, 'pageSize': self.page_size}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    async with self._session.get(self.base_url, params=request_params) as response:
+                        if response.status == RESULT_LIMIT_STATUS:
+                            return None
+                        if response.status == 429 or response.status >= 500:
+                            retry_after = response.headers.get('Retry-After')
+                            error = NewsFetchError(f"HTTP {response.status} for page {page}")
+                        else:
+                            response.raise_for_status()
+                            return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            except aiohttp.ClientResponseError as e:
+                raise NewsFetchError(f"HTTP {e.status} for page {page}: {e.message}") from e
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise NewsFetchError(f"Giving up on page {page} after {self.max_retries + 1} attempts: {error}")
+
+    async def iter_pages(self, params: Dict, name: Optional[str] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the articles of one query a page at a time, up to max_pages.
+
+        If results remain when max_pages or the result limit is reached,
+        ``name`` is added to ``incomplete``.
+        """
+        for page in range(1, self.max_pages + 1):
+            data = await self.fetch_page(params, page)
+            if not data:
+                break
+            articles = data.get('articles') or []
+            if articles:
+                yield articles
+            if len(articles) < self.page_size or page * self.page_size >= data.get('totalResults', 0):
+                return
+        if name is not None:
+            self.incomplete.add(name)
+
+    async def iter_query(self, params: Dict, name: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield the articles of one query, fetched page by page as in iter_pages"""
+        async for articles in self.iter_pages(params, name):
+            for article in articles:
+                yield article
+
+    async def stream_pages(self, queries: Dict[str, Dict]) -> AsyncIterator[Tuple[str, Optional[List[Dict]]]]:
+        """
+        Run several queries concurrently, yielding each page as it arrives.
+
+        Args:
+            queries: Query name -> NewsAPI parameters
+
+        Yields:
+            (query name, raw articles of one page) pairs, then (query name,
+            None) once that query is finished; ``incomplete`` is up to date
+            for the query by then. A query that fails is reported, added to
+            ``incomplete`` and finished without stopping the others
+        """
+        results = asyncio.Queue()
+        self.incomplete.difference_update(queries)
+
+        async def run_query(name: str, params: Dict):
+            try:
+                async for articles in self.iter_pages(params, name):
+                    await results.put((name, articles))
+            except NewsFetchError as e:
+                print(f"Error fetching news for {name}: {e}")
+                self.incomplete.add(name)
+            finally:
+                await results.put((name, None))
+
+        tasks = [asyncio.ensure_future(run_query(name, params)) for name, params in queries.items()]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                name, articles = await results.get()
+                if articles is None:
+                    remaining -= 1
+                yield name, articles
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stream(self, queries: Dict[str, Dict]) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Run several queries concurrently, yielding articles as pages arrive.
+
+        Args:
+            queries: Query name -> NewsAPI parameters
+
+        Yields:
+            (query name, raw article) pairs; a query that fails is reported,
+            added to ``incomplete`` and skipped without stopping the others
+        """
+        async for name, articles in self.stream_pages(queries):
+            for article in articles or ():
+                yield name, article
+
+    async def fetch_all(self, queries: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+        """Run several queries concurrently and collect the articles per query"""
+        articles = {name: [] for name in queries}
+        async for name, article in self.stream(queries):
+            articles[name].append(article)
+        return articles
@@ -0,0 +1,518 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.classification_cache import ClassificationCache
+from src.classification_scheduler import ClassificationScheduler
+from src.db_pool import get_pool
+from src.dedup import StoryClusterer
+from src.ingestion_state import IngestionState, normalize_url, published_at, title_hash
+from src.news_events import insert_news_events
+from src.news_fetcher import AsyncNewsFetcher, last_days_params, process_article
+from src.reference_data import get_reference_cache
+from src.step1_event_detection import Event, EventProcessor, EventSource
+
+# Same searches as get_news.main: query name -> keywords
+DEFAULT_QUERIES = {
+    'financial_news': ['market analysis financial trends', 'Business', 'Finance'],
+    'tech_news': ['technology innovation AI software', 'Technology', 'Science'],
+    'geopolitical_news': ['international relations conflict trade', 'Politics', 'World'],
+}
+
+# Checkpoint stages, in pipeline order. Items finish as 'processed',
+# 'duplicate' (another article of the same story was used) or 'failed'.
+STAGE_FETCHED = 'fetched'
+STAGE_CLASSIFIED = 'classified'
+STAGE_INSERTED = 'inserted'
+STAGE_PROCESSED = 'processed'
+STAGE_DUPLICATE = 'duplicate'
+STAGE_FAILED = 'failed'
+
+# Articles are compared for duplicate stories against those published in
+# the last week, the range each fetch covers
+DEDUP_WINDOW_SECONDS = 7 * 24 * 3600
+
+# Attempts at classifying an article that raises outside the LLM call
+# (cache or checkpoint errors) before it is marked failed
+CLASSIFY_ATTEMPTS = 3
+
+
+def _article_key(article: Dict) -> str:
+    """Checkpoint key of an article: its normalised URL, or its title hash"""
+    return normalize_url(article.get('url', '')) or f"title:{title_hash(article.get('title', ''))}"
+
+
+def _timestamp(seconds_ago: float = 0.0) -> str:
+    """UTC time in the publishedAt format NewsAPI uses"""
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class PipelineCheckpoint:
+    def __init__(self, db_path: str):
+        """
+        Per-article progress through the pipeline, stored in the contract
+        database so an Event insert and its checkpoint commit together.
+
+        Args:
+            db_path: Path to the contract management database
+        """
+        self.pool = get_pool(db_path)
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS PipelineItem (
+                    item_key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    article TEXT NOT NULL,
+                    classification TEXT,
+                    source_reference TEXT,
+                    result TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_item_stage ON PipelineItem(stage)")
+
+    def add(self, key: str, article: Dict) -> bool:
+        """Record a fetched article; False if it was already checkpointed"""
+        with self.pool.connection() as conn:
+            return conn.execute("""
+                INSERT OR IGNORE INTO PipelineItem (item_key, stage, article, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, STAGE_FETCHED, json.dumps(article), time.time())).rowcount == 1
+
+    def advance(self, key: str, stage: str, conn=None, **fields):
+        """Move an item to a stage, updating classification/source_reference/result"""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = f"""
+            UPDATE PipelineItem
+            SET stage = ?, updated_at = ?{", " + assignments if assignments else ""}
+            WHERE item_key = ?
+        """
+        params = [stage, time.time(), *fields.values(), key]
+        if conn is not None:
+            conn.execute(query, params)
+            return
+        with self.pool.connection() as conn:
+            conn.execute(query, params)
+
+    def pending(self, stage: str) -> List[Dict]:
+        """Items left at a stage by an earlier run, oldest first"""
+        with self.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT item_key, article, classification, source_reference
+                FROM PipelineItem
+                WHERE stage = ?
+                ORDER BY updated_at
+            """, (stage,)).fetchall()
+        return [
+            {
+                'key': row['item_key'],
+                'article': json.loads(row['article']),
+                'row': json.loads(row['classification']) if row['classification'] else None,
+                'source_reference': row['source_reference'],
+            }
+            for row in rows
+        ]
+
+    def recent(self, published_since: str) -> List[Dict]:
+        """
+        Story representatives past deduplication whose article was published
+        since a timestamp, in the order they were added.
+
+        Duplicates are left out: their representative may still be at
+        'fetched' and is deduplicated again on resume, where it must not
+        match its own copies.
+        """
+        with self.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT item_key, article
+                FROM PipelineItem
+                WHERE stage NOT IN (?, ?) AND json_extract(article, '$.published_at') >= ?
+                ORDER BY rowid
+            """, (STAGE_FETCHED, STAGE_DUPLICATE, published_since)).fetchall()
+        return [{'key': row['item_key'], 'article': json.loads(row['article'])} for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items per stage"""
+        with self.pool.connection() as conn:
+            return dict(conn.execute("SELECT stage, COUNT(*) FROM PipelineItem GROUP BY stage").fetchall())
+
+
+class NewsPipeline:
+    def __init__(
+        self,
+        db_path: str,
+        api_key: str,
+        queries: Optional[Dict[str, List[str]]] = None,
+        state_path: str = 'ingestion_state.db',
+        cache: Optional[ClassificationCache] = None,
+        llm=None,
+        model_name: Optional[str] = None,
+        queue_size: int = 100,
+        classify_workers: int = 8,
+        batch_size: int = 50,
+        dedup_window: float = DEDUP_WINDOW_SECONDS,
+        fetcher_options: Optional[Dict] = None,
+        scheduler_options: Optional[Dict] = None,
+    ):
+        """
+        Long-running fetch -> dedup -> classify -> insert -> process service.
+
+        Stages are connected by bounded asyncio queues, so a slow stage
+        applies backpressure to the ones before it. Every article's stage
+        is checkpointed; after a crash, run() resumes each article from
+        the last stage it completed, and the stories of the dedup window
+        are rebuilt from the checkpointed articles.
+
+        Args:
+            db_path: Path to the contract management database
+            api_key: News API key
+            queries: Query name -> keywords; defaults to DEFAULT_QUERIES
+            state_path: Path to the ingestion high-water mark / seen-set file
+            cache: Optional classification cache
+            llm: Structured-output LLM; defaults to classify_news.get_llm()
+            model_name: Model used for classification and cache keys
+            queue_size: Capacity of each queue between stages
+            classify_workers: Concurrent classification calls
+            batch_size: Maximum articles inserted / processed per transaction
+            dedup_window: Seconds of published articles new articles are
+                compared against for duplicate stories
+            fetcher_options: AsyncNewsFetcher options (base_url, max_pages, ...)
+            scheduler_options: ClassificationScheduler options (rate limits, retries)
+        """
+        from src import classify_news
+
+        self.db_path = db_path
+        self.api_key = api_key
+        self.queries = queries or DEFAULT_QUERIES
+        self.cache = cache
+        self.model_name = model_name or classify_news.DEFAULT_MODEL
+        self.llm = llm or classify_news.get_llm(self.model_name)
+        self.queue_size = queue_size
+        self.classify_workers = classify_workers
+        self.batch_size = batch_size
+        self.fetcher_options = fetcher_options or {}
+
+        self.checkpoint = PipelineCheckpoint(db_path)
+        self.state = IngestionState(state_path)
+        self.reference = get_reference_cache(db_path)
+        self.processor = EventProcessor(db_path, pool=self.checkpoint.pool, reference=self.reference)
+        self.scheduler = ClassificationScheduler(
+            lambda article: classify_news.classify_event_async(article, self.llm),
+            **(scheduler_options or {})
+        )
+        self.dedup_window = dedup_window
+        self.clusterer = StoryClusterer()
+        # (published_at, checkpoint key, article) per clusterer index
+        self._stories: List[Tuple[str, str, Dict]] = []
+        self._next_prune = 0.0
+
+    async def _take_batch(self, queue: asyncio.Queue) -> List:
+        """Wait for one item, then take whatever else is ready up to batch_size"""
+        batch = [await queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def fetch(self, new_items: asyncio.Queue):
+        """
+        Fetch articles newer than each query's high-water mark and queue the unseen ones.
+
+        A query cut off last time is resumed below its oldest fetched
+        article; high-water marks only advance for queries read in full.
+        """
+        since = await asyncio.to_thread(self.state.watermarks)
+        until = await asyncio.to_thread(self.state.resume_points)
+        queries = {
+            name: last_days_params(keywords, since=since.get(name), until=until.get(name))
+            for name, keywords in self.queries.items()
+        }
+        fetched = 0
+        oldest: Dict[str, str] = {}
+        async with AsyncNewsFetcher(self.api_key, **self.fetcher_options) as fetcher:
+            async for name, raw_article in fetcher.stream(queries):
+                article_published_at = published_at(raw_article)
+                if article_published_at and (name not in oldest or article_published_at < oldest[name]):
+                    oldest[name] = article_published_at
+                article = process_article(raw_article)
+                new = await asyncio.to_thread(self.state.filter_new, [article])
+                if not new:
+                    continue
+                key = _article_key(article)
+                if await asyncio.to_thread(self.checkpoint.add, key, article):
+                    await new_items.put({'key': key, 'article': article})
+                    fetched += 1
+                await asyncio.to_thread(self.state.mark_seen, name, [article])
+        for name in queries:
+            await asyncio.to_thread(
+                self.state.finish_query, name, name not in fetcher.incomplete, oldest.get(name)
+            )
+        print(f"Fetched {fetched} new articles")
+
+    def _rebuild_stories(self, stories: List[Tuple[str, str, Dict]]):
+        """Replace the clusterer with one holding the stories published within the dedup window"""
+        window_start = _timestamp(self.dedup_window)
+        self._stories = [story for story in stories if story[0] >= window_start]
+        clusterer = StoryClusterer()
+        clusterer.add_all(article for _, _, article in self._stories)
+        self.clusterer = clusterer
+        # Checked again after a quarter of the window
+        self._next_prune = time.monotonic() + self.dedup_window / 4
+
+    def _restore_stories(self):
+        """Rebuild the dedup window from articles an earlier run already deduplicated"""
+        items = self.checkpoint.recent(_timestamp(self.dedup_window))
+        self._rebuild_stories([(published_at(item['article']), item['key'], item['article']) for item in items])
+        if self._stories:
+            print(f"Restored {len(self._stories)} recent articles for story deduplication")
+
+    async def deduplicate(self, new_items: asyncio.Queue, to_classify: asyncio.Queue):
+        """
+        Pass on the first article of each story; mark later copies as duplicates.
+
+        Only articles published within the dedup window are kept for
+        comparison, so memory stays bounded on a long-running service.
+        """
+        while True:
+            item = await new_items.get()
+            try:
+                if time.monotonic() >= self._next_prune:
+                    await asyncio.to_thread(self._rebuild_stories, self._stories)
+                representative = self.clusterer.add(item['article'])
+                # Articles without a date are kept for a window from now
+                self._stories.append((published_at(item['article']) or _timestamp(), item['key'], item['article']))
+                if representative != len(self._stories) - 1:
+                    await asyncio.to_thread(
+                        self.checkpoint.advance, item['key'], STAGE_DUPLICATE,
+                        result=json.dumps({'duplicate_of': self._stories[representative][1]})
+                    )
+                else:
+                    await to_classify.put(item)
+            finally:
+                new_items.task_done()
+
+    async def _classify_item(self, item: Dict) -> Optional[Dict]:
+        """Classify and checkpoint one article; its event row, or None if the LLM gave up"""
+        from src import classify_news
+
+        article = item['article']
+        key = classify_news.classification_cache_key(article, self.model_name) if self.cache else None
+        classification = (
+            await asyncio.to_thread(self.cache.get, key, classify_news.EventClassification)
+            if self.cache else None
+        )
+        if classification is None:
+            result = await self.scheduler.classify_one(article)
+            if not result.ok:
+                print(f"Failed to classify {article['title']}: {result.error!r}")
+                await asyncio.to_thread(
+                    self.checkpoint.advance, item['key'], STAGE_FAILED,
+                    result=json.dumps({'error': repr(result.error)})
+                )
+                return None
+            classification = result.classification
+            if self.cache:
+                await asyncio.to_thread(self.cache.put, key, self.model_name, classification)
+
+        row = json.loads(json.dumps(classify_news.classification_row(article, classification), default=str))
+        await asyncio.to_thread(
+            self.checkpoint.advance, item['key'], STAGE_CLASSIFIED, classification=json.dumps(row)
+        )
+        return row
+
+    async def classify(self, to_classify: asyncio.Queue, to_insert: asyncio.Queue):
+        """
+        Classify articles, using the cache when one is configured.
+
+        An article that raises is retried up to CLASSIFY_ATTEMPTS times and
+        then marked failed, so it does not sit at 'fetched' until a restart.
+        """
+        while True:
+            item = await to_classify.get()
+            try:
+                for attempt in range(1, CLASSIFY_ATTEMPTS + 1):
+                    try:
+                        row = await self._classify_item(item)
+                        break
+                    except Exception as e:
+                        print(f"Error classifying {item['article'].get('title')} "
+                              f"(attempt {attempt} of {CLASSIFY_ATTEMPTS}): {e!r}")
+                        error = e
+                        if attempt < CLASSIFY_ATTEMPTS:
+                            await asyncio.sleep(attempt)
+                else:
+                    await asyncio.to_thread(
+                        self.checkpoint.advance, item['key'], STAGE_FAILED,
+                        result=json.dumps({'error': repr(error)})
+                    )
+                    continue
+                if row is not None:
+                    await to_insert.put({**item, 'row': row})
+            except Exception as e:
+                # Left at 'fetched' and retried on restart
+                print(f"Error checkpointing {item['article'].get('title')}: {e!r}")
+            finally:
+                to_classify.task_done()
+
+    def _insert_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Insert Event rows and checkpoint them in one transaction"""
+        reference = self.reference.get()
+        with self.checkpoint.pool.connection() as conn:
+            source_refs = insert_news_events(conn.cursor(), [item['row'] for item in batch], reference)
+            for item, source_ref in zip(batch, source_refs):
+                self.checkpoint.advance(item['key'], STAGE_INSERTED, conn=conn, source_reference=source_ref)
+        return [{**item, 'source_reference': source_ref} for item, source_ref in zip(batch, source_refs)]
+
+    async def insert(self, to_insert: asyncio.Queue, to_process: asyncio.Queue):
+        """Insert classified articles as Event rows in small transactions"""
+        while True:
+            batch = await self._take_batch(to_insert)
+            try:
+                for item in await asyncio.to_thread(self._insert_batch, batch):
+                    await to_process.put(item)
+            except Exception as e:
+                # Items stay checkpointed as classified and are retried on restart
+                print(f"Error inserting {len(batch)} events: {e!r}")
+            finally:
+                for _ in batch:
+                    to_insert.task_done()
+
+    def _process_batch(self, batch: List[Dict]):
+        """Run EventProcessor over newly inserted events and checkpoint the outcome"""
+        reference = self.reference.get()
+        refs = [item['source_reference'] for item in batch]
+        with self.checkpoint.pool.connection() as conn:
+            rows = {
+                row['source_reference']: row
+                for row in conn.execute(f"""
+                    SELECT source_reference, type_id, severity_id, region_id,
+                           business_unit_id, occurrence_date, created_by
+                    FROM Event
+                    WHERE source_reference IN ({", ".join("?" for _ in refs)})
+                """, refs)
+            }
+
+        events = []
+        found = []
+        for item in batch:
+            row = rows.get(item['source_reference'])
+            if row is None:
+                # The Event row was removed after insertion; retrying cannot help
+                self.checkpoint.advance(
+                    item['key'], STAGE_FAILED,
+                    result=json.dumps({'error': f"Event {item['source_reference']} not found"})
+                )
+                continue
+            found.append(item)
+            severity = reference.severities.get(row['severity_id'])
+            events.append(Event(
+                title=item['row']['event_title'],
+                description=item['row']['description'],
+                source_type=EventSource.EXTERNAL,
+                severity_level=severity['severity_name'] if severity else None,
+                event_type_id=row['type_id'],
+                region_id=row['region_id'],
+                business_unit_id=row['business_unit_id'],
+                source_reference=row['source_reference'],
+                created_by=row['created_by'],
+                occurrence_date=row['occurrence_date'],
+            ))
+
+        for item, result in zip(found, self.processor.process_events(events)):
+            summary = {
+                'priority': result.get('priority'),
+                'affected_contracts': len(result.get('affected_contracts') or []),
+                'error': result.get('error'),
+            }
+            stage = STAGE_FAILED if result.get('error') else STAGE_PROCESSED
+            self.checkpoint.advance(item['key'], stage, result=json.dumps(summary, default=str))
+
+    async def process(self, to_process: asyncio.Queue):
+        """Prioritise inserted events and map their affected contracts"""
+        while True:
+            batch = await self._take_batch(to_process)
+            try:
+                await asyncio.to_thread(self._process_batch, batch)
+            except Exception as e:
+                # Items stay checkpointed as inserted and are retried on restart
+                print(f"Error processing {len(batch)} events: {e!r}")
+            finally:
+                for _ in batch:
+                    to_process.task_done()
+
+    async def _resume(self, new_items, to_insert, to_process):
+        """Re-queue articles an earlier run left between stages"""
+        resumed = 0
+        for stage, queue in ((STAGE_INSERTED, to_process), (STAGE_CLASSIFIED, to_insert), (STAGE_FETCHED, new_items)):
+            for item in await asyncio.to_thread(self.checkpoint.pending, stage):
+                await queue.put(item)
+                resumed += 1
+        if resumed:
+            print(f"Resuming {resumed} articles from the last checkpoint")
+
+    async def run(self, poll_interval: float = 300.0, once: bool = False):
+        """
+        Run the pipeline until cancelled, fetching every poll_interval seconds.
+
+        With once, fetch a single time, wait for every queued article to
+        finish all stages and return.
+        """
+        new_items = asyncio.Queue(self.queue_size)
+        to_classify = asyncio.Queue(self.queue_size)
+        to_insert = asyncio.Queue(self.queue_size)
+        to_process = asyncio.Queue(self.queue_size)
+
+        workers = [
+            asyncio.ensure_future(self.deduplicate(new_items, to_classify)),
+            asyncio.ensure_future(self.insert(to_insert, to_process)),
+            asyncio.ensure_future(self.process(to_process)),
+        ] + [
+            asyncio.ensure_future(self.classify(to_classify, to_insert))
+            for _ in range(self.classify_workers)
+        ]
+        try:
+            await asyncio.to_thread(self._restore_stories)
+            await self._resume(new_items, to_insert, to_process)
+            while True:
+                try:
+                    await self.fetch(new_items)
+                except Exception as e:
+                    print(f"Error fetching news: {e!r}")
+                if once:
+                    for queue in (new_items, to_classify, to_insert, to_process):
+                        await queue.join()
+                    return
+                await asyncio.sleep(poll_interval)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            print(f"Pipeline checkpoint: {self.checkpoint.counts()}")
+
+
+def main():
+    import argparse
+    import os
+
+    from src.get_news import load_env
+
+    parser = argparse.ArgumentParser(description="Run the news to Event pipeline service")
+    parser.add_argument('--db', default='contract_management.db', help="contract management database")
+    parser.add_argument('--interval', type=float, default=300.0, help="seconds between news fetches")
+    parser.add_argument('--once', action='store_true', help="fetch once, drain every stage and exit")
+    args = parser.parse_args()
+
+    load_env()
+    api_key = os.getenv('NEWS_API_KEY')
+    if not api_key:
+        raise ValueError("NEWS_API_KEY not found in environment variables. Please add it to your .env file.")
+
+    pipeline = NewsPipeline(args.db, api_key, cache=ClassificationCache())
+    asyncio.run(pipeline.run(poll_interval=args.interval, once=args.once))
+
+if __name__ == "__main__":
+    main()
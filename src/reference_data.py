@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+from src.db_pool import ConnectionPool
+
+
+def _frozen(mapping: Dict) -> Mapping:
+    """Read-only view of a dict, with nested dict values frozen too"""
+    return MappingProxyType({
+        key: MappingProxyType(value) if isinstance(value, dict) else value
+        for key, value in mapping.items()
+    })
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Immutable snapshot of the small event lookup tables"""
+    event_categories: Mapping  # category_id -> category row
+    event_types: Mapping       # type_id -> type row joined with its category
+    severities: Mapping        # severity_id -> severity row
+    statuses: Mapping          # status_id -> status_name
+    regions: Mapping           # region_id -> region row
+    business_units: Mapping    # unit_id -> business unit row
+
+    # Name -> id maps used when importing classified events
+    type_ids: Mapping
+    severity_ids: Mapping
+    status_ids: Mapping
+    region_ids: Mapping
+    unit_ids: Mapping
+
+    @classmethod
+    def load(cls, cursor) -> "ReferenceData":
+        """Read every lookup table through the given cursor"""
+        cursor.execute("""
+            SELECT category_id, category_name, category_type, is_active
+            FROM EventCategory
+        """)
+        categories = {
+            row[0]: {"category_name": row[1], "category_type": row[2], "is_active": bool(row[3])}
+            for row in cursor.fetchall()
+        }
+
+        cursor.execute("""
+            SELECT type_id, type_name, category_id, monitoring_frequency, is_active
+            FROM EventType
+        """)
+        event_types = {}
+        for type_id, type_name, category_id, monitoring_frequency, is_active in cursor.fetchall():
+            category = categories.get(category_id, {})
+            event_types[type_id] = {
+                "type_name": type_name,
+                "category_id": category_id,
+                "monitoring_frequency": monitoring_frequency,
+                "is_active": bool(is_active),
+                "category_name": category.get("category_name"),
+                "category_type": category.get("category_type"),
+            }
+
+        cursor.execute("SELECT severity_id, severity_name, response_sla_hours FROM EventSeverity")
+        severities = {
+            row[0]: {"severity_name": row[1], "response_sla_hours": row[2]}
+            for row in cursor.fetchall()
+        }
+
+        cursor.execute("SELECT status_id, status_name FROM EventStatus")
+        statuses = {row[0]: row[1] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT region_id, region_name, parent_region_id, region_type FROM GeographicRegion")
+        regions = {
+            row[0]: {"region_name": row[1], "parent_region_id": row[2], "region_type": row[3]}
+            for row in cursor.fetchall()
+        }
+
+        cursor.execute("SELECT unit_id, unit_name, parent_unit_id FROM BusinessUnit")
+        business_units = {
+            row[0]: {"unit_name": row[1], "parent_unit_id": row[2]}
+            for row in cursor.fetchall()
+        }
+
+        return cls(
+            event_categories=_frozen(categories),
+            event_types=_frozen(event_types),
+            severities=_frozen(severities),
+            statuses=_frozen(statuses),
+            regions=_frozen(regions),
+            business_units=_frozen(business_units),
+            type_ids=_frozen({v["type_name"]: k for k, v in event_types.items()}),
+            severity_ids=_frozen({v["severity_name"]: k for k, v in severities.items()}),
+            status_ids=_frozen({name: k for k, name in statuses.items()}),
+            region_ids=_frozen({v["region_name"]: k for k, v in regions.items()}),
+            unit_ids=_frozen({v["unit_name"]: k for k, v in business_units.items()}),
+        )
+
+    def is_active_type(self, type_id: int) -> bool:
+        """True if the event type exists and is active"""
+        event_type = self.event_types.get(type_id)
+        return bool(event_type and event_type["is_active"])
+
+    def sla_hours(self, severity_name: str) -> Optional[int]:
+        """Response SLA in hours for a severity name, if known"""
+        severity_id = self.severity_ids.get(severity_name)
+        if severity_id is None:
+            return None
+        return self.severities[severity_id]["response_sla_hours"]
+
+    def type_details(self, type_id: int) -> Dict:
+        """Event type and category details used for classification"""
+        event_type = self.event_types.get(type_id)
+        if not event_type or event_type["category_name"] is None:
+            return {}
+        return {
+            "type_name": event_type["type_name"],
+            "monitoring_frequency": event_type["monitoring_frequency"],
+            "category_name": event_type["category_name"],
+            "category_type": event_type["category_type"],
+        }
+
+
+class ReferenceDataCache:
+    def __init__(self, db_path: str, ttl: float = 300.0, check_interval: float = 1.0):
+        """
+        Keep a ReferenceData snapshot in memory and reload it when stale.
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl: Seconds after which the snapshot is reloaded unconditionally
+            check_interval: Minimum seconds between ``PRAGMA data_version``
+                checks; a changed version means another connection wrote to
+                the database and triggers a reload
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.check_interval = check_interval
+
+        # data_version is only comparable on the same connection, so the
+        # cache keeps a dedicated single-connection pool of its own
+        self._pool = ConnectionPool(db_path, size=1)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def get(self) -> ReferenceData:
+        """Return the current snapshot, reloading it if it may be stale"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if (snapshot is not None
+                and now - self._checked_at < self.check_interval
+                and now - self._loaded_at < self.ttl):
+            return snapshot
+
+        with self._lock:
+            with self._pool.connection() as conn:
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if (self._snapshot is None
+                        or version != self._version
+                        or now - self._loaded_at >= self.ttl):
+                    self._snapshot = ReferenceData.load(conn.cursor())
+                    self._version = version
+                    self._loaded_at = now
+                self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a reload on the next call to get()"""
+        with self._lock:
+            self._snapshot = None
+
+    def close(self):
+        """Release the cache's database connection"""
+        self._pool.close()
+
+
+_caches: Dict[str, ReferenceDataCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_reference_cache(db_path: str, **kwargs) -> ReferenceDataCache:
+    """Return the process-wide reference data cache for a database"""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ReferenceDataCache(db_path, **kwargs)
+            _caches[key] = cache
+        return cache
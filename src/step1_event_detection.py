@@ -1,10 +1,15 @@
-import sqlite3
+import heapq
+from contextlib import AbstractContextManager
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import json
 from dataclasses import dataclass
 from enum import Enum
 
+from src.contract_matching import ContractMatcher, ContractRanker
+from src.db_pool import ConnectionPool, get_pool
+from src.reference_data import ReferenceDataCache, get_reference_cache
+
 class EventSource(Enum):
     EXTERNAL = "external"
     INTERNAL_KPI = "internal_kpi"
@@ -21,66 +26,85 @@ class Event:
     business_unit_id: Optional[int] = None
     source_reference: Optional[str] = None
     created_by: int = 1  # Default user ID
+    occurrence_date: Optional[str] = None  # 'YYYY-MM-DD[ HH:MM:SS]', defaults to today
+    vendor_id: Optional[int] = None
+
+# Response requirements per priority level
+RESPONSE_REQUIREMENTS = {
+    "High": {
+        "max_response_time": "2 hours",
+        "required_approvals": ["Department Head", "Risk Management"],
+        "notification_level": "Immediate"
+    },
+    "Medium": {
+        "max_response_time": "8 hours",
+        "required_approvals": ["Team Lead"],
+        "notification_level": "Standard"
+    },
+    "Low": {
+        "max_response_time": "24 hours",
+        "required_approvals": [],
+        "notification_level": "Routine"
+    }
+}
+
+def _placeholders(values) -> str:
+    """Build a '?, ?, ?' placeholder list for an IN (...) clause"""
+    return ", ".join("?" for _ in values)
 
 class EventProcessor:
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        pool: Optional[ConnectionPool] = None,
+        reference: Optional[ReferenceDataCache] = None,
+        contract_page_size: Optional[int] = None,
+        contract_ranker: Optional[ContractRanker] = None,
+        min_contract_value: Optional[float] = None,
+        max_contract_value: Optional[float] = None
+    ):
         self.db_path = db_path
-
-    def _get_db_connection(self) -> sqlite3.Connection:
-        """Create database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        # Share one long-lived pool per database instead of reconnecting per step
+        self.pool = pool or get_pool(db_path)
+        # Lookup tables are served from memory and reloaded when they change
+        self.reference = reference or get_reference_cache(db_path)
+        self.matcher = ContractMatcher(self.pool, min_value=min_contract_value, max_value=max_contract_value)
+        # Optional cap on contracts returned per event (None returns every
+        # match); capped results carry a cursor for the next page
+        self.contract_page_size = contract_page_size
+        self.contract_ranker = contract_ranker
+
+    def _get_db_connection(self) -> AbstractContextManager:
+        """Borrow a pooled database connection with row factory"""
+        return self.pool.connection()
 
     def validate_event(self, event: Event) -> Tuple[bool, str]:
         """
         Validate incoming event based on business rules
         Returns: (is_valid: bool, validation_message: str)
         """
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
+        reference = self.reference.get()
 
-            # 1. Check if event type exists (if provided)
-            if event.event_type_id:
-                cursor.execute("""
-                    SELECT EXISTS(
-                        SELECT 1 FROM EventType 
-                        WHERE type_id = ? AND is_active = 1
-                    )
-                """, (event.event_type_id,))
-                if not cursor.fetchone()[0]:
-                    return False, "Invalid event type ID"
-
-            # 2. Check if region exists (if provided)
-            if event.region_id:
-                cursor.execute("""
-                    SELECT EXISTS(
-                        SELECT 1 FROM GeographicRegion 
-                        WHERE region_id = ?
-                    )
-                """, (event.region_id,))
-                if not cursor.fetchone()[0]:
-                    return False, "Invalid region ID"
-
-            # 3. Check if business unit exists (if provided)
-            if event.business_unit_id:
-                cursor.execute("""
-                    SELECT EXISTS(
-                        SELECT 1 FROM BusinessUnit 
-                        WHERE unit_id = ?
-                    )
-                """, (event.business_unit_id,))
-                if not cursor.fetchone()[0]:
-                    return False, "Invalid business unit ID"
+        # 1. Check if event type exists (if provided)
+        if event.event_type_id and not reference.is_active_type(event.event_type_id):
+            return False, "Invalid event type ID"
 
-            # 4. Basic validation checks
-            if not event.title or len(event.title.strip()) < 5:
-                return False, "Event title is too short"
-            
-            if not event.description or len(event.description.strip()) < 10:
-                return False, "Event description is too short"
+        # 2. Check if region exists (if provided)
+        if event.region_id and event.region_id not in reference.regions:
+            return False, "Invalid region ID"
+
+        # 3. Check if business unit exists (if provided)
+        if event.business_unit_id and event.business_unit_id not in reference.business_units:
+            return False, "Invalid business unit ID"
+
+        # 4. Basic validation checks
+        if not event.title or len(event.title.strip()) < 5:
+            return False, "Event title is too short"
+        
+        if not event.description or len(event.description.strip()) < 10:
+            return False, "Event description is too short"
 
-            return True, "Event validated successfully"
+        return True, "Event validated successfully"
 
     def determine_event_priority(self, event: Event) -> Dict:
         """
@@ -90,148 +114,155 @@ class EventProcessor:
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
             
-            priority_factors = {
-                "severity_score": 0,
-                "business_impact": 0,
-                "urgency": 0,
-                "scope": 0
-            }
-
             # 1. Severity Assessment
+            sla_hours = None
             if event.severity_level:
-                cursor.execute("""
-                    SELECT response_sla_hours 
-                    FROM EventSeverity 
-                    WHERE severity_name = ?
-                """, (event.severity_level,))
-                sla_hours = cursor.fetchone()
-                if sla_hours:
-                    # Convert SLA hours to priority score (lower SLA = higher priority)
-                    priority_factors["severity_score"] = min(100, int(24 / sla_hours[0] * 100))
+                sla_hours = self.reference.get().sla_hours(event.severity_level)
 
             # 2. Business Impact Assessment
+            high_impact_count = 0
             if event.business_unit_id:
+                # Trigger-maintained counter of high/critical impact assessments
                 cursor.execute("""
-                    SELECT COUNT(*) 
-                   FROM ContractHeader ch
-                    JOIN EventImpactAssessment eia ON ch.contract_id = eia.contract_id
-                    JOIN Event e ON eia.event_id = e.event_id
-                    WHERE e.business_unit_id = ?
-                    AND eia.impact_level IN ('high', 'critical') 
+                    SELECT high_impact_count
+                    FROM BusinessUnitImpactSummary
+                    WHERE business_unit_id = ?
                 """, (event.business_unit_id,))
-                high_impact_count = cursor.fetchone()[0]
-                priority_factors["business_impact"] = min(100, high_impact_count * 10)
+                row = cursor.fetchone()
+                if row:
+                    high_impact_count = row[0]
 
-            # 3. Calculate final priority score (0-100)
-            total_score = sum(priority_factors.values()) / len(priority_factors)
+            return self._score_priority(sla_hours, high_impact_count)
             
-            priority_level = "Low" if total_score < 40 else "Medium" if total_score < 70 else "High"
+    def _score_priority(self, sla_hours: Optional[int], high_impact_count: int) -> Dict:
+        """Turn severity SLA and business impact into priority details"""
+        priority_factors = {
+            "severity_score": 0,
+            "business_impact": 0,
+            "urgency": 0,
+            "scope": 0
+        }
 
-            return {
-                "priority_level": priority_level,
-                "priority_score": total_score,
-                "factors": priority_factors
-            }
+        if sla_hours:
+            # Convert SLA hours to priority score (lower SLA = higher priority)
+            priority_factors["severity_score"] = min(100, int(24 / sla_hours * 100))
 
-    def map_affected_contracts(self, event: Event) -> List[Dict]:
-        """
-        Map event to potentially affected contracts based on various criteria
-        """
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Base query to find potentially affected contracts
-            query = """
-                SELECT DISTINCT 
-                    ch.vendor_id,
-                    ch.contract_number,
-                    c.vendor_name,
-                    ch.total_value,
-                    ch.start_date,
-                    ch.end_date
-                FROM ContractHeader ch
-                JOIN Vendor c ON ch.vendor_id = c.vendor_id
-                WHERE ch.status_id IN (
-                    SELECT status_id 
-                    FROM ContractStatus 
-                    WHERE status_name IN ('Active', 'Under Review')
-                )
-            """
-            
-            params = []
-            conditions = []
+        priority_factors["business_impact"] = min(100, high_impact_count * 10)
 
-            # Add business unit filter if applicable
-            # if event.business_unit_id:
-            #     conditions.append("ch.business_unit_id = ?")
-            #     params.append(event.business_unit_id)
+        # Calculate final priority score (0-100)
+        total_score = sum(priority_factors.values()) / len(priority_factors)
 
-            # # Add region filter if applicable
-            # if event.region_id:
-            #     conditions.append("ch.region_id = ?")
-            #     params.append(event.region_id)
+        priority_level = "Low" if total_score < 40 else "Medium" if total_score < 70 else "High"
+
+        return {
+            "priority_level": priority_level,
+            "priority_score": total_score,
+            "factors": priority_factors
+        }
+
+    def map_affected_contracts(self, event: Event, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Map event to potentially affected contracts based on various criteria
 
-            # # Combine conditions
-            # if conditions:
-            #     query += " AND " + " AND ".join(conditions)
+        Contracts are narrowed by business unit and region (including parent
+        and child units/regions), vendor, the event date and the matcher's
+        value band. Every match is returned unless ``limit`` (default
+        contract_page_size) is set, best first when a contract ranker is
+        configured. Use page_affected_contracts to page through a capped
+        result.
+        """
+        criteria = self.matcher.criteria_for_event(event, self.reference.get())
+        contracts, _ = self._match_contracts(criteria, event, limit or self.contract_page_size)
+        return contracts
+
+    def page_affected_contracts(
+        self,
+        event: Event,
+        limit: int,
+        after_contract_id: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of affected contracts in contract_id order.
 
-            cursor.execute(query, params)
-            affected_contracts = [dict(row) for row in cursor.fetchall()]
+        Returns:
+            (contracts, next_cursor); pass next_cursor back as
+            after_contract_id for the following page, None at the end
+        """
+        criteria = self.matcher.criteria_for_event(event, self.reference.get())
+        return self.matcher.page(criteria, limit, after_contract_id)
+
+    def iter_affected_contracts(self, event: Event) -> Iterator[Dict]:
+        """Stream every contract matching the event in contract_id order"""
+        criteria = self.matcher.criteria_for_event(event, self.reference.get())
+        return self.matcher.iter_matches(criteria)
+
+    def _match_contracts(
+        self,
+        criteria,
+        event: Event,
+        limit: Optional[int]
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Matches for an event and the cursor of the next page.
 
-            return affected_contracts
+        Without a limit every match is returned (ranked if a ranker is set)
+        and the cursor is None. With a limit, a ranker keeps the best
+        ``limit`` matches; otherwise the first page is returned with the
+        cursor to continue from.
+        """
+        if limit is None:
+            contracts = list(self.matcher.iter_matches(criteria))
+            if self.contract_ranker:
+                contracts.sort(key=lambda row: self.contract_ranker(row, event), reverse=True)
+            return contracts, None
+        if self.contract_ranker:
+            return self.matcher.top_matches(criteria, limit, self.contract_ranker, event), None
+        return self.matcher.page(criteria, limit)
+
+    def _select_contracts(
+        self,
+        candidates: List[Dict],
+        event: Event,
+        limit: Optional[int]
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Same result as _match_contracts, from matches already fetched in
+        contract_id order (at least limit + 1 of them without a ranker).
+        """
+        if self.contract_ranker:
+            key = lambda row: self.contract_ranker(row, event)
+            if limit is None:
+                return sorted(candidates, key=key, reverse=True), None
+            return heapq.nlargest(limit, candidates, key=key), None
+        if limit is not None and len(candidates) > limit:
+            return candidates[:limit], candidates[limit - 1]["contract_id"]
+        return list(candidates), None
 
     def classify_event(self, event: Event, priority_details: Dict) -> Dict:
         """
         Classify event based on type, impact, and priority
         """
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
+        # Get event type details if available
+        event_type_info = {}
+        if event.event_type_id:
+            event_type_info = self.reference.get().type_details(event.event_type_id)
 
-            # Get event type details if available
-            event_type_info = {}
-            if event.event_type_id:
-                cursor.execute("""
-                    SELECT 
-                        et.type_name,
-                        et.monitoring_frequency,
-                        ec.category_name,
-                        ec.category_type
-                    FROM EventType et
-                    JOIN EventCategory ec ON et.category_id = ec.category_id
-                    WHERE et.type_id = ?
-                """, (event.event_type_id,))
-                row = cursor.fetchone()
-                if row:
-                    event_type_info = dict(row)
-
-            # Determine response requirements based on priority
-            response_requirements = {
-                "High": {
-                    "max_response_time": "2 hours",
-                    "required_approvals": ["Department Head", "Risk Management"],
-                    "notification_level": "Immediate"
-                },
-                "Medium": {
-                    "max_response_time": "8 hours",
-                    "required_approvals": ["Team Lead"],
-                    "notification_level": "Standard"
-                },
-                "Low": {
-                    "max_response_time": "24 hours",
-                    "required_approvals": [],
-                    "notification_level": "Routine"
-                }
-            }[priority_details["priority_level"]]
-
-            return {
-                "event_type": event_type_info,
-                "priority_level": priority_details["priority_level"],
-                "priority_score": priority_details["priority_score"],
-                "response_requirements": response_requirements,
-                "source_type": event.source_type.value,
-                "detection_time": datetime.now().isoformat(),
-                "classification_confidence": self._calculate_confidence_score(event, priority_details)
-            }
+        return self._build_classification(event, event_type_info, priority_details)
+
+    def _build_classification(self, event: Event, event_type_info: Dict, priority_details: Dict) -> Dict:
+        """Assemble the classification record from already-fetched details"""
+        # Determine response requirements based on priority
+        response_requirements = RESPONSE_REQUIREMENTS[priority_details["priority_level"]]
+
+        return {
+            "event_type": event_type_info,
+            "priority_level": priority_details["priority_level"],
+            "priority_score": priority_details["priority_score"],
+            "response_requirements": response_requirements,
+            "source_type": event.source_type.value,
+            "detection_time": datetime.now().isoformat(),
+            "classification_confidence": self._calculate_confidence_score(event, priority_details)
+        }
 
     def _calculate_confidence_score(self, event: Event, priority_details: Dict) -> float:
         """Calculate confidence score for event classification"""
@@ -244,6 +275,15 @@ class EventProcessor:
         }
         return sum(confidence_factors.values()) * 100
 
+    def _event_details(self, event: Event) -> Dict:
+        """Summary of the incoming event included in every result"""
+        return {
+            "title": event.title,
+            "description": event.description,
+            "source_type": event.source_type.value,
+            "detection_time": datetime.now().isoformat()
+        }
+
     def process_event(self, event: Event) -> Dict:
         """
         Main method to process an incoming event through all steps
@@ -257,28 +297,137 @@ class EventProcessor:
         priority_details = self.determine_event_priority(event)
 
         # Step 3: Map Affected Contracts
-        affected_contracts = self.map_affected_contracts(event)
+        criteria = self.matcher.criteria_for_event(event, self.reference.get())
+        affected_contracts, contracts_cursor = self._match_contracts(criteria, event, self.contract_page_size)
 
         # Step 4: Classify Event
         classification = self.classify_event(event, priority_details)
 
         # Compile and return complete event processing results
         return {
-            "event_details": {
-                "title": event.title,
-                "description": event.description,
-                "source_type": event.source_type.value,
-                "detection_time": datetime.now().isoformat()
-            },
+            "event_details": self._event_details(event),
             "validation": {
                 "is_valid": is_valid,
                 "message": validation_message
             },
             "priority": priority_details,
             "affected_contracts": affected_contracts,
+            # Set when contract_page_size cut the list short; continue with
+            # page_affected_contracts(event, limit, after_contract_id=cursor)
+            "affected_contracts_cursor": contracts_cursor,
             "classification": classification
         }
 
+    def process_events(self, events: Iterable[Event]) -> List[Dict]:
+        """
+        Process a batch of events with one set-based query per step.
+
+        Results are returned in input order. An event that fails validation
+        or processing does not stop the batch; its result carries an
+        ``error`` message and ``validation.is_valid`` is False.
+        """
+        events = list(events)
+        if not events:
+            return []
+
+        # Step 1: Validation and lookups run against the in-memory snapshot
+        reference = self.reference.get()
+        validations = [self.validate_event(event) for event in events]
+
+        # Step 2: Business impact counts for every valid business unit at once
+        unit_ids = {
+            event.business_unit_id
+            for event, (is_valid, _) in zip(events, validations)
+            if is_valid and event.business_unit_id
+        }
+        impact_by_unit = {}
+        if unit_ids:
+            with self._get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT business_unit_id, high_impact_count
+                    FROM BusinessUnitImpactSummary
+                    WHERE business_unit_id IN ({_placeholders(unit_ids)})
+                """, list(unit_ids))
+                impact_by_unit = dict(cursor.fetchall())
+
+        # Step 3: Candidate contracts for every valid event in one query.
+        # Events with identical criteria share candidates; ranking and the
+        # page cut are applied per event, since a ranker may look at any event field
+        criteria_by_event = {}
+        criteria_errors = {}
+        unique_criteria = {}
+        for index, (event, (is_valid, _)) in enumerate(zip(events, validations)):
+            if not is_valid:
+                continue
+            try:
+                criteria = self.matcher.criteria_for_event(event, reference)
+            except Exception as e:
+                # Reported with the event's result below
+                criteria_errors[index] = e
+                continue
+            criteria_by_event[index] = criteria.key()
+            unique_criteria.setdefault(criteria.key(), criteria)
+        limit = self.contract_page_size
+        # Without a ranker one row past the page shows whether more remain
+        fetch_limit = limit + 1 if limit is not None and not self.contract_ranker else None
+        candidates_by_criteria = dict(zip(
+            unique_criteria,
+            self.matcher.match_many(list(unique_criteria.values()), fetch_limit)
+        )) if unique_criteria else {}
+
+        results = []
+        for index, (event, (is_valid, validation_message)) in enumerate(zip(events, validations)):
+            if not is_valid:
+                results.append({
+                    "event_details": self._event_details(event),
+                    "validation": {
+                        "is_valid": False,
+                        "message": validation_message
+                    },
+                    "error": f"Event validation failed: {validation_message}"
+                })
+                continue
+
+            try:
+                priority_details = self._score_priority(
+                    reference.sla_hours(event.severity_level) if event.severity_level else None,
+                    impact_by_unit.get(event.business_unit_id, 0) if event.business_unit_id else 0
+                )
+
+                if index in criteria_errors:
+                    raise criteria_errors[index]
+                affected_contracts, contracts_cursor = self._select_contracts(
+                    candidates_by_criteria[criteria_by_event[index]], event, limit
+                )
+
+                # Step 4: Classify Event
+                event_type_info = reference.type_details(event.event_type_id) if event.event_type_id else {}
+                classification = self._build_classification(event, event_type_info, priority_details)
+
+                results.append({
+                    "event_details": self._event_details(event),
+                    "validation": {
+                        "is_valid": True,
+                        "message": validation_message
+                    },
+                    "priority": priority_details,
+                    "affected_contracts": affected_contracts,
+                    "affected_contracts_cursor": contracts_cursor,
+                    "classification": classification
+                })
+            except Exception as e:
+                results.append({
+                    "event_details": self._event_details(event),
+                    "validation": {
+                        "is_valid": False,
+                        "message": "Event processing failed"
+                    },
+                    "error": str(e)
+                })
+
+        return results
+
 # Example usage:
 def main():
     # Initialize processor
@@ -303,4 +452,4 @@ def main():
         print(f"Error processing event: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+
+def chart_key(frame: pd.DataFrame, title: str, figsize: Tuple[float, float]) -> str:
+    """Hash of everything that affects a chart, so unchanged charts are reused"""
+    digest = hashlib.sha256()
+    digest.update(f"{title}\0{figsize}\0{list(frame.columns)}".encode("utf-8"))
+    digest.update(frame.index.values.astype("datetime64[ns]").tobytes())
+    digest.update(frame.to_numpy(dtype="float64").tobytes())
+    return digest.hexdigest()[:32]
+
+
+def render_chart(frame: pd.DataFrame, path: str, title: str, figsize: Tuple[float, float]) -> str:
+    """
+    Draw a line chart of a trends frame to a PNG file.
+
+    Runs in a worker process; matplotlib is imported here with the
+    non-interactive Agg backend so callers never load it.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=figsize)
+    frame.plot(ax=ax, title=title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Interest Over Time')
+
+    tmp_path = f"{path}.tmp.png"
+    fig.savefig(tmp_path)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+
+class TrendChartRenderer:
+    def __init__(self, output_dir: str = "output/charts", max_workers: int = 2):
+        """
+        Render trend charts in a process pool, reusing charts of unchanged data.
+
+        Args:
+            output_dir: Directory for the PNG files, named by data hash
+            max_workers: Worker processes used for rendering
+        """
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers
+        self._executor = None
+
+    def chart_path(self, frame: pd.DataFrame, title: str, figsize: Tuple[float, float]) -> Path:
+        return self.output_dir / f"trends_{chart_key(frame, title, figsize)}.png"
+
+    def submit(
+        self,
+        frame: pd.DataFrame,
+        title: str = 'Google Trends for Stocks',
+        figsize: Tuple[float, float] = (20, 12),
+    ) -> Future:
+        """
+        Start rendering a chart and return a Future of its path.
+
+        A chart already rendered for identical data is returned immediately
+        without starting a worker.
+        """
+        path = self.chart_path(frame, title, figsize)
+        if path.exists():
+            future = Future()
+            future.set_result(str(path))
+            return future
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor.submit(render_chart, frame, str(path), title, figsize)
+
+    def render(
+        self,
+        frame: pd.DataFrame,
+        title: str = 'Google Trends for Stocks',
+        figsize: Tuple[float, float] = (20, 12),
+        output_path: Optional[str] = None,
+    ) -> str:
+        """
+        Render a chart and wait for it.
+
+        Args:
+            output_path: Optional stable path to copy the cached chart to
+                (e.g. output/stock_trends.png)
+
+        Returns:
+            Path of the chart
+        """
+        path = self.submit(frame, title, figsize).result()
+        if output_path is None:
+            return path
+        tmp_path = f"{output_path}.tmp"
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            dst.write(src.read())
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
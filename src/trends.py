@@ -0,0 +1,248 @@
+import hashlib
+import re
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Google Trends compares at most five terms per request
+MAX_TERMS_PER_REQUEST = 5
+
+# Longest range Google Trends still answers with daily values; longer
+# ranges come back weekly or monthly and cannot be extended day by day
+MAX_DAILY_RANGE_DAYS = 269
+
+# Days re-fetched before the cached end date to rescale newly fetched values
+OVERLAP_DAYS = 7
+
+_RELATIVE_TIMEFRAME = re.compile(r"^(today|now) (\d+)-([dmy])$")
+
+
+def resolve_timeframe(timeframe: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Explicit (start, end) dates of a pytrends timeframe.
+
+    Supports 'today N-m', 'today N-y', 'now N-d' and 'YYYY-MM-DD YYYY-MM-DD'.
+    """
+    today = today or date.today()
+    match = _RELATIVE_TIMEFRAME.match(timeframe.strip())
+    if match:
+        amount, unit = int(match.group(2)), match.group(3)
+        days = {"d": 1, "m": 30, "y": 365}[unit] * amount
+        return today - timedelta(days=days), today
+    try:
+        start, end = timeframe.split()
+        return date.fromisoformat(start), date.fromisoformat(end)
+    except ValueError:
+        raise ValueError(f"Unsupported timeframe: {timeframe!r}")
+
+
+def _explicit_timeframe(start: date, end: date) -> str:
+    return f"{start.isoformat()} {end.isoformat()}"
+
+
+class TrendsCache:
+    def __init__(self, cache_dir: str = "output/trends_cache", ttl: float = 6 * 3600):
+        """
+        On-disk cache of normalised interest series, one file per
+        (symbol, timeframe, geo), stored as NumPy arrays.
+
+        Args:
+            cache_dir: Directory holding the cache files
+            ttl: Seconds a series is served without asking Google for newer data
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    def _path(self, symbol: str, timeframe: str, geo: str) -> Path:
+        digest = hashlib.sha1(f"{symbol}\0{timeframe}\0{geo}".encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.npz"
+
+    def load(self, symbol: str, timeframe: str, geo: str, anchor: str) -> Optional[Tuple[pd.Series, float]]:
+        """
+        Cached series and its fetch time, or None.
+
+        Series normalised against a different anchor term are not comparable
+        and count as missing.
+        """
+        path = self._path(symbol, timeframe, geo)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["anchor"]) != anchor:
+                return None
+            series = pd.Series(data["values"], index=pd.to_datetime(data["dates"]), name=symbol)
+            return series, float(data["fetched_at"])
+
+    def save(self, symbol: str, timeframe: str, geo: str, anchor: str, series: pd.Series):
+        """Store a series, replacing the file atomically"""
+        path = self._path(symbol, timeframe, geo)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            dates=series.index.values.astype("datetime64[ns]"),
+            values=series.to_numpy(dtype=np.float64),
+            anchor=np.array(anchor),
+            fetched_at=np.array(time.time()),
+        )
+        tmp_path.replace(path)
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl
+
+
+class TrendsEngine:
+    def __init__(
+        self,
+        pytrends=None,
+        cache: Optional[TrendsCache] = None,
+        anchor: Optional[str] = None,
+        hl: str = 'en-US',
+        tz: int = 360,
+    ):
+        """
+        Google Trends interest for any number of terms, cached and normalised.
+
+        Terms are requested four at a time together with a shared anchor term.
+        Every chunk is rescaled so that the anchor's mean over the requested
+        range is 100, which puts all terms on one comparable scale.
+
+        Args:
+            pytrends: TrendReq-compatible client; created on first use if None
+            cache: Series cache; a default TrendsCache if None
+            anchor: Term included in every request; defaults to the first
+                symbol of each call
+            hl: TrendReq host language, used when creating the client
+            tz: TrendReq timezone offset, used when creating the client
+        """
+        self._pytrends = pytrends
+        self.cache = cache or TrendsCache()
+        self.anchor = anchor
+        self.hl = hl
+        self.tz = tz
+
+    @property
+    def pytrends(self):
+        if self._pytrends is None:
+            from pytrends.request import TrendReq
+            self._pytrends = TrendReq(hl=self.hl, tz=self.tz)
+        return self._pytrends
+
+    def _fetch_chunk(self, terms: List[str], timeframe: str, geo: str) -> pd.DataFrame:
+        """Raw 0-100 interest of up to five terms over one timeframe"""
+        self.pytrends.build_payload(terms, cat=0, timeframe=timeframe, geo=geo, gprop='')
+        frame = self.pytrends.interest_over_time()
+        if frame.empty:
+            return pd.DataFrame(columns=terms, dtype=np.float64)
+        return frame.drop(columns=['isPartial'], errors='ignore').astype(np.float64)
+
+    def _fetch_normalised(
+        self,
+        symbols: List[str],
+        anchor: str,
+        start: date,
+        end: date,
+        geo: str,
+        anchor_reference: Optional[pd.Series] = None,
+    ) -> pd.DataFrame:
+        """
+        Fetch symbols in anchor chunks and rescale onto the anchor scale.
+
+        Without anchor_reference the anchor's mean over the range becomes 100.
+        With it (an already normalised anchor series overlapping the range),
+        each chunk is scaled so the anchor matches the reference on the
+        overlapping dates.
+        """
+        others = [symbol for symbol in symbols if symbol != anchor]
+        chunk_size = MAX_TERMS_PER_REQUEST - 1
+        chunks = [others[i:i + chunk_size] for i in range(0, len(others), chunk_size)] or [[]]
+
+        columns = {}
+        for chunk in chunks:
+            raw = self._fetch_chunk([anchor] + chunk, _explicit_timeframe(start, end), geo)
+            if raw.empty:
+                continue
+            raw_anchor = raw[anchor]
+            overlap = raw_anchor.index.intersection(anchor_reference.index) if anchor_reference is not None else []
+            if len(overlap):
+                raw_level = raw_anchor.loc[overlap].mean()
+                target_level = anchor_reference.loc[overlap].mean()
+            else:
+                raw_level, target_level = raw_anchor.mean(), 100.0
+            scale = target_level / raw_level if raw_level > 0 else 1.0
+            for column in raw.columns:
+                columns[column] = raw[column] * scale
+
+        return pd.DataFrame(columns)
+
+    def interest_over_time(self, symbols: List[str], timeframe: str = 'today 3-m', geo: str = 'US') -> pd.DataFrame:
+        """
+        Interest of every symbol over a timeframe, one column per symbol.
+
+        Fresh cached series are served as is. Stale daily series are
+        extended by fetching only the dates after the cached end; anything
+        else missing is fetched in full.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        anchor = self.anchor or symbols[0]
+        start, end = resolve_timeframe(timeframe)
+        range_start = pd.Timestamp(start)
+
+        cached = {}
+        for symbol in dict.fromkeys([anchor] + symbols):
+            entry = self.cache.load(symbol, timeframe, geo, anchor)
+            if entry is not None:
+                cached[symbol] = entry
+
+        fresh = {symbol: series for symbol, (series, fetched_at) in cached.items() if self.cache.is_fresh(fetched_at)}
+        stale = [symbol for symbol in symbols if symbol not in fresh]
+        if not stale:
+            return pd.DataFrame({symbol: fresh[symbol][range_start:] for symbol in symbols})
+
+        updated = {}
+        daily = (end - start).days <= MAX_DAILY_RANGE_DAYS
+        anchor_entry = cached.get(anchor)
+        extendable = [
+            symbol for symbol in stale
+            if daily and anchor_entry is not None and symbol in cached
+            and not cached[symbol][0].empty and cached[symbol][0].index[0] <= range_start + pd.Timedelta(days=7)
+        ]
+        if extendable:
+            # Only dates after the shortest cached series are missing
+            cached_end = min(cached[symbol][0].index[-1] for symbol in extendable + [anchor]).date()
+            fetch_start = max(start, cached_end - timedelta(days=OVERLAP_DAYS))
+            anchor_series = anchor_entry[0]
+            tail = self._fetch_normalised(extendable, anchor, fetch_start, end, geo, anchor_reference=anchor_series)
+            for symbol in set(extendable) | {anchor}:
+                if symbol not in tail:
+                    continue
+                old = cached[symbol][0]
+                updated[symbol] = pd.concat([old[old.index < tail.index[0]], tail[symbol]])
+
+        missing = [symbol for symbol in stale if symbol not in updated]
+        if missing:
+            # Align with the anchor already on disk so old and new series share a scale
+            reference = updated.get(anchor, fresh.get(anchor))
+            full = self._fetch_normalised(missing, anchor, start, end, geo, anchor_reference=reference)
+            for symbol in full.columns:
+                if symbol in missing or (symbol == anchor and reference is None):
+                    updated[symbol] = full[symbol]
+
+        for symbol, series in updated.items():
+            series = series[range_start:].rename(symbol)
+            self.cache.save(symbol, timeframe, geo, anchor, series)
+            fresh[symbol] = series
+
+        return pd.DataFrame({
+            symbol: fresh[symbol][range_start:] for symbol in symbols if symbol in fresh
+        })
+
+
+def frame_to_dict(frame: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Symbol -> {'YYYY-MM-DD': value} view of a trends frame, for JSON output"""
+    dates = frame.index.strftime('%Y-%m-%d')
+    return {column: dict(zip(dates, frame[column].tolist())) for column in frame.columns}
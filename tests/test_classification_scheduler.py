@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.classification_scheduler import ClassificationScheduler
+
+
+class FakeLLMError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FakeLLM:
+    """Stands in for the structured-output LLM: scripted delays and failures per item"""
+
+    def __init__(self, delays=None, failures=None):
+        self.delays = delays or {}
+        self.failures = {key: list(errors) for key, errors in (failures or {}).items()}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def classify(self, item):
+        self.calls.append(item["id"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(item["id"], 0.01))
+            errors = self.failures.get(item["id"])
+            if errors:
+                raise errors.pop(0)
+            return f"class-{item['id']}"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+class RecordingScheduler(ClassificationScheduler):
+    """Records the backoff chosen before each retry"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backoffs = []
+
+    def _backoff(self, attempt, exc):
+        delay = super()._backoff(attempt, exc)
+        self.backoffs.append((attempt, delay))
+        return delay
+
+
+def items(count):
+    return [{"id": index} for index in range(count)]
+
+
+async def collect(scheduler, batch):
+    return [result async for result in scheduler.stream(batch)]
+
+
+def test_max_in_flight_caps_concurrent_calls():
+    llm = FakeLLM()
+    scheduler = ClassificationScheduler(llm.classify, max_in_flight=3)
+
+    results = asyncio.run(collect(scheduler, items(20)))
+
+    assert len(results) == 20
+    assert all(result.ok for result in results)
+    assert llm.max_in_flight == 3
+
+
+def test_retries_429_and_5xx_with_backoff():
+    llm = FakeLLM(failures={
+        0: [FakeLLMError(429), FakeLLMError(503)],
+        1: [FakeLLMError(500, retry_after="0.02")],
+    })
+    scheduler = RecordingScheduler(llm.classify, max_in_flight=2, base_delay=0.01, max_delay=0.05)
+
+    results = {result.index: result for result in asyncio.run(collect(scheduler, items(2)))}
+
+    assert results[0].ok and results[0].attempts == 3
+    assert results[1].ok and results[1].attempts == 2
+    assert llm.calls.count(0) == 3
+    # Full-jitter delays stay under base_delay * 2 ** (attempt - 1); Retry-After is honoured
+    assert len(scheduler.backoffs) == 3
+    assert all(0 <= delay <= min(0.05, 0.01 * 2 ** (attempt - 1)) or delay == 0.02
+               for attempt, delay in scheduler.backoffs)
+    assert (1, 0.02) in scheduler.backoffs
+
+
+def test_gives_up_after_max_retries():
+    llm = FakeLLM(failures={0: [FakeLLMError(503)] * 10})
+    scheduler = ClassificationScheduler(llm.classify, max_retries=2, base_delay=0.001)
+
+    [result] = asyncio.run(collect(scheduler, items(1)))
+
+    assert not result.ok
+    assert result.attempts == 3
+    assert result.error.status_code == 503
+
+
+def test_non_retryable_400_is_captured_per_item():
+    llm = FakeLLM(failures={1: [FakeLLMError(400)]})
+    scheduler = ClassificationScheduler(llm.classify, max_in_flight=2, base_delay=0.001)
+
+    results = {result.index: result for result in asyncio.run(collect(scheduler, items(4)))}
+
+    assert not results[1].ok
+    assert results[1].attempts == 1
+    assert results[1].error.status_code == 400
+    assert llm.calls.count(1) == 1
+    assert [results[index].classification for index in (0, 2, 3)] == ["class-0", "class-2", "class-3"]
+
+
+def test_stream_yields_in_completion_order():
+    llm = FakeLLM(delays={0: 0.15, 1: 0.01, 2: 0.08})
+    scheduler = ClassificationScheduler(llm.classify, max_in_flight=3)
+
+    results = asyncio.run(collect(scheduler, items(3)))
+
+    assert [result.index for result in results] == [1, 2, 0]
+    assert [result.item["id"] for result in results] == [1, 2, 0]
+
+
+def test_early_aclose_stops_pulling_items_and_cancels_calls():
+    llm = FakeLLM(delays={index: 0.05 for index in range(100)})
+    scheduler = ClassificationScheduler(llm.classify, max_in_flight=2)
+    pulled = []
+
+    def lazy_items():
+        for item in items(100):
+            pulled.append(item["id"])
+            yield item
+
+    async def consume_three():
+        stream = scheduler.stream(lazy_items())
+        taken = []
+        async for result in stream:
+            taken.append(result)
+            if len(taken) == 3:
+                break
+        await stream.aclose()
+        # Nothing keeps running once the stream is closed
+        await asyncio.sleep(0.1)
+        return taken
+
+    taken = asyncio.run(consume_three())
+
+    assert len(taken) == 3
+    # At most the items taken, results queued but not read, and calls in flight
+    assert len(pulled) <= 3 + 2 * scheduler.max_in_flight
+    assert len(llm.calls) == len(pulled)
+    assert llm.cancelled > 0
+    assert llm.in_flight == 0
@@ -0,0 +1,50 @@
+import sqlite3
+
+from create_tables import create_tables
+from src.contract_matching import ContractCriteria, ContractMatcher
+from src.db_pool import ConnectionPool
+
+
+def make_matcher(tmp_path, contracts):
+    """Matcher over a database holding `contracts` active contracts of one vendor"""
+    path = str(tmp_path / "contracts.db")
+    conn = sqlite3.connect(path)
+    create_tables(conn.cursor())
+    conn.execute("INSERT INTO ContractStatus (status_id, status_name) VALUES (1, 'Active')")
+    conn.execute("INSERT INTO ContractType (type_id, type_name) VALUES (1, 'Supply')")
+    conn.execute("INSERT INTO Currency (currency_code, currency_name) VALUES ('USD', 'US Dollar')")
+    conn.execute(
+        """INSERT INTO "User" (user_id, username, email, role)
+           VALUES (1, 'stub', 'stub@example.com', 'Admin')"""
+    )
+    conn.execute("INSERT INTO Vendor (vendor_id, vendor_name) VALUES (1, 'Stub Vendor')")
+    conn.executemany(
+        """INSERT INTO ContractHeader (contract_id, contract_number, vendor_id, contract_type_id,
+               status_id, start_date, end_date, total_value, currency_code, created_by)
+           VALUES (?, ?, 1, 1, 1, '2024-01-01', '2025-12-31', 1000, 'USD', 1)""",
+        [(number, f"CNT-{number}") for number in range(1, contracts + 1)]
+    )
+    conn.commit()
+    conn.close()
+    return ContractMatcher(ConnectionPool(path, size=1))
+
+
+def test_page_holding_the_last_match_has_no_cursor(tmp_path):
+    matcher = make_matcher(tmp_path, 3)
+
+    rows, next_cursor = matcher.page(ContractCriteria(), limit=3)
+
+    assert [row["contract_id"] for row in rows] == [1, 2, 3]
+    assert next_cursor is None
+
+
+def test_cursor_continues_after_the_last_returned_match(tmp_path):
+    matcher = make_matcher(tmp_path, 4)
+
+    rows, next_cursor = matcher.page(ContractCriteria(), limit=3)
+    assert [row["contract_id"] for row in rows] == [1, 2, 3]
+    assert next_cursor == 3
+
+    rows, next_cursor = matcher.page(ContractCriteria(), limit=3, after_contract_id=next_cursor)
+    assert [row["contract_id"] for row in rows] == [4]
+    assert next_cursor is None
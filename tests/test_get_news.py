@@ -0,0 +1,99 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.get_news import MarketAnalyzer
+from src.ingestion_state import IngestionState
+from src.jsonl_stream import read_jsonl
+
+PAGE_SIZE = 2
+
+
+def make_article(query, number):
+    return {
+        "title": f"{query} article {number}",
+        "description": "",
+        "url": f"https://example.com/{query}/{number}",
+        "publishedAt": f"2025-01-14T12:00:0{number}Z",
+        "source": {"name": "Stub"},
+    }
+
+
+class StubNewsAPI:
+    """'fast' answers one page; 'slow' holds its last page back until fast_news is in place"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.fast_file_ready_before_slow_finished = None
+
+    async def everything(self, request):
+        query, page = request.query["q"], int(request.query["page"])
+        if query == "fast":
+            # Also carries the first slow article, to check it is written once
+            articles = [make_article("fast", 0), make_article("slow", 0)]
+            return web.json_response({"totalResults": 2, "articles": articles})
+        if page == 2:
+            for _ in range(200):
+                if (self.output_dir / "fast.jsonl").exists():
+                    break
+                await asyncio.sleep(0.01)
+            self.fast_file_ready_before_slow_finished = (self.output_dir / "fast.jsonl").exists()
+        articles = [make_article("slow", (page - 1) * PAGE_SIZE + number) for number in range(PAGE_SIZE)]
+        return web.json_response({"totalResults": 2 * PAGE_SIZE, "articles": articles})
+
+
+async def stream(output_dir, state=None):
+    stub = StubNewsAPI(output_dir)
+    app = web.Application()
+    app.router.add_get("/v2/everything", stub.everything)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        analyzer = MarketAnalyzer("test-key")
+        analyzer.base_url = str(server.make_url("/v2/everything"))
+        written = await analyzer.stream_news_to_jsonl(
+            {"fast": ["fast"], "slow": ["slow"]}, output_dir, state=state, page_size=PAGE_SIZE, max_pages=5
+        )
+        return written, stub
+    finally:
+        await server.close()
+
+
+def titles(path):
+    return [article["title"] for article in read_jsonl(str(path))]
+
+
+def test_category_file_is_in_place_before_other_queries_finish(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    written, stub = asyncio.run(stream(output_dir))
+
+    assert stub.fast_file_ready_before_slow_finished is True
+    assert written == 6
+    assert titles(output_dir / "fast.jsonl") == ["fast article 0", "slow article 0"]
+    assert titles(output_dir / "slow.jsonl") == [f"slow article {number}" for number in range(4)]
+    assert len(titles(output_dir / "all_news.jsonl")) == 6
+    assert not list(output_dir.glob("*.tmp"))
+
+
+def test_incremental_stream_writes_each_article_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    state = IngestionState(str(tmp_path / "state.db"))
+
+    written, _ = asyncio.run(stream(output_dir, state))
+
+    # "slow article 0" arrives in both queries but is written by the first only
+    assert written == 5
+    assert sorted(titles(output_dir / "all_news.jsonl")) == sorted(
+        ["fast article 0"] + [f"slow article {number}" for number in range(4)]
+    )
+    assert set(state.watermarks()) == {"fast", "slow"}
+
+    written_again, _ = asyncio.run(stream(output_dir, state))
+    assert written_again == 0
+    state.close()
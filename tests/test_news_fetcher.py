@@ -0,0 +1,112 @@
+import asyncio
+from collections import Counter
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.news_fetcher import AsyncNewsFetcher, last_days_params
+
+PAGE_SIZE = 100
+
+
+def make_articles(query, page, count):
+    return [
+        {
+            "title": f"{query} article {page}-{number}",
+            "url": f"https://example.com/{query}/{page}/{number}",
+            "publishedAt": "2025-01-14T12:00:00Z",
+            "source": {"name": "Stub"},
+        }
+        for number in range(count)
+    ]
+
+
+class StubNewsAPI:
+    """Local stand-in for the NewsAPI everything endpoint; behaviour is chosen by the q parameter"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.api_keys = set()
+
+    async def everything(self, request):
+        query = request.query["q"]
+        page = int(request.query["page"])
+        self.requests[query] += 1
+        self.api_keys.add(request.headers.get("X-Api-Key"))
+
+        if query == "paged":
+            # 250 results: two full pages and a short last one
+            count = min(PAGE_SIZE, 250 - (page - 1) * PAGE_SIZE)
+            return web.json_response({"totalResults": 250, "articles": make_articles(query, page, count)})
+        if query == "limited":
+            # The plan's result limit is reached after the first page
+            if page > 1:
+                return web.json_response({"code": "maximumResultsReached"}, status=426)
+            return web.json_response({"totalResults": 1000, "articles": make_articles(query, page, PAGE_SIZE)})
+        if query == "flaky":
+            if self.requests[query] == 1:
+                return web.json_response({}, status=503, headers={"Retry-After": "0"})
+            return web.json_response({"totalResults": 10, "articles": make_articles(query, page, 10)})
+        if query == "broken":
+            await asyncio.sleep(0.01)
+            return web.json_response({}, status=500, headers={"Retry-After": "0"})
+        return web.json_response({"totalResults": 0, "articles": []})
+
+
+async def fetch(queries, **fetcher_options):
+    stub = StubNewsAPI()
+    app = web.Application()
+    app.router.add_get("/v2/everything", stub.everything)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        options = {"page_size": PAGE_SIZE, "max_retries": 2, "base_delay": 0.001, **fetcher_options}
+        async with AsyncNewsFetcher("test-key", str(server.make_url("/v2/everything")), **options) as fetcher:
+            articles = await fetcher.fetch_all({name: last_days_params([name]) for name in queries})
+            return articles, set(fetcher.incomplete), stub
+    finally:
+        await server.close()
+
+
+def test_paginates_up_to_total_results():
+    articles, incomplete, stub = asyncio.run(fetch(["paged"], max_pages=5))
+
+    assert len(articles["paged"]) == 250
+    assert len({article["url"] for article in articles["paged"]}) == 250
+    assert stub.requests["paged"] == 3
+    assert stub.api_keys == {"test-key"}
+    assert incomplete == set()
+
+
+def test_page_cap_marks_query_incomplete():
+    articles, incomplete, stub = asyncio.run(fetch(["paged"], max_pages=2))
+
+    assert len(articles["paged"]) == 200
+    assert stub.requests["paged"] == 2
+    assert incomplete == {"paged"}
+
+
+def test_426_ends_pagination_without_error():
+    articles, incomplete, stub = asyncio.run(fetch(["limited"], max_pages=5))
+
+    assert len(articles["limited"]) == PAGE_SIZE
+    assert stub.requests["limited"] == 2
+    assert incomplete == {"limited"}
+
+
+def test_503_is_retried_then_succeeds():
+    articles, incomplete, stub = asyncio.run(fetch(["flaky"]))
+
+    assert len(articles["flaky"]) == 10
+    assert stub.requests["flaky"] == 2
+    assert incomplete == set()
+
+
+def test_failing_query_does_not_cancel_the_others():
+    articles, incomplete, stub = asyncio.run(fetch(["broken", "paged", "flaky"], max_pages=5))
+
+    assert articles["broken"] == []
+    assert stub.requests["broken"] == 3  # first attempt and max_retries=2 retries
+    assert len(articles["paged"]) == 250
+    assert len(articles["flaky"]) == 10
+    assert incomplete == {"broken"}
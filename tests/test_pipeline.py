@@ -0,0 +1,81 @@
+import asyncio
+
+from src import pipeline
+from src.pipeline import STAGE_DUPLICATE, STAGE_FETCHED, NewsPipeline
+
+
+class UnusedLLM:
+    async def ainvoke(self, prompt):
+        raise AssertionError("deduplication does not classify")
+
+
+def make_pipeline(tmp_path):
+    return NewsPipeline(
+        str(tmp_path / "contracts.db"), "key", llm=UnusedLLM(), state_path=str(tmp_path / "state.db")
+    )
+
+
+def article(number, published_at):
+    return {
+        "title": "Dockworkers strike halts container traffic at the port of Rotterdam",
+        "description": "Unions walked out overnight and shipping lines are diverting vessels",
+        "source": "Stub",
+        "published_at": published_at,
+        "url": f"https://example.com/strike/{number}",
+    }
+
+
+async def deduplicate(news_pipeline, items):
+    """Run the dedup stage over items and return the keys passed on for classification"""
+    new_items, to_classify = asyncio.Queue(), asyncio.Queue()
+    for item in items:
+        await new_items.put(item)
+    worker = asyncio.ensure_future(news_pipeline.deduplicate(new_items, to_classify))
+    await new_items.join()
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+    return [to_classify.get_nowait()["key"] for _ in range(to_classify.qsize())]
+
+
+def stage(news_pipeline, key):
+    with news_pipeline.checkpoint.pool.connection() as conn:
+        return conn.execute("SELECT stage FROM PipelineItem WHERE item_key = ?", (key,)).fetchone()[0]
+
+
+def test_representative_queued_before_a_crash_is_classified_after_restart(tmp_path):
+    published = pipeline._timestamp(3600)
+    items = [{"key": f"story-{number}", "article": article(number, published)} for number in range(2)]
+
+    first_run = make_pipeline(tmp_path)
+    for item in items:
+        first_run.checkpoint.add(item["key"], item["article"])
+    assert asyncio.run(deduplicate(first_run, items)) == ["story-0"]
+    # The run stops before story-0 is classified
+    assert stage(first_run, "story-0") == STAGE_FETCHED
+    assert stage(first_run, "story-1") == STAGE_DUPLICATE
+
+    restarted = make_pipeline(tmp_path)
+    restarted._restore_stories()
+    resumed = restarted.checkpoint.pending(STAGE_FETCHED)
+
+    assert [item["key"] for item in resumed] == ["story-0"]
+    assert asyncio.run(deduplicate(restarted, resumed)) == ["story-0"]
+    assert stage(restarted, "story-0") == STAGE_FETCHED
+
+
+def test_restored_window_keeps_representatives_published_within_it(tmp_path):
+    first_run = make_pipeline(tmp_path)
+    old = {"key": "old", "article": dict(article("old", pipeline._timestamp(30 * 24 * 3600)), title="Earlier unrelated story")}
+    recent = {"key": "recent", "article": article("recent", pipeline._timestamp(3600))}
+    for item in (old, recent):
+        first_run.checkpoint.add(item["key"], item["article"])
+        first_run.checkpoint.advance(item["key"], pipeline.STAGE_PROCESSED)
+
+    restarted = make_pipeline(tmp_path)
+    restarted._restore_stories()
+    copy = {"key": "copy", "article": article("copy", pipeline._timestamp(60))}
+    restarted.checkpoint.add(copy["key"], copy["article"])
+
+    assert [key for _, key, _ in restarted._stories] == ["recent"]
+    assert asyncio.run(deduplicate(restarted, [copy])) == []
+    assert stage(restarted, "copy") == STAGE_DUPLICATE
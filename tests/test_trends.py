@@ -0,0 +1,107 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.trends import MAX_TERMS_PER_REQUEST, TrendsCache, TrendsEngine
+
+TIMEFRAME = "2026-01-01 2026-03-31"
+SYMBOLS = ["ANCHOR"] + [f"T{number}" for number in range(9)]
+
+
+class FakeTrendReq:
+    """
+    Stand-in for pytrends' TrendReq over a fixed set of true interest series.
+
+    Like Google Trends, every response is scaled so its largest value is 100,
+    which makes separate requests incomparable until they are rescaled.
+    Data is only available up to available_until.
+    """
+
+    def __init__(self, available_until: date):
+        dates = pd.date_range("2025-12-01", "2026-04-30", freq="D")
+        days = np.arange(len(dates))
+        self.truth = pd.DataFrame({
+            symbol: (number + 1) * 10 * (1.5 + np.sin(days / (number + 3)))
+            for number, symbol in enumerate(SYMBOLS)
+        }, index=dates)
+        self.available_until = available_until
+        self.payloads = []
+
+    def build_payload(self, kw_list, cat=0, timeframe="", geo="", gprop=""):
+        assert len(kw_list) <= MAX_TERMS_PER_REQUEST
+        self.payloads.append((list(kw_list), timeframe))
+
+    def interest_over_time(self):
+        terms, timeframe = self.payloads[-1]
+        start, end = (pd.Timestamp(value) for value in timeframe.split())
+        end = min(end, pd.Timestamp(self.available_until))
+        frame = self.truth.loc[start:end, terms]
+        frame = frame * (100.0 / frame.to_numpy().max())
+        frame["isPartial"] = False
+        return frame
+
+
+def make_engine(tmp_path, pytrends, ttl):
+    return TrendsEngine(pytrends=pytrends, cache=TrendsCache(str(tmp_path / "cache"), ttl=ttl))
+
+
+def assert_one_scale(frame, truth):
+    """Every column keeps its true ratio to the anchor on every date"""
+    expected = truth.loc[frame.index, frame.columns].div(truth.loc[frame.index, "ANCHOR"], axis=0)
+    actual = frame.div(frame["ANCHOR"], axis=0)
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+
+def test_requests_at_most_five_terms_with_the_anchor_in_each(tmp_path):
+    pytrends = FakeTrendReq(available_until=date(2026, 3, 31))
+    frame = make_engine(tmp_path, pytrends, ttl=3600).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+
+    assert list(frame.columns) == SYMBOLS
+    assert len(pytrends.payloads) == 3
+    requested = []
+    for terms, timeframe in pytrends.payloads:
+        assert terms[0] == "ANCHOR"
+        assert len(terms) <= MAX_TERMS_PER_REQUEST
+        assert timeframe == TIMEFRAME
+        requested += terms[1:]
+    assert sorted(requested) == sorted(SYMBOLS[1:])
+
+
+def test_chunks_share_one_scale(tmp_path):
+    pytrends = FakeTrendReq(available_until=date(2026, 3, 31))
+    frame = make_engine(tmp_path, pytrends, ttl=3600).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+
+    assert frame["ANCHOR"].mean() == pytest.approx(100.0)
+    assert_one_scale(frame, pytrends.truth)
+
+
+def test_fresh_cache_makes_no_requests(tmp_path):
+    pytrends = FakeTrendReq(available_until=date(2026, 3, 31))
+    first = make_engine(tmp_path, pytrends, ttl=3600).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+    pytrends.payloads.clear()
+
+    second = make_engine(tmp_path, pytrends, ttl=3600).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+
+    assert pytrends.payloads == []
+    pd.testing.assert_frame_equal(second, first, check_freq=False, check_index_type=False)
+
+
+def test_stale_cache_fetches_only_the_missing_tail(tmp_path):
+    pytrends = FakeTrendReq(available_until=date(2026, 3, 20))
+    first = make_engine(tmp_path, pytrends, ttl=0).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+    assert first.index[-1] == pd.Timestamp("2026-03-20")
+    pytrends.payloads.clear()
+    pytrends.available_until = date(2026, 3, 31)
+
+    second = make_engine(tmp_path, pytrends, ttl=0).interest_over_time(SYMBOLS, timeframe=TIMEFRAME)
+
+    # The week before the cached end is fetched again to rescale the new dates
+    assert len(pytrends.payloads) == 3
+    assert {timeframe for _, timeframe in pytrends.payloads} == {"2026-03-13 2026-03-31"}
+    assert second.index[0] == pd.Timestamp("2026-01-01")
+    assert second.index[-1] == pd.Timestamp("2026-03-31")
+    assert second.index.is_unique
+    pd.testing.assert_frame_equal(second.loc[:"2026-03-12"], first.loc[:"2026-03-12"], check_freq=False, check_index_type=False)
+    assert_one_scale(second, pytrends.truth)
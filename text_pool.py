@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from faker import Faker
+
+DEFAULT_POOL_SIZE = 512
+DEFAULT_CACHE_DIR = "output/text_pool"
+
+
+class TextPool:
+    def __init__(
+        self,
+        max_nb_chars: int,
+        size: int = DEFAULT_POOL_SIZE,
+        seed: int = 0,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        intern: bool = True,
+    ):
+        """
+        A fixed set of Faker paragraphs that text columns are sampled from.
+
+        The paragraphs are generated once per (max_nb_chars, size, seed) and
+        kept in a JSON file under cache_dir, so later runs load them instead
+        of calling Faker again.
+
+        Args:
+            max_nb_chars: Maximum length of each paragraph, as for fake.text
+            size: Number of paragraphs in the pool
+            seed: Faker seed the paragraphs are generated with
+            cache_dir: Directory of the cached pool files; None disables the cache
+            intern: Drop duplicate paragraphs and intern the rest, so every
+                sampled row shares one string object per distinct text
+        """
+        self.max_nb_chars = max_nb_chars
+        self.size = size
+        self.seed = seed
+        self.cache_path = Path(cache_dir) / f"text_{max_nb_chars}_{size}_{seed}.json" if cache_dir else None
+
+        texts = self._load() if self.cache_path else None
+        if texts is None:
+            texts = self._generate()
+            if self.cache_path:
+                self._save(texts)
+        if intern:
+            texts = [sys.intern(text) for text in dict.fromkeys(texts)]
+        self.texts: List[str] = texts
+        self.array = np.array(texts, dtype=object)
+
+    def _generate(self) -> List[str]:
+        faker = Faker()
+        faker.seed_instance(self.seed)
+        return [faker.text(max_nb_chars=self.max_nb_chars) for _ in range(self.size)]
+
+    def _load(self) -> Optional[List[str]]:
+        if not self.cache_path.exists():
+            return None
+        with open(self.cache_path, encoding="utf-8") as f:
+            texts = json.load(f)
+        return texts if len(texts) == self.size else None
+
+    def _save(self, texts: List[str]):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def text(self) -> str:
+        """One paragraph, drawn with the random module (a drop-in for fake.text)"""
+        return self.texts[random.randrange(len(self.texts))]
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """``size`` paragraphs drawn by index with a NumPy generator"""
+        return self.array[rng.integers(0, len(self.array), size)]
+
+
+_pools: Dict[Tuple, TextPool] = {}
+
+
+def get_text_pool(max_nb_chars: int, size: int = DEFAULT_POOL_SIZE, seed: int = 0, **kwargs) -> TextPool:
+    """Shared TextPool for a paragraph length, built on first use"""
+    key = (max_nb_chars, size, seed)
+    if key not in _pools:
+        _pools[key] = TextPool(max_nb_chars, size=size, seed=seed, **kwargs)
+    return _pools[key]
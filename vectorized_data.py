@@ -0,0 +1,458 @@
+import time
+import zlib
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.bulk_insert import DEFAULT_CHUNK_SIZE, stream_executemany
+from text_pool import TextPool, get_text_pool
+
+# Rows at scale 1.0, matching the defaults of the row-by-row generators
+BASE_CONTRACTS = 400
+BASE_EVENTS = 200
+
+# Parent ids (contracts / events) per deterministic random block. Every
+# block draws from its own generator seeded by (seed, table, block), so the
+# output does not depend on how blocks are scheduled.
+BLOCK_SIZE = 1000
+
+IMPACT_LEVELS = ['none', 'low', 'medium', 'high', 'critical']
+NOTIFICATION_TYPES = ['Email', 'SMS', 'System', 'Mobile App']
+
+CONTRACT_COLUMNS = (
+    'contract_number', 'vendor_id', 'contract_type_id', 'status_id',
+    'start_date', 'end_date', 'total_value', 'currency_code',
+    'terms_conditions', 'business_unit_id', 'region_id', 'created_by'
+)
+CONTRACT_LINE_COLUMNS = (
+    'contract_id', 'product_id', 'service_id', 'uom_id',
+    'quantity', 'unit_price', 'line_value',
+    'delivery_start', 'delivery_end', 'line_description'
+)
+KPI_MEASUREMENT_COLUMNS = (
+    'contract_id', 'kpi_id', 'measure_date',
+    'actual_value', 'target_value', 'achievement_percentage',
+    'status', 'comments'
+)
+IMPACT_ASSESSMENT_COLUMNS = (
+    'event_id', 'contract_id', 'impact_level',
+    'impact_description', 'recommended_actions',
+    'assessment_date', 'assessed_by', 'is_active'
+)
+NOTIFICATION_COLUMNS = (
+    'event_id', 'user_id', 'notification_type',
+    'notification_status', 'sent_at', 'read_at'
+)
+
+
+def block_rng(seed: int, table: str, block: int) -> np.random.Generator:
+    """Random generator for one block of one table"""
+    return np.random.default_rng([seed, zlib.crc32(table.encode('utf-8')), block])
+
+
+def iter_blocks(ids: np.ndarray, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+    """(block index, ids) pairs covering ids in order"""
+    for block, start in enumerate(range(0, len(ids), block_size)):
+        yield block, ids[start:start + block_size]
+
+
+def pick(rng: np.random.Generator, values: Sequence, size: int) -> np.ndarray:
+    """Uniform random choice with replacement, as an array"""
+    values = np.asarray(values, dtype=object if any(v is None for v in values) else None)
+    return values[rng.integers(0, len(values), size)]
+
+
+def distinct_picks(rng: np.random.Generator, counts: np.ndarray, population: int) -> np.ndarray:
+    """
+    Indexes of ``counts[i]`` distinct items out of ``population`` per parent,
+    flattened. Items are first + k * stride (mod population), which never
+    repeats for k < counts[i] because stride * max(counts) <= population.
+    """
+    width = int(counts.max()) if len(counts) else 0
+    first = rng.integers(0, population, len(counts))
+    stride = rng.integers(1, max(population // max(width, 1), 1) + 1, len(counts))
+    grid = (first[:, None] + np.arange(width)[None, :] * stride[:, None]) % population
+    return grid[np.arange(width)[None, :] < counts[:, None]]
+
+
+def iso_dates(days: np.ndarray) -> np.ndarray:
+    """datetime64 values as 'YYYY-MM-DD' strings"""
+    return np.datetime_as_string(days.astype('datetime64[D]'), unit='D')
+
+
+def iso_timestamps(times: np.ndarray) -> np.ndarray:
+    """datetime64 values as 'YYYY-MM-DD HH:MM:SS' strings (NaT becomes None)"""
+    text = np.char.replace(np.datetime_as_string(times.astype('datetime64[s]'), unit='s'), 'T', ' ').astype(object)
+    text[np.isnat(times)] = None
+    return text
+
+
+def contract_columns(
+    rng: np.random.Generator,
+    first_number: int,
+    count: int,
+    refs: Dict,
+    text_pool: TextPool,
+    today: np.datetime64,
+) -> Dict[str, np.ndarray]:
+    """ContractHeader columns for contract numbers first_number .. first_number + count - 1"""
+    numbers = np.arange(first_number, first_number + count).astype(str)
+    start_date = today - rng.integers(0, 365 * 2 + 1, count)  # Up to 2 years in the past
+    end_date = start_date + pick(rng, [90, 180, 365, 730], count).astype(int)
+    return {
+        'contract_number': np.char.add('CTR', np.char.zfill(numbers, 6)),
+        'vendor_id': pick(rng, refs['vendor_ids'], count),
+        'contract_type_id': pick(rng, refs['contract_type_ids'], count),
+        'status_id': pick(rng, refs['contract_status_ids'], count),
+        'start_date': iso_dates(start_date),
+        'end_date': iso_dates(end_date),
+        'total_value': np.round(rng.uniform(10000, 1000000, count), 2),
+        'currency_code': pick(rng, refs['currency_codes'], count),
+        'terms_conditions': text_pool.sample(rng, count),
+        'business_unit_id': pick(rng, refs['unit_ids'], count),
+        'region_id': pick(rng, refs['region_ids'], count),
+        'created_by': pick(rng, refs['user_ids'], count),
+    }
+
+
+def contract_line_columns(
+    rng: np.random.Generator,
+    contract_ids: np.ndarray,
+    refs: Dict,
+    text_pool: TextPool,
+    today: np.datetime64,
+) -> Dict[str, np.ndarray]:
+    """ContractLine columns: 1-5 lines per contract, 60% products and 40% services"""
+    contract_id = np.repeat(contract_ids, rng.integers(1, 6, len(contract_ids)))
+    count = len(contract_id)
+    is_product = rng.random(count) < 0.6
+    quantity = np.round(rng.uniform(1, 100, count), 2)
+    unit_price = np.round(rng.uniform(100, 10000, count), 2)
+    return {
+        'contract_id': contract_id,
+        'product_id': np.where(is_product, pick(rng, refs['product_ids'], count), None),
+        'service_id': np.where(is_product, None, pick(rng, refs['service_ids'], count)),
+        'uom_id': pick(rng, refs['uom_ids'], count),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'line_value': quantity * unit_price,
+        'delivery_start': iso_dates(today + rng.integers(-365, 366, count)),
+        'delivery_end': iso_dates(today + rng.integers(365, 731, count)),
+        'line_description': text_pool.sample(rng, count),
+    }
+
+
+def kpi_measurement_columns(
+    rng: np.random.Generator,
+    contract_ids: np.ndarray,
+    kpi_ids: np.ndarray,
+    targets: np.ndarray,
+    text_pool: TextPool,
+    today: np.datetime64,
+    months: int = 24,
+) -> Dict[str, np.ndarray]:
+    """ContractKPIMeasurement columns: one row per contract, KPI and month"""
+    per_contract = len(kpi_ids) * months
+    count = len(contract_ids) * per_contract
+    target_value = np.tile(np.repeat(targets.astype(float), months), len(contract_ids))
+    actual_value = np.round(target_value * rng.uniform(0.7, 1.3, count), 2)
+
+    has_target = target_value != 0
+    achievement = np.round(np.divide(actual_value * 100, target_value, out=np.zeros(count), where=has_target), 2)
+    status = np.select(
+        [~has_target | (achievement == 0), actual_value >= target_value, actual_value >= target_value * 0.9],
+        ['Not Applicable', 'Achieved', 'At Risk'],
+        'Below Target'
+    )
+    month_offsets = np.tile(np.arange(months) * 30, len(contract_ids) * len(kpi_ids))
+    return {
+        'contract_id': np.repeat(contract_ids, per_contract),
+        'kpi_id': np.tile(np.repeat(kpi_ids, months), len(contract_ids)),
+        'measure_date': iso_dates(today - month_offsets),
+        'actual_value': actual_value,
+        'target_value': target_value,
+        'achievement_percentage': np.where(has_target, achievement, None),
+        'status': status,
+        'comments': text_pool.sample(rng, count),
+    }
+
+
+def impact_assessment_columns(
+    rng: np.random.Generator,
+    event_ids: np.ndarray,
+    occurrence_dates: np.ndarray,
+    contract_ids: np.ndarray,
+    user_ids: Sequence[int],
+    text_pool: TextPool,
+) -> Dict[str, np.ndarray]:
+    """EventImpactAssessment columns: 1-5 distinct affected contracts per event"""
+    counts = np.minimum(rng.integers(1, 6, len(event_ids)), len(contract_ids))
+    count = int(counts.sum())
+    occurred = np.repeat(occurrence_dates.astype('datetime64[s]'), counts)
+    hours = rng.integers(4, 49, count).astype('timedelta64[h]')
+    return {
+        'event_id': np.repeat(event_ids, counts),
+        'contract_id': contract_ids[distinct_picks(rng, counts, len(contract_ids))],
+        'impact_level': pick(rng, IMPACT_LEVELS, count),
+        'impact_description': text_pool.sample(rng, count),
+        'recommended_actions': text_pool.sample(rng, count),
+        'assessment_date': iso_timestamps(occurred + hours),
+        'assessed_by': pick(rng, user_ids, count),
+        'is_active': np.ones(count, dtype=bool),
+    }
+
+
+def notification_columns(
+    rng: np.random.Generator,
+    event_ids: np.ndarray,
+    user_ids: Sequence[int],
+    now: np.datetime64,
+) -> Dict[str, np.ndarray]:
+    """EventNotification columns: 2-5 distinct users per event, 80% of them read"""
+    user_ids = np.asarray(user_ids)
+    counts = np.minimum(rng.integers(2, 6, len(event_ids)), len(user_ids))
+    count = int(counts.sum())
+    sent_at = now.astype('datetime64[s]') - rng.integers(1, 31, count).astype('timedelta64[D]')
+    is_read = rng.random(count) < 0.8
+    read_at = np.where(
+        is_read,
+        sent_at + rng.integers(1, 1441, count).astype('timedelta64[m]'),
+        np.datetime64('NaT')
+    )
+    return {
+        'event_id': np.repeat(event_ids, counts),
+        'user_id': user_ids[distinct_picks(rng, counts, len(user_ids))],
+        'notification_type': pick(rng, NOTIFICATION_TYPES, count),
+        'notification_status': np.where(is_read, 'read', 'sent'),
+        'sent_at': iso_timestamps(sent_at),
+        'read_at': iso_timestamps(read_at),
+    }
+
+
+def column_rows(columns: Dict[str, np.ndarray], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple]:
+    """Row tuples of plain Python values for executemany, converted one chunk at a time"""
+    arrays = list(columns.values())
+    for start in range(0, len(arrays[0]) if arrays else 0, chunk_size):
+        yield from zip(*(array[start:start + chunk_size].tolist() for array in arrays))
+
+
+def insert_columns(cursor, table: str, columns: Dict[str, np.ndarray]) -> int:
+    """Insert column arrays into a table and return the number of rows"""
+    names = list(columns)
+    return stream_executemany(
+        cursor,
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+        column_rows(columns),
+        report=False
+    )
+
+
+# (table, block, builder keyword arguments, text pool paragraph length)
+BlockTask = Tuple[str, int, Dict, Optional[int]]
+
+
+def build_block(seed: int, task: BlockTask) -> Tuple[str, Dict[str, np.ndarray]]:
+    """
+    Build the columns of one block of one table.
+
+    Depends only on the seed and the task, so blocks can be built in any
+    process and any order and still come out the same.
+    """
+    table, block, kwargs, text_chars = task
+    if text_chars is not None:
+        kwargs = dict(kwargs, text_pool=get_text_pool(text_chars, seed=seed))
+    return table, BLOCK_BUILDERS[table](block_rng(seed, table, block), **kwargs)
+
+
+def load_refs(cursor) -> Dict[str, List]:
+    """Ids of the lookup rows the vectorised generators pick from"""
+    def ids(query):
+        cursor.execute(query)
+        return [row[0] for row in cursor.fetchall()]
+
+    return {
+        'vendor_ids': ids("SELECT vendor_id FROM Vendor WHERE is_active = 1"),
+        'contract_type_ids': ids("SELECT type_id FROM ContractType WHERE is_active = 1"),
+        'contract_status_ids': ids("SELECT status_id FROM ContractStatus WHERE is_active = 1"),
+        'currency_codes': ids("SELECT currency_code FROM Currency WHERE is_active = 1"),
+        'user_ids': ids("SELECT user_id FROM User WHERE is_active = 1"),
+        'unit_ids': ids("SELECT unit_id FROM BusinessUnit") or [None],
+        'region_ids': ids("SELECT region_id FROM GeographicRegion") or [None],
+        'product_ids': ids("SELECT product_id FROM Product WHERE is_active = 1"),
+        'service_ids': ids("SELECT service_id FROM Service WHERE is_active = 1"),
+        'uom_ids': ids("SELECT uom_id FROM UnitOfMeasure"),
+    }
+
+
+BLOCK_BUILDERS = {
+    'ContractHeader': contract_columns,
+    'ContractLine': contract_line_columns,
+    'ContractKPIMeasurement': kpi_measurement_columns,
+    'EventImpactAssessment': impact_assessment_columns,
+    'EventNotification': notification_columns,
+}
+
+
+class VectorizedGenerator:
+    def __init__(self, cursor, scale: float = 1.0, seed: int = 42, today=None, workers: Optional[int] = None):
+        """
+        Generate the large contract and event tables from NumPy column arrays.
+
+        Every table is split into blocks of BLOCK_SIZE parent ids (contract
+        or event id ranges) with their own deterministic random generator.
+        With workers, blocks are built in a process pool while this process
+        alone writes them, in block order, so the data and row ids are the
+        same as with workers=None.
+
+        Args:
+            cursor: Cursor on the database being seeded
+            scale: Multiplier on the default row counts (400 contracts and
+                200 events at 1.0); dependent tables grow with their parents
+            seed: Seed for every random draw, so a given scale, seed and
+                today always produce the same data
+            today: Reference date for generated dates (defaults to now)
+            workers: Worker processes building blocks; None or 1 builds
+                them in this process
+        """
+        self.cursor = cursor
+        self.scale = scale
+        self.seed = seed
+        self.workers = workers if workers and workers > 1 else None
+        self.now = np.datetime64(today, 's') if today is not None else np.datetime64('now', 's')
+        self.today = self.now.astype('datetime64[D]')
+        self.refs = load_refs(cursor)
+
+    @property
+    def num_contracts(self) -> int:
+        return max(1, round(BASE_CONTRACTS * self.scale))
+
+    @property
+    def num_events(self) -> int:
+        return max(1, round(BASE_EVENTS * self.scale))
+
+    def text_pool(self, max_nb_chars: int) -> TextPool:
+        return get_text_pool(max_nb_chars, seed=self.seed)
+
+    def _ids(self, query: str, params=()) -> np.ndarray:
+        self.cursor.execute(query, params)
+        return np.array([row[0] for row in self.cursor.fetchall()], dtype=np.int64)
+
+    def contract_tasks(self) -> Iterator[BlockTask]:
+        for block, numbers in iter_blocks(np.arange(1, self.num_contracts + 1)):
+            kwargs = dict(first_number=int(numbers[0]), count=len(numbers), refs=self.refs, today=self.today)
+            yield 'ContractHeader', block, kwargs, 500
+
+    def contract_line_tasks(self, contract_ids: np.ndarray) -> Iterator[BlockTask]:
+        for block, ids in iter_blocks(contract_ids):
+            yield 'ContractLine', block, dict(contract_ids=ids, refs=self.refs, today=self.today), 200
+
+    def kpi_measurement_tasks(self, contract_ids: np.ndarray, kpis: List[Tuple]) -> Iterator[BlockTask]:
+        kpi_ids = np.array([kpi_id for kpi_id, _ in kpis], dtype=np.int64)
+        targets = np.array([target for _, target in kpis], dtype=float)
+        for block, ids in iter_blocks(contract_ids):
+            kwargs = dict(contract_ids=ids, kpi_ids=kpi_ids, targets=targets, today=self.today)
+            yield 'ContractKPIMeasurement', block, kwargs, 100
+
+    def impact_assessment_tasks(
+        self,
+        event_ids: np.ndarray,
+        occurrence_dates: np.ndarray,
+        contract_ids: np.ndarray,
+    ) -> Iterator[BlockTask]:
+        for block, start in enumerate(range(0, len(event_ids), BLOCK_SIZE)):
+            kwargs = dict(
+                event_ids=event_ids[start:start + BLOCK_SIZE],
+                occurrence_dates=occurrence_dates[start:start + BLOCK_SIZE],
+                contract_ids=contract_ids,
+                user_ids=self.refs['user_ids'],
+            )
+            yield 'EventImpactAssessment', block, kwargs, 200
+
+    def notification_tasks(self, event_ids: np.ndarray) -> Iterator[BlockTask]:
+        for block, ids in iter_blocks(event_ids):
+            yield 'EventNotification', block, dict(event_ids=ids, user_ids=self.refs['user_ids'], now=self.now), None
+
+    def build_blocks(self, tasks: Iterable[BlockTask]) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        """(table, columns) for every task, in task order"""
+        if not self.workers:
+            for task in tasks:
+                yield build_block(self.seed, task)
+            return
+
+        tasks = list(tasks)
+        # Write the text pool cache files once so workers load rather than generate them
+        for text_chars in {task[3] for task in tasks if task[3] is not None}:
+            self.text_pool(text_chars)
+        # Bound the blocks held in memory while the writer catches up
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(build_block, self.seed, task))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def write_blocks(self, tasks: Iterable[BlockTask]) -> Dict[str, int]:
+        """Insert every block in order, commit once at the end and report rows/s; returns rows per table"""
+        totals, elapsed = {}, {}
+        last = time.perf_counter()
+        for table, columns in self.build_blocks(tasks):
+            totals[table] = totals.get(table, 0) + insert_columns(self.cursor, table, columns)
+            # Time spent waiting for and writing the block counts against its table
+            now = time.perf_counter()
+            elapsed[table] = elapsed.get(table, 0.0) + now - last
+            last = now
+        self.cursor.connection.commit()
+        for table, total in totals.items():
+            print(f"Inserted {total} rows into {table} ({total / max(elapsed[table], 1e-9):,.0f} rows/s)")
+        return totals
+
+    def generate_contracts(self) -> int:
+        return self.write_blocks(self.contract_tasks()).get('ContractHeader', 0)
+
+    def generate_contract_lines(self) -> int:
+        contract_ids = self._ids("SELECT contract_id FROM ContractHeader ORDER BY contract_id")
+        return self.write_blocks(self.contract_line_tasks(contract_ids)).get('ContractLine', 0)
+
+    def kpi_inputs(self) -> Tuple[np.ndarray, List[Tuple]]:
+        contract_ids = self._ids("""
+            SELECT contract_id
+            FROM ContractHeader
+            WHERE status_id IN (
+                SELECT status_id FROM ContractStatus WHERE status_name IN ('Active', 'Completed')
+            )
+            ORDER BY contract_id
+        """)
+        self.cursor.execute("SELECT kpi_id, target_threshold FROM KPIDefinition WHERE is_active = 1 ORDER BY kpi_id")
+        return contract_ids, self.cursor.fetchall()
+
+    def generate_kpi_measurements(self) -> int:
+        contract_ids, kpis = self.kpi_inputs()
+        return self.write_blocks(self.kpi_measurement_tasks(contract_ids, kpis)).get('ContractKPIMeasurement', 0)
+
+    def event_inputs(self, after_event_id: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Event ids and occurrence dates of events newer than after_event_id, and all contract ids"""
+        self.cursor.execute("""
+            SELECT event_id, occurrence_date
+            FROM Event
+            WHERE event_id > ?
+            ORDER BY event_id
+        """, (after_event_id,))
+        rows = self.cursor.fetchall()
+        event_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        occurrence_dates = np.array([str(row[1]).replace(' ', 'T') for row in rows], dtype='datetime64[s]')
+        contract_ids = self._ids("SELECT contract_id FROM ContractHeader ORDER BY contract_id")
+        return event_ids, occurrence_dates, contract_ids
+
+    def generate_event_details(self, after_event_id: int = 0) -> int:
+        """Impact assessments and notifications for events newer than after_event_id"""
+        event_ids, occurrence_dates, contract_ids = self.event_inputs(after_event_id)
+        tasks = chain(
+            self.impact_assessment_tasks(event_ids, occurrence_dates, contract_ids),
+            self.notification_tasks(event_ids),
+        )
+        return sum(self.write_blocks(tasks).values())